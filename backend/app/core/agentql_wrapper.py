@@ -1,10 +1,86 @@
 # app/core/agentql_wrapper.py
 
+import asyncio
 import agentql
 from playwright.async_api import Page
+from app.core import metrics
+from app.core.config import Config
+from app.core.page_readiness import PageReadiness
+from app.core.selector_cache import SelectorCache, parse_query_fields
+
+
+def _merge_queries(queries) -> str:
+    """
+    Combines several AgentQL queries into one by joining their top-level fields.
+
+    Returns:
+        str: The combined query, or None if the queries cannot be merged safely
+        (unparseable queries or top-level field names that collide).
+    """
+    seen_fields = set()
+    bodies = []
+    for query in queries:
+        fields = parse_query_fields(query)
+        if fields is None or seen_fields & fields.keys():
+            return None
+        seen_fields.update(fields)
+        bodies.append(query[query.index("{") + 1 : query.rindex("}")])
+    return "{" + "".join(bodies) + "}"
+
+
+class BatchResponseView:
+    """Exposes only one query's fields from a combined AgentQL response."""
+
+    def __init__(self, response, field_names):
+        self._response = response
+        self._field_names = frozenset(field_names)
+
+    def __getattr__(self, name):
+        if name not in self.__dict__["_field_names"]:
+            raise AttributeError(name)
+        return getattr(self.__dict__["_response"], name)
 
 
 class AgentQLWrapper:
+    _selector_cache = None
+    _backend = None  # Replacement for agentql.wrap_async, e.g. a local stub in benchmarks
+
+    @staticmethod
+    def use_backend(wrap_async):
+        """
+        Routes page wrapping, and so every AgentQL query, through another implementation.
+
+        Args:
+            wrap_async: Coroutine function taking a Playwright page and returning an object
+                with an async `query_elements(query)`, or None to restore AgentQL.
+        """
+        AgentQLWrapper._backend = wrap_async
+
+    @staticmethod
+    def configure_selector_cache(redis_helper):
+        """
+        Creates the process-wide selector cache on the process's shared RedisHelper.
+
+        Args:
+            redis_helper: The RedisHelper to share entries through when
+                AGENTQL_SELECTOR_CACHE_REDIS is set; otherwise entries stay in memory.
+        """
+        AgentQLWrapper._selector_cache = SelectorCache(
+            redis_helper=redis_helper if Config.AGENTQL_SELECTOR_CACHE_REDIS else None
+        )
+
+    @staticmethod
+    def get_selector_cache() -> SelectorCache:
+        """Returns the process-wide selector cache; an in-memory one if none was configured."""
+        if not AgentQLWrapper._selector_cache:
+            AgentQLWrapper._selector_cache = SelectorCache()
+        return AgentQLWrapper._selector_cache
+
+    @staticmethod
+    def selector_cache_stats() -> dict:
+        """Returns hit/miss counters showing how many AgentQL round-trips the cache saved."""
+        return AgentQLWrapper.get_selector_cache().stats()
+
     @staticmethod
     async def wrap_async(page: Page):
         """
@@ -16,6 +92,8 @@ class AgentQLWrapper:
         Returns:
             wrapped_page: The page wrapped with AgentQL for asynchronous use.
         """
+        if AgentQLWrapper._backend:
+            return await AgentQLWrapper._backend(page)
         return await agentql.wrap_async(page)
 
     @staticmethod
@@ -23,6 +101,9 @@ class AgentQLWrapper:
         """
         Queries elements on the page using AgentQL.
 
+        Selectors previously learned for the same query and page layout are tried first;
+        AgentQL is only called on a cache miss or when a cached selector no longer matches.
+
         Args:
             wrapped_page: The page object wrapped with AgentQL.
             query (str): The AgentQL query string to locate elements.
@@ -30,7 +111,72 @@ class AgentQLWrapper:
         Returns:
             response: The result of the AgentQL query, containing the requested elements.
         """
-        return await wrapped_page.query_elements(query)
+        cache = AgentQLWrapper.get_selector_cache()
+        query_label = metrics.query_name(query)
+        if not cache.enabled:
+            with metrics.agentql_query(query_label, "agentql"):
+                return await wrapped_page.query_elements(query)
+
+        with metrics.agentql_cache_lookup(query_label) as lookup:
+            cached_response, key = await cache.lookup(wrapped_page, query)
+            lookup["hit"] = cached_response is not None
+        if cached_response is not None:
+            return cached_response
+
+        with metrics.agentql_query(query_label, "agentql"):
+            response = await wrapped_page.query_elements(query)
+        await cache.store(key, query, response)
+        return response
+
+    @staticmethod
+    async def query_batch(wrapped_page, *queries: str) -> list:
+        """
+        Runs several independent queries against the same page state with as few AgentQL
+        round-trips as possible.
+
+        Queries answered by the selector cache are resolved locally; the rest are merged
+        into a single combined AgentQL request, or run concurrently if they cannot be merged.
+
+        Args:
+            wrapped_page: The page object wrapped with AgentQL.
+            *queries (str): The AgentQL query strings.
+
+        Returns:
+            list: One response per query, in the order given.
+        """
+        cache = AgentQLWrapper.get_selector_cache()
+        responses = [None] * len(queries)
+        keys = [None] * len(queries)
+        if cache.enabled:
+            for index, query in enumerate(queries):
+                responses[index], keys[index] = await cache.lookup(wrapped_page, query)
+        pending = [index for index, response in enumerate(responses) if response is None]
+        if not pending:
+            return responses
+
+        merged_query = _merge_queries([queries[index] for index in pending]) if len(pending) > 1 else None
+        if merged_query:
+            query_label = "+".join(metrics.query_name(queries[index]) for index in pending)
+            with metrics.agentql_query(query_label, "agentql"):
+                combined_response = await wrapped_page.query_elements(merged_query)
+            for index in pending:
+                responses[index] = BatchResponseView(combined_response, parse_query_fields(queries[index]))
+        else:
+            results = await asyncio.gather(
+                *(AgentQLWrapper._timed_query(wrapped_page, queries[index]) for index in pending)
+            )
+            for index, response in zip(pending, results):
+                responses[index] = response
+
+        if cache.enabled:
+            for index in pending:
+                await cache.store(keys[index], queries[index], responses[index])
+        return responses
+
+    @staticmethod
+    async def _timed_query(wrapped_page, query: str):
+        with metrics.agentql_query(metrics.query_name(query), "agentql"):
+            return await wrapped_page.query_elements(query)
 
     @staticmethod
     async def goto(wrapped_page, url: str):
@@ -41,14 +187,25 @@ class AgentQLWrapper:
             wrapped_page: The page object wrapped with AgentQL.
             url (str): The URL to navigate to.
         """
-        await wrapped_page.goto(url)
+        with metrics.step("goto"):
+            await wrapped_page.goto(url)
 
     @staticmethod
-    async def wait_for_page_ready_state(wrapped_page):
+    async def wait_for_page_ready_state(wrapped_page, step: str = "default", selector: str = None, previous_url: str = None):
         """
-        Waits until the page reaches a ready state (fully loaded).
+        Waits until the page is ready for the next step of a flow.
+
+        Rather than waiting for network idle, this resumes as soon as the step's target
+        element appears or the URL changes, and the DOM has stopped mutating.
 
         Args:
             wrapped_page: The page object wrapped with AgentQL.
+            step (str): The flow step name, used to pick the step's timeout.
+            selector (str): Optional selector of an element that signals readiness.
+            previous_url (str): Optional URL the page is expected to navigate away from.
+
+        Returns:
+            bool: True if the page became ready before the step timed out.
         """
-        await wrapped_page.wait_for_load_state("networkidle")
+        with metrics.step(f"wait:{step}"):
+            return await PageReadiness.wait_for_step(wrapped_page, step, selector=selector, previous_url=previous_url)
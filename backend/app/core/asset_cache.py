@@ -0,0 +1,234 @@
+# app/core/asset_cache.py
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import stat
+import uuid
+from collections import OrderedDict
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Response headers that describe the transfer rather than the asset, or must not be replayed
+_DROPPED_HEADERS = {"content-length", "content-encoding", "transfer-encoding", "connection", "set-cookie", "date", "age"}
+
+
+class AssetCache:
+    """
+    Content-addressed on-disk cache of static assets, shared by every browser context.
+
+    Requests for cacheable assets are served through Playwright routing: a hit is fulfilled
+    from disk, a miss is fetched once and stored for the next context. Only GET responses
+    with status 200 that the server marks as cacheable are kept. Files are evicted least
+    recently used first once the directory grows past its size cap.
+
+    Cached responses are replayed into every context, so the directory is created private
+    to the service user and the cache disables itself if the directory is owned by anyone else.
+    """
+
+    def __init__(
+        self,
+        directory: str = Config.ASSET_CACHE_DIR,
+        max_bytes: int = Config.ASSET_CACHE_MAX_BYTES,
+        resource_types=Config.ASSET_CACHE_RESOURCE_TYPES,
+        url_patterns=Config.ASSET_CACHE_URL_PATTERNS,
+        enabled: bool = Config.ASSET_CACHE_ENABLED,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.resource_types = frozenset(resource_types)
+        self._url_patterns = [re.compile(pattern) for pattern in url_patterns if pattern]
+        self.enabled = enabled
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._size = 0
+        self._is_loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_served = 0
+
+    def is_cacheable_request(self, request) -> bool:
+        """Returns True if a request is for an asset this cache may serve."""
+        return (
+            request.method == "GET"
+            and request.resource_type in self.resource_types
+            and any(pattern.search(request.url) for pattern in self._url_patterns)
+        )
+
+    @staticmethod
+    def is_cacheable_response(status: int, headers: dict) -> bool:
+        """Returns True if the server allows the response to be reused."""
+        cache_control = headers.get("cache-control", "").lower()
+        if status != 200 or "no-store" in cache_control or "private" in cache_control:
+            return False
+        if "immutable" in cache_control:
+            return True
+        max_age = re.search(r"max-age=(\d+)", cache_control)
+        return bool(max_age) and int(max_age.group(1)) >= Config.ASSET_CACHE_MIN_MAX_AGE_SECONDS
+
+    async def apply(self, context):
+        """Installs the cache on a browser context."""
+        if not self.enabled:
+            return
+        if not self._is_loaded:
+            await self._load_index()
+            if not self.enabled:
+                return
+        await context.route("**/*", self._handle_route)
+
+    def stats(self) -> dict:
+        """Returns hit rate, size and bytes served from disk."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "bytes_saved": self.bytes_served,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    async def _handle_route(self, route):
+        request = route.request
+        if not self.is_cacheable_request(request):
+            await route.fallback()
+            return
+
+        key = hashlib.sha256(request.url.encode("utf-8")).hexdigest()
+        # Files stored by other processes sharing the directory count as hits too
+        cached = await asyncio.to_thread(self._read, key)
+        if cached:
+            status, headers, body = cached
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                self._remember(key, len(body))
+            self.hits += 1
+            self.bytes_served += len(body)
+            await route.fulfill(status=status, headers=headers, body=body)
+            return
+
+        self._forget(key)
+        self.misses += 1
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception as e:
+            # Let the browser load the asset itself rather than failing the request
+            logger.warning(f"Failed to fetch asset {request.url} for caching: {str(e)}")
+            await route.fallback()
+            return
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in _DROPPED_HEADERS}
+        if self.is_cacheable_response(response.status, response.headers) and len(body) <= self.max_bytes:
+            try:
+                await asyncio.to_thread(self._write, key, request.url, response.status, headers, body)
+                self._remember(key, len(body))
+                self.stores += 1
+                await asyncio.to_thread(self._delete_files, self._evict_over_cap())
+            except OSError as e:
+                logger.warning(f"Failed to cache asset {request.url}: {str(e)}")
+        await route.fulfill(status=response.status, headers=headers, body=body)
+
+    def _paths(self, key: str):
+        return os.path.join(self.directory, f"{key}.body"), os.path.join(self.directory, f"{key}.json")
+
+    def _read(self, key: str):
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as meta_file:
+                meta = json.load(meta_file)
+            with open(body_path, "rb") as body_file:
+                body = body_file.read()
+            os.utime(body_path)  # Keeps LRU order across restarts and other worker processes
+            return meta["status"], meta["headers"], body
+        except (OSError, ValueError, KeyError):
+            return None  # Not cached, or evicted by another process sharing the directory
+
+    def _write(self, key: str, url: str, status: int, headers: dict, body: bytes):
+        self._ensure_directory()
+        body_path, meta_path = self._paths(key)
+        for path, mode, content in (
+            (body_path, "wb", body),
+            (meta_path, "w", json.dumps({"url": url, "status": status, "headers": headers})),
+        ):
+            temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(temp_path, mode) as temp_file:
+                temp_file.write(content)
+            os.replace(temp_path, path)  # Readers never see a half-written file
+
+    def _ensure_directory(self):
+        """
+        Creates the cache directory with mode 0700 if missing.
+
+        Raises:
+            PermissionError: If the path is not a directory owned by this process's user.
+        """
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        info = os.lstat(self.directory)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+            raise PermissionError(f"Asset cache directory {self.directory} is not a directory owned by this user")
+        if stat.S_IMODE(info.st_mode) & 0o077:
+            os.chmod(self.directory, 0o700)  # Tighten a directory left group- or world-accessible
+
+    async def _load_index(self):
+        """Rebuilds the LRU index from the files already in the directory, oldest first."""
+        self._is_loaded = True
+        try:
+            await asyncio.to_thread(self._ensure_directory)
+        except OSError as e:
+            logger.error(f"Asset cache disabled: {str(e)}")
+            self.enabled = False
+            return
+        bodies = await asyncio.to_thread(self._scan_directory)
+        for _, key, size in sorted(bodies):
+            self._remember(key, size)
+        await asyncio.to_thread(self._delete_files, self._evict_over_cap())
+        logger.info(f"Asset cache loaded {len(self._entries)} entries ({self._size} bytes) from {self.directory}")
+
+    def _scan_directory(self) -> list:
+        if not os.path.isdir(self.directory):
+            return []
+        bodies = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".body"):
+                file_stat = os.stat(os.path.join(self.directory, name))
+                bodies.append((file_stat.st_mtime, name[: -len(".body")], file_stat.st_size))
+        return bodies
+
+    def _evict_over_cap(self) -> list:
+        """Drops least recently used entries until under the cap; returns their keys."""
+        evicted = []
+        while self._size > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._forget(key)
+            evicted.append(key)
+            self.evictions += 1
+        return evicted
+
+    def _delete_files(self, keys: list):
+        for key in keys:
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _remember(self, key: str, size: int):
+        self._forget(key)
+        self._entries[key] = size
+        self._size += size
+
+    def _forget(self, key: str):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._size -= size
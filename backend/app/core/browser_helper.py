@@ -1,15 +1,197 @@
 import asyncio
+import logging
 import os
 import random
+import time
+from collections import OrderedDict
 from playwright.async_api import async_playwright
+from app.core import metrics
 from app.core.agentql_wrapper import AgentQLWrapper
+from app.core.asset_cache import AssetCache
 from app.core.config import Config
+from app.core.network_policy import NetworkPolicy
+from app.core.text_entry import TextEntry
+
+logger = logging.getLogger(__name__)
+
+
+class ContextLease:
+    """A browser context and its page, lent out by the context pool to a single flow."""
+
+    def __init__(self, username: str, context, page, generation: int = 0, reused: bool = False):
+        self.username = username
+        self.context = context
+        self.page = page
+        self.generation = generation
+        self.reused = reused  # True when the context came warm from the pool
+        self.inbox_ready = False  # True while the page is parked on the inbox with popups dismissed
+        self.last_used = time.monotonic()
+
+
+class BrowserContextPool:
+    """
+    Keeps a bounded set of initialised browser contexts keyed by username so repeat
+    flows for the same account skip context creation, storage state restore and warm-up.
+
+    Idle contexts are evicted least-recently-used first once the pool is full, and
+    after sitting unused for longer than the idle TTL.
+    """
+
+    def __init__(
+        self,
+        max_size: int = Config.BROWSER_POOL_MAX_SIZE,
+        idle_ttl: int = Config.BROWSER_POOL_IDLE_TTL_SECONDS,
+        enabled: bool = Config.BROWSER_POOL_ENABLED,
+    ):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.enabled = enabled and max_size > 0
+        self._idle = OrderedDict()  # username -> ContextLease, oldest first
+        self._generations = {}  # username -> bumped whenever the account's contexts go stale
+        self._active = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def acquire(self, username: str, session_data: dict = None, fresh: bool = False) -> ContextLease:
+        """
+        Lends out a context for the given username, reusing a warm one when available.
+
+        Args:
+            username (str): The account the context belongs to.
+            session_data (dict): Storage state used if a new context has to be created.
+            fresh (bool): Discard any pooled context for the account and start clean.
+
+        Returns:
+            ContextLease: The leased context and page; hand it back with `release`.
+        """
+        with metrics.step("context_acquire"):
+            return await self._acquire(username, session_data, fresh)
+
+    async def _acquire(self, username: str, session_data: dict, fresh: bool) -> ContextLease:
+        if fresh:
+            await self.evict(username)
+
+        await self._close_all(self._pop_expired())
+
+        lease = self._idle.pop(username, None) if self.enabled and not fresh else None
+        if lease and lease.page.is_closed():
+            await self._close(lease)
+            lease = None
+
+        if lease:
+            self.hits += 1
+            self._active += 1
+            lease.reused = True
+            logger.info(f"Reusing pooled browser context for {username}")
+            return lease
+
+        self.misses += 1
+        with metrics.step("context_create"):
+            context, page = await BrowserHelper.create_stealth_page(session_data=session_data)
+        self._active += 1
+        return ContextLease(username, context, page, generation=self._generations.get(username, 0))
+
+    async def release(self, lease: ContextLease, discard: bool = False):
+        """
+        Returns a leased context to the pool, or closes it if it cannot be reused.
+
+        Args:
+            lease (ContextLease): The lease obtained from `acquire`.
+            discard (bool): Close the context instead of pooling it (e.g. after a failure).
+        """
+        self._active -= 1
+        is_stale = lease.generation != self._generations.get(lease.username, 0)
+        if (
+            discard
+            or is_stale
+            or not self.enabled
+            or not lease.username
+            or lease.page.is_closed()
+            or lease.username in self._idle
+        ):
+            await self._close(lease)
+            return
+
+        lease.last_used = time.monotonic()
+        self._idle[lease.username] = lease
+
+        victims = self._pop_expired()
+        while len(self._idle) > self.max_size:
+            _, victim = self._idle.popitem(last=False)
+            victims.append(victim)
+        await self._close_all(victims)
+
+    async def evict(self, username: str):
+        """Closes the pooled context for a username and marks any leased ones as stale."""
+        self._generations[username] = self._generations.get(username, 0) + 1
+        lease = self._idle.pop(username, None)
+        if lease:
+            await self._close_all([lease])
+
+    async def sweep(self):
+        """Closes idle contexts that have outlived the idle TTL."""
+        await self._close_all(self._pop_expired())
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Waits for every leased context to be returned.
+
+        Args:
+            timeout (float): Maximum time to wait, in seconds.
+
+        Returns:
+            bool: True if all leases were returned before the timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while self._active > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        return self._active == 0
+
+    async def close_all(self):
+        """Closes every idle context in the pool."""
+        leases = list(self._idle.values())
+        self._idle.clear()
+        await self._close_all(leases)
+
+    def stats(self) -> dict:
+        """Returns pool size and hit/miss counters."""
+        return {
+            "enabled": self.enabled,
+            "max_size": self.max_size,
+            "idle": len(self._idle),
+            "active": self._active,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _pop_expired(self) -> list:
+        cutoff = time.monotonic() - self.idle_ttl
+        expired = [name for name, lease in self._idle.items() if lease.last_used < cutoff]
+        return [self._idle.pop(name) for name in expired]
+
+    async def _close_all(self, leases: list):
+        for lease in leases:
+            self.evictions += 1
+            await self._close(lease)
+
+    @staticmethod
+    async def _close(lease: ContextLease):
+        try:
+            await lease.context.close()
+        except Exception as e:
+            logger.warning(f"Failed to close browser context for {lease.username}: {str(e)}")
+
 
 class BrowserHelper:
     """Helper class to manage Playwright browser interactions with stealth techniques for anti-bot detection."""
 
     _playwright = None
     _browser = None
+    _context_pool = None
+    _network_policy = None
+    _asset_cache = None
 
     @staticmethod
     async def initialize_playwright():
@@ -58,6 +240,9 @@ class BrowserHelper:
 
         # Create browser context with specified options
         context = await BrowserHelper._browser.new_context(**context_options)
+        # Routes run last-registered first: blocking decides before the asset cache serves
+        await BrowserHelper.get_asset_cache().apply(context)
+        await BrowserHelper.get_network_policy().apply(context)  # Skip downloads the flows don't need
         await context.add_init_script(
             "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
         )
@@ -73,16 +258,110 @@ class BrowserHelper:
         """Simulates random scrolling to mimic human activity and reduce bot detection."""
         for _ in range(num_scrolls):
             await page.mouse.wheel(0, random.randint(100, 300))
-            await asyncio.sleep(random.uniform(0.5, 1.5))
+            await asyncio.sleep(random.uniform(0.5, 1.5) * Config.HUMAN_DELAY_SCALE)
 
     @staticmethod
     async def random_delay(min_delay: int = 500, max_delay: int = 1500):
         """Introduces a random delay to make actions appear more human-like."""
-        await asyncio.sleep(random.randint(min_delay, max_delay) / 1000)
+        await asyncio.sleep(random.randint(min_delay, max_delay) / 1000 * Config.HUMAN_DELAY_SCALE)
+
+    @staticmethod
+    def is_browser_ready() -> bool:
+        """Returns True when Chromium is launched and connected."""
+        return BrowserHelper._browser is not None and BrowserHelper._browser.is_connected()
+
+    @staticmethod
+    def get_context_pool() -> BrowserContextPool:
+        """Returns the process-wide browser context pool, creating it on first use."""
+        if not BrowserHelper._context_pool:
+            BrowserHelper._context_pool = BrowserContextPool()
+        return BrowserHelper._context_pool
+
+    @staticmethod
+    def get_network_policy() -> NetworkPolicy:
+        """Returns the request blocking policy shared by every context, creating it on first use."""
+        if not BrowserHelper._network_policy:
+            BrowserHelper._network_policy = NetworkPolicy()
+        return BrowserHelper._network_policy
+
+    @staticmethod
+    def get_asset_cache() -> AssetCache:
+        """Returns the static asset cache shared by every context, creating it on first use."""
+        if not BrowserHelper._asset_cache:
+            BrowserHelper._asset_cache = AssetCache()
+        return BrowserHelper._asset_cache
+
+    @staticmethod
+    def register_metrics(scheduler):
+        """Exposes the context pool, scheduler and cache stats on the metrics endpoint."""
+
+        def collect_gauges() -> dict:
+            pool = BrowserHelper.get_context_pool().stats()
+            scheduler_stats = scheduler.stats()
+            asset_cache = BrowserHelper.get_asset_cache().stats()
+            return {
+                "browser_pool_contexts": (
+                    "Browser contexts in the pool by state.",
+                    {("idle",): pool["idle"], ("active",): pool["active"]},
+                    ("state",),
+                ),
+                "browser_scheduler_flows": (
+                    "Browser flows holding or waiting for a slot.",
+                    {("running",): scheduler_stats["running"], ("queued",): scheduler_stats["queued"]},
+                    ("state",),
+                ),
+                "asset_cache_size_bytes": ("Bytes stored in the static asset cache.", asset_cache["size_bytes"]),
+            }
+
+        def collect_counters() -> dict:
+            pool = BrowserHelper.get_context_pool().stats()
+            selector_cache = AgentQLWrapper.selector_cache_stats()
+            asset_cache = BrowserHelper.get_asset_cache().stats()
+            network = BrowserHelper.get_network_policy().stats()
+            return {
+                "browser_pool_lookups_total": (
+                    "Context pool lookups, by result.",
+                    {("hit",): pool["hits"], ("miss",): pool["misses"]},
+                    ("result",),
+                ),
+                "browser_pool_evictions_total": ("Contexts closed by the pool.", pool["evictions"]),
+                "browser_scheduler_rejected_total": ("Flows rejected with 429.", scheduler.stats()["rejected"]),
+                "agentql_selector_cache_lookups_total": (
+                    "Selector cache lookups, by result.",
+                    {(result,): selector_cache[key] for result, key in (("hit", "hits"), ("miss", "misses"), ("stale", "stale"))},
+                    ("result",),
+                ),
+                "asset_cache_lookups_total": (
+                    "Static asset cache lookups, by result.",
+                    {("hit",): asset_cache["hits"], ("miss",): asset_cache["misses"]},
+                    ("result",),
+                ),
+                "network_blocked_requests_total": ("Requests blocked (or that would be) by the network policy.", network["blocked_requests"]),
+            }
+
+        metrics.REGISTRY.register_collector("browser", collect_gauges)
+        metrics.REGISTRY.register_collector("browser_totals", collect_counters, metric_type="counter")
+
+    @staticmethod
+    async def acquire_page(username: str, session_data: dict = None, fresh: bool = False) -> ContextLease:
+        """Leases a (possibly warm) context and page for the given username from the pool."""
+        return await BrowserHelper.get_context_pool().acquire(username, session_data, fresh=fresh)
+
+    @staticmethod
+    async def release_page(lease: ContextLease, discard: bool = False):
+        """Returns a leased context to the pool, or closes it when `discard` is set."""
+        await BrowserHelper.get_context_pool().release(lease, discard=discard)
+
+    @staticmethod
+    async def evict_context(username: str):
+        """Drops any pooled context for the given username."""
+        await BrowserHelper.get_context_pool().evict(username)
 
     @staticmethod
     async def close_browser():
         """Closes the browser and stops Playwright to free up resources."""
+        if BrowserHelper._context_pool:
+            await BrowserHelper._context_pool.close_all()
         if BrowserHelper._browser:
             await BrowserHelper._browser.close()
             BrowserHelper._browser = None
@@ -91,11 +370,24 @@ class BrowserHelper:
             BrowserHelper._playwright = None
 
     @staticmethod
-    async def human_type(element, text):
-        """Simulates human typing by typing one character at a time with random intervals."""
-        for char in text:
-            await element.type(char)
-            await asyncio.sleep(random.uniform(0.05, 0.15))
+    async def human_type(element, text, field: str = None):
+        """
+        Types text like a person would, using the text entry strategy configured for the field.
+
+        Args:
+            element: The element to type into.
+            text (str): The text to type.
+            field (str): The input field name (username, password, recipient, message) used
+                to look up its strategy in TEXT_ENTRY_STRATEGIES.
+        """
+        with metrics.step("human_type"):
+            await TextEntry.enter(element, text, TextEntry.strategy_for(field))
+
+    @staticmethod
+    async def click(element):
+        """Clicks an element, recording the click's latency for the current flow."""
+        with metrics.step("click"):
+            await element.click()
 
     @staticmethod
     async def random_mouse_move(page, num_moves=5):
@@ -104,4 +396,4 @@ class BrowserHelper:
             x = random.randint(0, 1920)
             y = random.randint(0, 1080)
             await page.mouse.move(x, y)
-            await asyncio.sleep(random.uniform(0.5, 1.5))
+            await asyncio.sleep(random.uniform(0.5, 1.5) * Config.HUMAN_DELAY_SCALE)
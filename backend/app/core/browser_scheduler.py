@@ -0,0 +1,105 @@
+# app/core/browser_scheduler.py
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from app.core.config import Config
+from app.core.custom_exceptions import TooManyRequestsError
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserScheduler:
+    """
+    Admission control for browser flows.
+
+    Caps how many flows hold a browser context at once and runs flows for the same
+    username one at a time, in arrival order, so they can reuse that account's pooled
+    context instead of opening a second one. Requests beyond the configured queue depth
+    are rejected with 429 and a Retry-After estimate instead of piling up.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = Config.BROWSER_MAX_CONCURRENT,
+        max_queue_depth: int = Config.BROWSER_QUEUE_MAX_DEPTH,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue_depth = max_queue_depth
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._user_locks = {}  # username -> [asyncio.Lock, number of flows holding or waiting]
+        self._waits = deque(maxlen=Config.BROWSER_SCHEDULER_STATS_WINDOW)
+        self._run_times = deque(maxlen=Config.BROWSER_SCHEDULER_STATS_WINDOW)
+        self.queued = 0
+        self.running = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self, username: str):
+        """
+        Waits for the username's turn and a free global slot, then holds both for the block.
+
+        Args:
+            username (str): The account the browser flow runs for.
+
+        Raises:
+            TooManyRequestsError: If the queue is already at its maximum depth.
+        """
+        if self.queued >= self.max_queue_depth:
+            self.rejected += 1
+            retry_after = self.retry_after()
+            logger.warning(f"Browser queue full ({self.queued} waiting), rejecting flow for {username}")
+            raise TooManyRequestsError(retry_after=retry_after)
+
+        entry = self._user_locks.setdefault(username, [asyncio.Lock(), 0])
+        entry[1] += 1
+        self.queued += 1
+        queued_at = time.monotonic()
+        is_queued = True
+        try:
+            # Per-user lock first, so an account's backlog doesn't hold global slots while it waits
+            async with entry[0]:
+                async with self._slots:
+                    self.queued -= 1
+                    is_queued = False
+                    self.running += 1
+                    self.admitted += 1
+                    started_at = time.monotonic()
+                    self._waits.append(started_at - queued_at)
+                    try:
+                        yield
+                    finally:
+                        self.running -= 1
+                        self._run_times.append(time.monotonic() - started_at)
+        finally:
+            if is_queued:
+                self.queued -= 1  # Cancelled while waiting
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._user_locks.pop(username, None)
+
+    def retry_after(self) -> int:
+        """Estimates in whole seconds how long until a new request would be admitted."""
+        average_run = sum(self._run_times) / len(self._run_times) if self._run_times else 1.0
+        rounds = (self.queued + self.running) / self.max_concurrent
+        return max(1, math.ceil(rounds * average_run))
+
+    def stats(self) -> dict:
+        """Returns queue depth, concurrency and wait-time statistics."""
+        waits = sorted(self._waits)
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue_depth": self.max_queue_depth,
+            "running": self.running,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_avg_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "wait_p95_seconds": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+            "wait_max_seconds": round(waits[-1], 3) if waits else 0.0,
+        }
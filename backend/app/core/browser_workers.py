@@ -0,0 +1,309 @@
+# app/core/browser_workers.py
+
+import asyncio
+import bisect
+import hashlib
+import itertools
+import logging
+import multiprocessing
+import threading
+
+from fastapi import HTTPException
+
+from app.core import metrics, tracing
+from app.core.config import Config
+from app.core.login_service import LoginService
+from app.core.message_service import MessageService
+
+logger = logging.getLogger(__name__)
+
+
+class HashRing:
+    """Consistent-hash ring mapping keys to nodes, with virtual nodes for an even spread."""
+
+    def __init__(self, nodes, replicas: int = 100):
+        self._ring = sorted(
+            (self._hash(f"{node}#{replica}"), node) for node in nodes for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in self._ring]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    def node_for(self, key: str):
+        """Returns the node owning the key: the first ring point clockwise from its hash."""
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+
+def _worker_main(index: int, conn):
+    """Entry point of a browser worker process: builds its own browser and services and serves requests."""
+    logging.basicConfig(level=logging.INFO, format=f"[browser-worker-{index}] %(levelname)s %(name)s: %(message)s")
+    asyncio.run(_serve(index, conn))
+
+
+async def _serve(index: int, conn):
+    # Imported here so the API process does not pay for these in the routing-only path
+    from app.core.agentql_wrapper import AgentQLWrapper
+    from app.core.browser_helper import BrowserHelper
+    from app.core.browser_scheduler import BrowserScheduler
+    from app.core.jwt_service import JWTService
+    from app.core.redis_helper import RedisHelper
+    from app.core.session_service import SessionService
+
+    redis_helper = RedisHelper()
+    AgentQLWrapper.configure_selector_cache(redis_helper)
+    session_service = SessionService(redis_helper)
+    jwt_service = JWTService(session_service)
+    scheduler = BrowserScheduler()
+    login_service = LoginService(session_service, jwt_service, scheduler)
+    message_service = MessageService(redis_helper, session_service, scheduler)
+    BrowserHelper.register_metrics(scheduler)
+    tracing.configure(path=tracing.worker_trace_file(index))
+
+    async def collect_metrics():
+        return metrics.REGISTRY.collect()
+
+    async def stats():
+        return {
+            "worker": index,
+            "browser_ready": BrowserHelper.is_browser_ready(),
+            "pool": BrowserHelper.get_context_pool().stats(),
+            "network": BrowserHelper.get_network_policy().stats(),
+            "asset_cache": BrowserHelper.get_asset_cache().stats(),
+            "scheduler": scheduler.stats(),
+        }
+
+    handlers = {
+        "login": login_service.login,
+        "evict_context": BrowserHelper.evict_context,
+        "send_message": message_service.send_message,
+        "stats": stats,
+        "metrics": collect_metrics,
+    }
+
+    send_lock = threading.Lock()
+    tasks = set()
+
+    def reply(request_id, status, value):
+        with send_lock:
+            conn.send((request_id, status, value))
+
+    async def handle(request_id, method, kwargs, trace_context):
+        try:
+            with tracing.continue_trace(trace_context):  # Flow spans join the API request's trace
+                result = await handlers[method](**kwargs)
+            reply(request_id, "ok", result)
+        except HTTPException as e:
+            reply(request_id, "error", {"status_code": e.status_code, "detail": e.detail, "headers": e.headers})
+        except Exception as e:
+            logger.exception(f"Browser worker {index} failed on {method}: {str(e)}")
+            reply(request_id, "error", {"status_code": 500, "detail": str(e), "headers": None})
+
+    async def sweep_idle_contexts():
+        while True:
+            await asyncio.sleep(Config.BROWSER_POOL_SWEEP_INTERVAL_SECONDS)
+            try:
+                await BrowserHelper.get_context_pool().sweep()
+            except Exception as e:
+                logger.warning(f"Idle context sweep failed: {str(e)}")
+
+    if Config.BROWSER_PREWARM:
+        try:
+            await BrowserHelper.initialize_playwright()
+        except Exception as e:
+            logger.error(f"Browser worker {index} failed to prewarm browser: {str(e)}")
+    sweeper = asyncio.create_task(sweep_idle_contexts())
+    logger.info(f"Browser worker {index} ready")
+
+    while True:
+        try:
+            message = await asyncio.to_thread(conn.recv)
+        except (EOFError, OSError):
+            break
+        if message is None:  # Shutdown request
+            break
+        task = asyncio.create_task(handle(*message))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    sweeper.cancel()
+    if tasks:
+        await asyncio.wait(tasks, timeout=Config.SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+    await BrowserHelper.get_context_pool().drain(Config.SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+    await BrowserHelper.close_browser()
+    await RedisHelper.close_pool()
+    tracing.shutdown()
+    logger.info(f"Browser worker {index} stopped")
+
+
+class BrowserWorker:
+    """API-side handle on one browser worker process and its request pipe."""
+
+    def __init__(self, index: int, mp_context):
+        self.index = index
+        self._mp_context = mp_context
+        self._pending = {}
+        self._request_ids = itertools.count()
+        self._send_lock = threading.Lock()
+        self.process = None
+        self.conn = None
+        self._reader_task = None
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    async def start(self):
+        self._pending = {}  # Replies from a previous process must not resolve the new one's requests
+        self.conn, child_conn = self._mp_context.Pipe()
+        self.process = self._mp_context.Process(
+            target=_worker_main, args=(self.index, child_conn), name=f"browser-worker-{self.index}", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self._reader_task = asyncio.create_task(self._read_replies())
+        logger.info(f"Started browser worker {self.index} (pid {self.process.pid})")
+
+    async def stop(self, timeout: float):
+        if not self.is_alive():
+            return
+        try:
+            with self._send_lock:
+                self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        await asyncio.to_thread(self.process.join, timeout)
+        if self.process.is_alive():
+            logger.warning(f"Browser worker {self.index} did not stop in {timeout}s, terminating")
+            self.process.terminate()
+            await asyncio.to_thread(self.process.join, 5)
+        if self._reader_task:
+            self._reader_task.cancel()
+        self.conn.close()
+
+    async def call(self, method: str, **kwargs):
+        """Sends a request to the worker and waits for its reply, re-raising its HTTP errors."""
+        if not self.is_alive():
+            await self.start()  # Replace a crashed worker; its usernames stay routed here
+        pending = self._pending
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        pending[request_id] = future
+        try:
+            with self._send_lock:
+                self.conn.send((request_id, method, kwargs, tracing.current_context()))
+            status, value = await future
+        finally:
+            pending.pop(request_id, None)
+        if status == "error":
+            raise HTTPException(status_code=value["status_code"], detail=value["detail"], headers=value["headers"])
+        return value
+
+    async def _read_replies(self):
+        conn, pending = self.conn, self._pending
+        while True:
+            try:
+                request_id, status, value = await asyncio.to_thread(conn.recv)
+            except (EOFError, OSError):
+                break
+            future = pending.get(request_id)
+            if future and not future.done():
+                future.set_result((status, value))
+        # The worker exited; fail whatever was still waiting on it
+        for future in pending.values():
+            if not future.done():
+                future.set_result(("error", {"status_code": 503, "detail": "Browser worker restarted, try again.", "headers": None}))
+        if pending:
+            logger.error(f"Browser worker {self.index} exited with {len(pending)} requests in flight")
+
+
+class BrowserWorkerPool:
+    """
+    Runs browser automation in separate worker processes, each with its own Chromium,
+    event loop, context pool and scheduler. Usernames are routed to a fixed worker with
+    consistent hashing so an account's warm contexts always live in the same process.
+
+    Each API process owns its own pool, so run a single API process when this is enabled.
+    """
+
+    def __init__(self, size: int = Config.BROWSER_WORKERS):
+        mp_context = multiprocessing.get_context("spawn")  # Never fork a running event loop
+        self.workers = [BrowserWorker(index, mp_context) for index in range(size)]
+        self._ring = HashRing(range(size), replicas=Config.BROWSER_WORKER_RING_REPLICAS)
+
+    def worker_for(self, username: str) -> BrowserWorker:
+        return self.workers[self._ring.node_for(username)]
+
+    async def start(self):
+        for worker in self.workers:
+            await worker.start()
+
+    async def stop(self, timeout: float):
+        await asyncio.gather(*(worker.stop(timeout) for worker in self.workers))
+
+    async def call(self, username: str, method: str, **kwargs):
+        """Runs a browser flow on the worker that owns the username."""
+        return await self.worker_for(username).call(method, **kwargs)
+
+    def is_ready(self) -> bool:
+        return all(worker.is_alive() for worker in self.workers)
+
+    async def stats(self) -> list:
+        """Collects browser, pool and scheduler stats from every live worker."""
+        results = []
+        for worker in self.workers:
+            if not worker.is_alive():
+                results.append({"worker": worker.index, "alive": False})
+                continue
+            try:
+                results.append({"alive": True, **await asyncio.wait_for(worker.call("stats"), 2)})
+            except Exception as e:
+                results.append({"worker": worker.index, "alive": True, "error": str(e)})
+        return results
+
+    async def collect_metrics(self) -> dict:
+        """Collects every live worker's metric families, keyed by worker index."""
+        families = {}
+        for worker in self.workers:
+            if not worker.is_alive():
+                continue
+            try:
+                families[str(worker.index)] = await asyncio.wait_for(worker.call("metrics"), 2)
+            except Exception as e:
+                logger.warning(f"Failed to collect metrics from browser worker {worker.index}: {str(e)}")
+        return families
+
+
+class WorkerLoginService(LoginService):
+    """LoginService whose browser flows run on the username's browser worker process."""
+
+    def __init__(self, session_service, jwt_service, worker_pool: BrowserWorkerPool):
+        super().__init__(session_service, jwt_service)
+        self.worker_pool = worker_pool
+
+    async def login(self, username: str, password: str, force: bool = False):
+        access_token, refresh_token = await self.worker_pool.call(
+            username, "login", username=username, password=password, force=force
+        )
+        self.jwt_service.invalidate_user(username)  # The worker replaced the session this process may have cached
+        return access_token, refresh_token
+
+    async def logout(self, username: str):
+        # Drop the worker's pooled context, then delete the session here so local caches are invalidated too
+        await self.worker_pool.call(username, "evict_context", username=username)
+        return await super().logout(username)
+
+
+class WorkerMessageService(MessageService):
+    """MessageService whose browser flows run on the username's browser worker process."""
+
+    def __init__(self, redis_helper, session_service, worker_pool: BrowserWorkerPool, recipient_cache=None):
+        super().__init__(redis_helper, session_service, recipient_cache=recipient_cache)
+        self.worker_pool = worker_pool
+
+    async def send_message(self, recipient: str, message: str, username: str):
+        await self.recipient_cache.raise_if_unreachable(username, recipient)  # Skip the worker round-trip
+        return await self.worker_pool.call(
+            username, "send_message", recipient=recipient, message=message, username=username
+        )
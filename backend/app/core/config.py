@@ -16,14 +16,37 @@ class Config:
     ACCESS_TOKEN_EXPIRATION_MINUTES = 15
     REFRESH_TOKEN_EXPIRATION_DAYS = 7
 
+    # Verified-token cache: bounds how long another worker's logout can go unnoticed
+    TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+    TOKEN_CACHE_MAX_AGE_SECONDS = int(os.getenv("TOKEN_CACHE_MAX_AGE_SECONDS", "30"))
+
     # Redis Configuration
     REDIS_ENABLED = os.getenv("REDIS_ENABLED", "true").lower() == "true"
     REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+    REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))
+    REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "5"))
+    REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+
+    # AgentQL selector cache: resolve repeated queries locally from learned selectors
+    AGENTQL_SELECTOR_CACHE_ENABLED = os.getenv("AGENTQL_SELECTOR_CACHE_ENABLED", "true").lower() == "true"
+    AGENTQL_SELECTOR_CACHE_REDIS = os.getenv("AGENTQL_SELECTOR_CACHE_REDIS", "false").lower() == "true"
+    AGENTQL_SELECTOR_CACHE_MAX_ENTRIES = int(os.getenv("AGENTQL_SELECTOR_CACHE_MAX_ENTRIES", "512"))
+    AGENTQL_SELECTOR_CACHE_TTL_SECONDS = int(os.getenv("AGENTQL_SELECTOR_CACHE_TTL_SECONDS", "86400"))
 
     # Encryption Configuration
     ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
 
+    # In-process cache of decrypted sessions
+    SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "1000"))
+    SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", "300"))
+    SESSION_DECRYPT_OFFLOAD_BYTES = int(os.getenv("SESSION_DECRYPT_OFFLOAD_BYTES", "16384"))
+
+    # Stored session encoding: only these domains' cookies and origins are kept
+    SESSION_COOKIE_DOMAINS = ["instagram.com"]
+    SESSION_COMPRESSION_LEVEL = int(os.getenv("SESSION_COMPRESSION_LEVEL", "6"))
+
     # Browser and Playwright Configuration
     USER_AGENTS = [
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -61,6 +84,114 @@ class Config:
         ("America/Juneau", {"longitude": -134.4197, "latitude": 58.3019}),
     ]
 
+    # Multiplier for the human-like pauses between browser actions (lowered only for offline benchmarks)
+    HUMAN_DELAY_SCALE = float(os.getenv("HUMAN_DELAY_SCALE", "1.0"))
+
+    # Startup and shutdown
+    BROWSER_PREWARM = os.getenv("BROWSER_PREWARM", "true").lower() == "true"
+    SHUTDOWN_DRAIN_TIMEOUT_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT_SECONDS", "30"))
+
+    # Asynchronous send-message jobs ("redis" uses Redis Streams; "memory" is process-local)
+    JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "redis")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_RESULT_TTL_SECONDS = int(os.getenv("JOB_RESULT_TTL_SECONDS", "86400"))
+    JOB_CLAIM_IDLE_SECONDS = int(os.getenv("JOB_CLAIM_IDLE_SECONDS", "300"))
+
+    # Browser flow scheduling: global concurrency cap and queue depth before 429s
+    BROWSER_MAX_CONCURRENT = int(os.getenv("BROWSER_MAX_CONCURRENT", "5"))
+    BROWSER_QUEUE_MAX_DEPTH = int(os.getenv("BROWSER_QUEUE_MAX_DEPTH", "50"))
+    BROWSER_SCHEDULER_STATS_WINDOW = int(os.getenv("BROWSER_SCHEDULER_STATS_WINDOW", "200"))
+
+    # Browser worker processes (0 runs browser flows in the API process)
+    BROWSER_WORKERS = int(os.getenv("BROWSER_WORKERS", "0"))
+    BROWSER_WORKER_RING_REPLICAS = int(os.getenv("BROWSER_WORKER_RING_REPLICAS", "100"))
+
+    # Single-flight login: Redis lock held across workers while an account logs in
+    LOGIN_LOCK_TTL_SECONDS = int(os.getenv("LOGIN_LOCK_TTL_SECONDS", "180"))
+    LOGIN_LOCK_POLL_INTERVAL_SECONDS = float(os.getenv("LOGIN_LOCK_POLL_INTERVAL_SECONDS", "0.5"))
+    LOGIN_RESULT_TTL_SECONDS = int(os.getenv("LOGIN_RESULT_TTL_SECONDS", "60"))
+
+    # Login fast path: reuse a stored session whose auth cookies are still valid
+    LOGIN_SESSION_REUSE_ENABLED = os.getenv("LOGIN_SESSION_REUSE_ENABLED", "true").lower() == "true"
+    LOGIN_SESSION_PROBE_ENABLED = os.getenv("LOGIN_SESSION_PROBE_ENABLED", "true").lower() == "true"
+    LOGIN_SESSION_PROBE_TIMEOUT_SECONDS = float(os.getenv("LOGIN_SESSION_PROBE_TIMEOUT_SECONDS", "5"))
+    LOGIN_SESSION_MIN_REMAINING_SECONDS = int(os.getenv("LOGIN_SESSION_MIN_REMAINING_SECONDS", "3600"))
+    SESSION_AUTH_COOKIES = os.getenv("SESSION_AUTH_COOKIES", "sessionid,ds_user_id").split(",")
+
+    # Network request blocking for automation contexts ("enforce", "report" or "off")
+    # Defaults to report (measure only) until blocking has been validated against the flows' selectors
+    NETWORK_BLOCKING_MODE = os.getenv("NETWORK_BLOCKING_MODE", "report")
+    NETWORK_BLOCKED_RESOURCE_TYPES = os.getenv("NETWORK_BLOCKED_RESOURCE_TYPES", "image,media,font").split(",")
+    NETWORK_BLOCKED_URL_PATTERNS = os.getenv(
+        "NETWORK_BLOCKED_URL_PATTERNS", r"/logging_client_events,/ajax/bz,graph\.instagram\.com/logging,/falco"
+    ).split(",")
+    NETWORK_ALLOWED_URL_PATTERNS = os.getenv("NETWORK_ALLOWED_URL_PATTERNS", "").split(",")
+
+    # Shared on-disk cache of static assets (JS/CSS bundles) served to every context
+    ASSET_CACHE_ENABLED = os.getenv("ASSET_CACHE_ENABLED", "false").lower() == "true"
+    # Must be owned by the service user; created with mode 0700 if missing
+    ASSET_CACHE_DIR = os.getenv(
+        "ASSET_CACHE_DIR",
+        os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "instagram-automation", "assets"),
+    )
+    ASSET_CACHE_MAX_BYTES = int(os.getenv("ASSET_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    ASSET_CACHE_RESOURCE_TYPES = os.getenv("ASSET_CACHE_RESOURCE_TYPES", "script,stylesheet").split(",")
+    ASSET_CACHE_URL_PATTERNS = os.getenv("ASSET_CACHE_URL_PATTERNS", r"^https://static\.cdninstagram\.com/").split(",")
+    ASSET_CACHE_MIN_MAX_AGE_SECONDS = int(os.getenv("ASSET_CACHE_MIN_MAX_AGE_SECONDS", "86400"))
+
+    # Browser context pool configuration
+    BROWSER_POOL_ENABLED = os.getenv("BROWSER_POOL_ENABLED", "true").lower() == "true"
+    BROWSER_POOL_MAX_SIZE = int(os.getenv("BROWSER_POOL_MAX_SIZE", "20"))
+    BROWSER_POOL_IDLE_TTL_SECONDS = int(os.getenv("BROWSER_POOL_IDLE_TTL_SECONDS", "600"))
+    BROWSER_POOL_SWEEP_INTERVAL_SECONDS = int(os.getenv("BROWSER_POOL_SWEEP_INTERVAL_SECONDS", "60"))
+
+    # Page readiness: per-step timeouts (seconds) for event-driven waits
+    READINESS_DOM_QUIET_MS = int(os.getenv("READINESS_DOM_QUIET_MS", "500"))
+    READINESS_STEP_TIMEOUTS = {
+        "default": 10,
+        "login_page": 15,
+        "login_submit": 15,
+        "inbox": 15,
+        "thread": 10,
+        "message_box": 8,
+        "send_button": 5,
+        "message_sent": 5,
+    }
+
+    # Recipient -> conversation thread cache, so repeat sends skip the recipient search
+    THREAD_CACHE_ENABLED = os.getenv("THREAD_CACHE_ENABLED", "true").lower() == "true"
+    THREAD_CACHE_TTL_SECONDS = int(os.getenv("THREAD_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+
+    # Negative cache of unreachable recipients, checked before any browser work
+    RECIPIENT_NEGATIVE_CACHE_ENABLED = os.getenv("RECIPIENT_NEGATIVE_CACHE_ENABLED", "true").lower() == "true"
+    RECIPIENT_NOT_FOUND_TTL_SECONDS = int(os.getenv("RECIPIENT_NOT_FOUND_TTL_SECONDS", str(6 * 60 * 60)))
+    RECIPIENT_INVITE_PENDING_TTL_SECONDS = int(os.getenv("RECIPIENT_INVITE_PENDING_TTL_SECONDS", str(60 * 60)))
+
+    # Text entry strategy per input field: per_char, keyboard, chunked or fill (see app/core/text_entry.py)
+    TEXT_ENTRY_STRATEGIES = {
+        "default": os.getenv("TEXT_ENTRY_STRATEGY", "keyboard"),
+        "username": os.getenv("TEXT_ENTRY_STRATEGY_USERNAME", "keyboard"),
+        "password": os.getenv("TEXT_ENTRY_STRATEGY_PASSWORD", "keyboard"),
+        "recipient": os.getenv("TEXT_ENTRY_STRATEGY_RECIPIENT", "keyboard"),
+        "message": os.getenv("TEXT_ENTRY_STRATEGY_MESSAGE", "chunked"),
+    }
+    TEXT_ENTRY_CHUNK_SIZE = int(os.getenv("TEXT_ENTRY_CHUNK_SIZE", "24"))
+
+    # Resident inbox pages: keep each account's pooled page parked on the inbox between sends
+    RESIDENT_INBOX_ENABLED = os.getenv("RESIDENT_INBOX_ENABLED", "false").lower() == "true"
+    RESIDENT_INBOX_HEALTH_TIMEOUT_SECONDS = float(os.getenv("RESIDENT_INBOX_HEALTH_TIMEOUT_SECONDS", "2"))
+
+    # Prometheus metrics endpoint (/metrics); measurements are always recorded in process
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # Span tracing to a rotating local JSONL file (summarize with `python -m app.core.trace_summary`)
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+    TRACING_FILE = os.getenv("TRACING_FILE", "traces/spans.jsonl")
+    TRACING_MAX_BYTES = int(os.getenv("TRACING_MAX_BYTES", str(20 * 1024 * 1024)))
+    TRACING_BACKUP_COUNT = int(os.getenv("TRACING_BACKUP_COUNT", "5"))
+    TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+    TRACING_QUEUE_SIZE = int(os.getenv("TRACING_QUEUE_SIZE", "10000"))
+
     PROXIES = [
         # Example proxy configuration, replace with actual proxies if needed
         # {
@@ -24,3 +24,23 @@ class InvalidCredentialsError(HTTPException):
     """Exception raised when provided credentials are invalid."""
     def __init__(self, detail: str = "Invalid credentials"):
         super().__init__(status_code=401, detail=detail)
+
+class TooManyRequestsError(HTTPException):
+    """Exception raised when the browser work queue is full."""
+    def __init__(self, detail: str = "Too many requests in progress. Please retry later.", retry_after: int = 1):
+        super().__init__(status_code=429, detail=detail, headers={"Retry-After": str(retry_after)})
+
+class RecipientNotFoundError(HTTPException):
+    """Exception raised when Instagram has no account for the recipient."""
+    def __init__(self, detail: str = "Recipient account not found."):
+        super().__init__(status_code=404, detail=detail)
+
+class RecipientInviteSentError(HTTPException):
+    """Exception raised when the recipient has not accepted the sender's message invite yet."""
+    def __init__(self, detail: str = "Invite sent. Cannot send more messages until the invite is accepted."):
+        super().__init__(status_code=403, detail=detail)
+
+class ServiceDrainingError(HTTPException):
+    """Exception raised when a browser flow is requested while the service is shutting down."""
+    def __init__(self, detail: str = "Service is shutting down. Please retry on another instance.", retry_after: int = 5):
+        super().__init__(status_code=503, detail=detail, headers={"Retry-After": str(retry_after)})
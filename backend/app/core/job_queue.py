@@ -0,0 +1,265 @@
+# app/core/job_queue.py
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+import redis
+from fastapi import HTTPException
+
+from app.core.config import Config
+from app.core.session_service import session_codec
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+class InMemoryJobBackend:
+    """Process-local job backend, used in tests and single-process development setups."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._queue = asyncio.Queue()
+
+    async def enqueue(self, job: dict, payload: dict):
+        self._jobs[job["id"]] = dict(job)
+        await self._queue.put((job["id"], payload))
+
+    async def dequeue(self, consumer: str, timeout: float):
+        """Waits up to `timeout` seconds for the next job; returns (job_id, payload, receipt) or None."""
+        try:
+            job_id, payload = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return job_id, payload, None
+
+    async def ack(self, receipt):
+        pass
+
+    async def touch(self, receipt, consumer: str):
+        pass
+
+    async def update(self, job_id: str, **fields):
+        self._jobs[job_id].update(fields)
+
+    async def get(self, job_id: str):
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+
+class RedisStreamJobBackend:
+    """
+    Job backend on a Redis Stream consumed through a consumer group, so any worker process
+    can pick up a job. Job status lives in a separate key that outlives the stream entry.
+    Entries left pending by a crashed consumer are reclaimed after JOB_CLAIM_IDLE_SECONDS;
+    a live consumer keeps its entry's idle time reset with `touch` while the job runs.
+
+    The payload carries the message text, so it is encrypted with the session codec like
+    every other user secret this service keeps in Redis.
+    """
+
+    STREAM_KEY = "send_message_jobs"
+    GROUP_NAME = "send_message_workers"
+    JOB_KEY_PREFIX = "job:"
+
+    def __init__(self, redis_helper, codec=session_codec):
+        self.client = redis_helper.client
+        self.codec = codec
+        self._has_group = False
+
+    async def enqueue(self, job: dict, payload: dict):
+        await self._ensure_group()
+        await self.client.set(self._job_key(job["id"]), json.dumps(job), ex=Config.JOB_RESULT_TTL_SECONDS)
+        await self.client.xadd(self.STREAM_KEY, {"job_id": job["id"], "payload": self.codec.encode(payload)})
+
+    async def dequeue(self, consumer: str, timeout: float):
+        """Waits up to `timeout` seconds for the next job; returns (job_id, payload, receipt) or None."""
+        await self._ensure_group()
+        _, entries, *_ = await self.client.xautoclaim(
+            self.STREAM_KEY, self.GROUP_NAME, consumer, min_idle_time=Config.JOB_CLAIM_IDLE_SECONDS * 1000, count=1
+        )
+        if not entries:
+            response = await self.client.xreadgroup(
+                self.GROUP_NAME, consumer, {self.STREAM_KEY: ">"}, count=1, block=int(timeout * 1000)
+            )
+            entries = response[0][1] if response else []
+        if not entries:
+            return None
+        entry_id, fields = entries[0]
+        job_id = fields[b"job_id"].decode("utf-8")
+        try:
+            payload = self.codec.decode(fields[b"payload"])
+        except Exception as e:
+            # E.g. queued before payloads were encrypted, or under another ENCRYPTION_KEY
+            logger.error(f"Dropping send-message job {job_id} with an unreadable payload: {str(e)}")
+            await self.update(
+                job_id, status=JOB_FAILED, status_code=500, error="Job payload could not be read.", finished_at=time.time()
+            )
+            await self.ack(entry_id)
+            return None
+        return job_id, payload, entry_id
+
+    async def ack(self, receipt):
+        await self.client.xack(self.STREAM_KEY, self.GROUP_NAME, receipt)
+        await self.client.xdel(self.STREAM_KEY, receipt)  # Drop the message text once handled
+
+    async def touch(self, receipt, consumer: str):
+        """Resets a pending entry's idle time so other consumers do not reclaim a job still running."""
+        await self.client.xclaim(self.STREAM_KEY, self.GROUP_NAME, consumer, min_idle_time=0, message_ids=[receipt], justid=True)
+
+    async def update(self, job_id: str, **fields):
+        job = await self.get(job_id) or {"id": job_id}
+        job.update(fields)
+        await self.client.set(self._job_key(job_id), json.dumps(job), ex=Config.JOB_RESULT_TTL_SECONDS)
+
+    async def get(self, job_id: str):
+        raw = await self.client.get(self._job_key(job_id))
+        return json.loads(raw) if raw else None
+
+    async def _ensure_group(self):
+        if self._has_group:
+            return
+        try:
+            await self.client.xgroup_create(self.STREAM_KEY, self.GROUP_NAME, id="0", mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._has_group = True
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.JOB_KEY_PREFIX}{job_id}"
+
+
+class JobQueue:
+    """
+    Runs `MessageService.send_message` on a pool of in-app workers so the HTTP request can
+    return a job id immediately instead of holding the connection for the whole browser flow.
+    """
+
+    def __init__(self, backend, message_service, workers: int = Config.JOB_WORKERS):
+        self.backend = backend
+        self.message_service = message_service
+        self.workers = workers
+        self._tasks = []
+        self._is_stopping = False
+
+    async def start(self):
+        """Starts the worker tasks."""
+        self._is_stopping = False
+        self._tasks = [asyncio.create_task(self._run_worker(f"worker-{uuid.uuid4().hex[:8]}")) for _ in range(self.workers)]
+        logger.info(f"Started {self.workers} send-message job workers")
+
+    async def stop(self, timeout: float):
+        """Lets workers finish their current job, then cancels any still running after `timeout` seconds."""
+        self._is_stopping = True
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending, timeout=5)  # Lets cancelled jobs record that they failed
+        self._tasks = []
+
+    async def submit(self, username: str, recipient: str, message: str) -> dict:
+        """
+        Queues a send-message job.
+
+        Returns:
+            dict: The job record, including its id and `queued` status.
+        """
+        job = {
+            "id": uuid.uuid4().hex,
+            "username": username,
+            "recipient": recipient,
+            "status": JOB_QUEUED,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "status_code": None,
+            "error": None,
+        }
+        await self.backend.enqueue(job, {"username": username, "recipient": recipient, "message": message})
+        logger.info(f"Queued send-message job {job['id']} for {username}")
+        return job
+
+    async def get(self, job_id: str):
+        """Returns the job record with queue and run timings, or None if it does not exist."""
+        job = await self.backend.get(job_id)
+        if not job:
+            return None
+        now = time.time()
+        started_at, finished_at = job.get("started_at"), job.get("finished_at")
+        job["queue_seconds"] = round((started_at or now) - job["created_at"], 3)
+        job["run_seconds"] = round((finished_at or now) - started_at, 3) if started_at else None
+        return job
+
+    async def _run_worker(self, consumer: str):
+        while not self._is_stopping:
+            try:
+                item = await self.backend.dequeue(consumer, timeout=1)
+            except Exception as e:
+                logger.error(f"Job worker {consumer} failed to read the queue: {str(e)}")
+                await asyncio.sleep(1)
+                continue
+            if item:
+                await self._run_job(consumer, *item)
+            else:
+                await asyncio.sleep(0)  # Yield even if the backend returned without suspending
+
+    async def _run_job(self, consumer: str, job_id: str, payload: dict, receipt):
+        job = await self.backend.get(job_id)
+        if job and job["status"] != JOB_QUEUED:
+            # Reclaimed after its consumer died mid-run (or already finished): the message may
+            # have gone out, so never send it again; the caller can submit a new job instead
+            if job["status"] == JOB_RUNNING:
+                await self.backend.update(
+                    job_id, status=JOB_FAILED, status_code=500, finished_at=time.time(),
+                    error="Job was interrupted while running and was not retried to avoid a duplicate send.",
+                )
+                logger.error(f"Send-message job {job_id} was interrupted while running; not retrying")
+            await self.backend.ack(receipt)
+            return
+
+        await self.backend.update(job_id, status=JOB_RUNNING, started_at=time.time())
+        heartbeat = asyncio.create_task(self._keep_claimed(consumer, receipt))
+        try:
+            await self.message_service.send_message(payload["recipient"], payload["message"], payload["username"])
+            await self.backend.update(job_id, status=JOB_SUCCEEDED, status_code=200, finished_at=time.time())
+            logger.info(f"Send-message job {job_id} succeeded")
+        except HTTPException as e:
+            await self.backend.update(
+                job_id, status=JOB_FAILED, status_code=e.status_code, error=e.detail, finished_at=time.time()
+            )
+            logger.error(f"Send-message job {job_id} failed: {e.detail}")
+        except asyncio.CancelledError:
+            # Cancelled by `stop`; left unacknowledged, a reclaiming worker sees it failed and drops it
+            await self.backend.update(
+                job_id, status=JOB_FAILED, status_code=503, error="Job was cancelled during shutdown.", finished_at=time.time()
+            )
+            logger.error(f"Send-message job {job_id} cancelled during shutdown")
+            raise
+        except Exception as e:
+            await self.backend.update(
+                job_id, status=JOB_FAILED, status_code=500, error=str(e), finished_at=time.time()
+            )
+            logger.exception(f"Send-message job {job_id} failed: {str(e)}")
+        finally:
+            heartbeat.cancel()
+        await self.backend.ack(receipt)
+
+    async def _keep_claimed(self, consumer: str, receipt):
+        """Periodically refreshes the job's claim so it is not reclaimed while it waits or runs."""
+        interval = max(1, Config.JOB_CLAIM_IDLE_SECONDS / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.backend.touch(receipt, consumer)
+            except Exception as e:
+                logger.warning(f"Failed to refresh claim on job entry {receipt}: {str(e)}")
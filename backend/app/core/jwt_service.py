@@ -1,6 +1,9 @@
 # app/core/jwt_service.py
 
+import hashlib
+import time
 import jwt
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from app.core.config import Config
 import logging
@@ -13,6 +16,9 @@ class JWTService:
         self.secret_key = Config.JWT_SECRET_KEY
         self.algorithm = Config.JWT_ALGORITHM
         self.session_service = session_service  # Inject session_service
+        # sha256(token) -> (username, cached_until); lets repeat calls skip decode and session checks
+        self._verified_tokens = OrderedDict()
+        self.session_service.add_deletion_listener(self.invalidate_user)
 
     def generate_tokens(self, username: str):
         """
@@ -34,23 +40,30 @@ class JWTService:
         access_token = jwt.encode({"sub": username, "exp": expiration}, self.secret_key, algorithm=self.algorithm)
         return access_token
 
-    def validate_token(self, token: str):
+    async def validate_token(self, token: str):
         """
         Validates the given JWT token and extracts the username.
+        Tokens verified recently are answered from the verified-token cache.
         """
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        cached = self._verified_tokens.get(digest)
+        if cached and cached[1] > time.time():
+            self._verified_tokens.move_to_end(digest)
+            return cached[0]
+        self._verified_tokens.pop(digest, None)
+
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
             username = payload.get("sub")
             if not username:
                 logger.warning("Invalid token: missing username")
                 raise InvalidTokenError("Invalid token")
-            # check if the session is active
-            session_state = self.session_service.get_session_state(username)  # No await needed
-            if not session_state:
+            # check if the session is active (existence only; no need to load and decrypt it)
+            if not await self.session_service.session_exists(username):
                 logger.warning(f"Session not found for {username}")
                 raise InvalidTokenError("Invalid token")
-            
-            
+
+            self._remember_token(digest, username, payload["exp"])
             return username
         
         except jwt.ExpiredSignatureError:
@@ -60,12 +73,24 @@ class JWTService:
             logger.error("Invalid token")
             raise InvalidTokenError("Invalid token")
 
+    def invalidate_user(self, username: str):
+        """Drops every cached verified token that belongs to the given username."""
+        for digest in [digest for digest, (owner, _) in self._verified_tokens.items() if owner == username]:
+            del self._verified_tokens[digest]
+
+    def _remember_token(self, digest: bytes, username: str, expires_at: int):
+        # Expire at the token's exp, capped so logouts on other workers are picked up quickly
+        cached_until = min(expires_at, time.time() + Config.TOKEN_CACHE_MAX_AGE_SECONDS)
+        self._verified_tokens[digest] = (username, cached_until)
+        while len(self._verified_tokens) > Config.TOKEN_CACHE_MAX_ENTRIES:
+            self._verified_tokens.popitem(last=False)
+
     async def validate_access_token_and_generate_new_access_token(self, access_token: str):
         """
         Validates the given access token and generates a new access token if valid.
         """
         try:
-            username = self.validate_token(access_token)  
+            username = await self.validate_token(access_token)
 
             if not username:
                 raise InvalidTokenError(detail="Invalid access token")
@@ -90,7 +115,7 @@ class JWTService:
       """Generate a new access token if the refresh token is valid and update session in Redis."""
       try:
           
-          username = self.validate_token(refresh_token)  # Call the validate_token method directly
+          username = await self.validate_token(refresh_token)  # Call the validate_token method directly
 
           if not username:
               raise InvalidTokenError(detail="Invalid refresh token")
@@ -101,15 +126,15 @@ class JWTService:
           access_token, new_refresh_token = self.generate_tokens(username)
 
           # Save the new refresh token in Redis with the correct TTL
-          self.session_service.save_session(
+          await self.session_service.save_session(
               f"{username}_refresh_token",  # Key for the refresh token
               new_refresh_token,            # The new refresh token
               ttl=Config.REFRESH_TOKEN_EXPIRATION_DAYS * 24 * 60 * 60  # Set TTL for the new refresh token
           )
 
           # Also, update the session data with the new access token
-          session_state = self.session_service.get_session_state(username)  # No await needed
-          self.session_service.save_session(
+          session_state = await self.session_service.get_session_state(username)
+          await self.session_service.save_session(
               f"{username}_session",        # Key for the session
               session_state,                # The session state to update
               ttl=Config.ACCESS_TOKEN_EXPIRATION_MINUTES * 60  # Set TTL for the session
@@ -1,11 +1,18 @@
 from fastapi import HTTPException
+from app.core import metrics
 from app.core.browser_helper import BrowserHelper
+from app.core.browser_scheduler import BrowserScheduler
 from app.core.agentql_wrapper import AgentQLWrapper
 from app.core.custom_exceptions import InvalidSessionError, LoginFailedError, InvalidCredentialsError
 from app.core.config import Config
 from app.core.jwt_service import JWTService
 import logging
 import asyncio
+import hashlib
+import hmac
+import os
+import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +20,22 @@ class LoginService:
     """Service to handle Instagram login, token management, and session handling."""
 
     LOGIN_URL = "https://www.instagram.com/"
+    # Redirects to the login page unless the request carries a logged-in session
+    SESSION_PROBE_URL = "https://www.instagram.com/accounts/edit/"
     SESSION_TTL = 7 * 24 * 60 * 60  # One-week session expiration time
 
-    def __init__(self, session_service, jwt_service: JWTService):
+    # Elements whose appearance signals that a login step is ready
+    LOGIN_FORM_SELECTOR = "input[name='username']"
+    LOGIN_ERROR_SELECTOR = "#slfErrorAlert, [role='alert']"
+
+    # Cost parameters of the stored password verifier used to reuse sessions without a browser login
+    SCRYPT_PARAMS = {"n": 2**14, "r": 8, "p": 1}
+
+    def __init__(self, session_service, jwt_service: JWTService, scheduler: BrowserScheduler = None):
         self.session_service = session_service
-        self.jwt_service = JWTService(self.session_service)  # Initialize JWTService
+        self.jwt_service = jwt_service
+        self.scheduler = scheduler or BrowserScheduler()
+        self._logins_in_flight = {}  # username -> (credential digest, login task)
 
     # Define AgentQL queries for locating login elements
     LOGIN_QUERY = """
@@ -45,21 +63,216 @@ class LoginService:
     }
     """
 
-    async def login(self, username: str, password: str):
-        """Logs in a user, saves session data, and generates tokens if successful."""
-        context = None  # Initialize context to None at the beginning
+    async def login(self, username: str, password: str, force: bool = False):
+        """
+        Logs in a user, saves session data, and generates tokens if successful.
+
+        When the account already has a stored session whose cookies are still valid and the
+        password matches the one it was created with, tokens are issued from that session
+        without a browser login. `force` always runs the full browser login.
+
+        Concurrent logins for the same account and password share the attempt already in
+        progress, in this process or (through a Redis lock) in another worker, instead of
+        each running a browser login and deleting the session the other is about to write.
+        """
+        async with metrics.flow("login"):
+            return await self._login(username, password, force)
+
+    async def _login(self, username: str, password: str, force: bool):
+        credential = self._credential_digest(username, password)
+        while username in self._logins_in_flight:
+            in_flight_credential, task = self._logins_in_flight[username]
+            if hmac.compare_digest(in_flight_credential, credential):
+                logger.info(f"Joining login already in progress for {username}")
+                return await asyncio.shield(task)
+            await asyncio.wait({task})  # A different password gets its own attempt afterwards
+
+        task = asyncio.create_task(self._login_single_flight(username, password, credential, force))
+        self._logins_in_flight[username] = (credential, task)
+        task.add_done_callback(lambda done: self._finish_login_flight(username, done))
+        return await asyncio.shield(task)  # A disconnecting caller doesn't cancel it for the others
+
+    def _finish_login_flight(self, username: str, task):
+        if self._logins_in_flight.get(username, (None, None))[1] is task:
+            del self._logins_in_flight[username]
+        if not task.cancelled():
+            task.exception()  # Mark as retrieved even if every caller went away
+
+    async def _login_single_flight(self, username: str, password: str, credential: str, force: bool):
+        """Runs the browser login while holding the account's Redis login lock, or shares another worker's result."""
+        redis_helper = self.session_service.redis_helper
+        lock_key = f"{username}_login_lock"
+        lock_owner = uuid.uuid4().hex
+        while not await redis_helper.set_if_absent(lock_key, lock_owner, expiration=Config.LOGIN_LOCK_TTL_SECONDS):
+            shared_result = await self._wait_for_remote_login(username, credential)
+            if shared_result is not None:
+                return shared_result
+
+        try:
+            result = None if force else await self._login_from_stored_session(username, password)
+            if result is None:
+                async with self.scheduler.slot(username):
+                    result = await self._login_with_browser(username, password)
+            await self._publish_login_result(username, credential, tokens=list(result))
+            return result
+        except HTTPException as e:
+            if e.status_code != 429:  # Only share real outcomes, not backpressure
+                await self._publish_login_result(username, credential, error={"status_code": e.status_code, "detail": e.detail})
+            raise
+        finally:
+            await redis_helper.delete_if_value(lock_key, lock_owner)
+
+    async def _wait_for_remote_login(self, username: str, credential: str):
+        """
+        Waits for another worker's login of this account to finish.
+
+        Returns:
+            tuple: Its tokens if it used the same credentials and succeeded, or None if the
+            caller should try to take the lock and log in itself. Re-raises its failure.
+        """
+        redis_helper = self.session_service.redis_helper
+        started_at = time.time()
+        deadline = time.monotonic() + Config.LOGIN_LOCK_TTL_SECONDS
+        logger.info(f"Waiting for login of {username} running in another worker")
+        while await redis_helper.exists(f"{username}_login_lock") and time.monotonic() < deadline:
+            await asyncio.sleep(Config.LOGIN_LOCK_POLL_INTERVAL_SECONDS)
+
+        try:
+            blob = await redis_helper.get_session(self._login_result_key(username))
+            result = self.session_service.decrypt_session_data(blob) if blob else None
+        except Exception as e:
+            logger.warning(f"Failed to read login result for {username}: {str(e)}")
+            return None
+        if not result or result["finished_at"] < started_at or not hmac.compare_digest(result["credential"], credential):
+            return None
+        if result.get("error"):
+            raise HTTPException(status_code=result["error"]["status_code"], detail=result["error"]["detail"])
+        return tuple(result["tokens"])
+
+    @staticmethod
+    def _login_result_key(username: str) -> str:
+        return f"login_result:{username}"
+
+    async def _publish_login_result(self, username: str, credential: str, tokens: list = None, error: dict = None):
+        """Stores the outcome of a login, encrypted, for workers waiting on the same attempt."""
+        result = {"credential": credential, "finished_at": time.time(), "tokens": tokens, "error": error}
+        try:
+            # Kept out of the session namespace so it never shares keys, cache or versions with sessions
+            await self.session_service.redis_helper.set_session(
+                self._login_result_key(username),
+                self.session_service.encrypt_session_data(result),
+                expiration=Config.LOGIN_RESULT_TTL_SECONDS,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to publish login result for {username}: {str(e)}")
+
+    async def _login_from_stored_session(self, username: str, password: str):
+        """
+        Issues tokens from the account's stored session without a browser login.
+
+        Returns:
+            tuple: (access_token, refresh_token), or None when a browser login is needed
+            because the session is missing, about to expire, rejected by the probe, or was
+            created with a different password.
+        """
+        if not Config.LOGIN_SESSION_REUSE_ENABLED:
+            return None
+        try:
+            session_data = await self.session_service.get_session(username)
+            verifier = await self.session_service.get_session(f"{username}_credential")
+        except InvalidSessionError:
+            return None
+        if not self._has_unexpired_auth_cookies(session_data):
+            logger.info(f"Stored session for {username} is expiring, running a browser login")
+            return None
+        if not await asyncio.to_thread(self._verify_password, password, verifier):
+            return None  # Let the browser login decide whether the new password is valid
+        if Config.LOGIN_SESSION_PROBE_ENABLED and not await self._probe_session(username, session_data):
+            logger.info(f"Stored session for {username} was rejected by Instagram, running a browser login")
+            return None
+        logger.info(f"Reusing stored session for {username}, skipping browser login")
+        return await self._issue_tokens(username)
+
+    async def _probe_session(self, username: str, session_data: dict) -> bool:
+        """Checks with one authenticated request that Instagram still accepts the stored session."""
+        async with self.scheduler.slot(username):
+            lease = None
+            is_valid = False
+            try:
+                lease = await BrowserHelper.acquire_page(username, session_data=session_data)
+                response = await lease.context.request.get(
+                    self.SESSION_PROBE_URL, timeout=Config.LOGIN_SESSION_PROBE_TIMEOUT_SECONDS * 1000
+                )
+                is_valid = response.ok and "/accounts/login" not in response.url
+                if is_valid:
+                    await self.session_service.write_back_context(username, lease.context)
+            except Exception as e:
+                logger.warning(f"Session probe failed for {username}: {str(e)}")
+            finally:
+                if lease:
+                    await BrowserHelper.release_page(lease, discard=not is_valid)
+            return is_valid
+
+    @staticmethod
+    def _has_unexpired_auth_cookies(session_data) -> bool:
+        """Checks offline that the session's auth cookies exist and won't expire soon."""
+        if not isinstance(session_data, dict):
+            return False
+        cookies = {cookie.get("name"): cookie for cookie in session_data.get("cookies", [])}
+        min_expiry = time.time() + Config.LOGIN_SESSION_MIN_REMAINING_SECONDS
+        for name in Config.SESSION_AUTH_COOKIES:
+            cookie = cookies.get(name)
+            if not cookie:
+                return False
+            expires = cookie.get("expires", -1)
+            if expires != -1 and expires < min_expiry:  # -1 marks a cookie without an expiry
+                return False
+        return True
+
+    async def _issue_tokens(self, username: str):
+        """Generates a new token pair and stores the refresh token."""
+        access_token, refresh_token = self.jwt_service.generate_tokens(username)
+        await self.session_service.save_session(
+            f"{username}_refresh_token",
+            refresh_token,
+            ttl=Config.REFRESH_TOKEN_EXPIRATION_DAYS * 24 * 60 * 60
+        )
+        return access_token, refresh_token
+
+    @classmethod
+    def _make_password_verifier(cls, password: str) -> dict:
+        """Derives a salted scrypt hash of the password; the password itself is never stored."""
+        salt = os.urandom(16)
+        digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, **cls.SCRYPT_PARAMS)
+        return {"salt": salt.hex(), "hash": digest.hex()}
+
+    @classmethod
+    def _verify_password(cls, password: str, verifier: dict) -> bool:
+        digest = hashlib.scrypt(password.encode("utf-8"), salt=bytes.fromhex(verifier["salt"]), **cls.SCRYPT_PARAMS)
+        return hmac.compare_digest(digest.hex(), verifier["hash"])
+
+    @staticmethod
+    def _credential_digest(username: str, password: str) -> str:
+        """Keyed digest identifying a login attempt's credentials without storing the password."""
+        message = f"{username}\0{password}".encode("utf-8")
+        return hmac.new(Config.JWT_SECRET_KEY.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+    async def _login_with_browser(self, username: str, password: str):
+        lease = None  # Initialize lease to None at the beginning
+        is_logged_in = False
         try:
             logger.info(f"Starting login for user {username}")
-            self.session_service.delete_session(username)  # Clear any existing session
+            await self.session_service.delete_session(username)  # Clear any existing session
 
-            # Initialize a stealth browser page and wrap it for automated interactions
-            context, page = await BrowserHelper.create_stealth_page()
+            # Lease a clean stealth browser page and wrap it for automated interactions
+            lease = await BrowserHelper.acquire_page(username, fresh=True)
+            page = lease.page
             wrapped_page = await AgentQLWrapper.wrap_async(page)
 
             # Navigate to Instagram login page
             await AgentQLWrapper.goto(wrapped_page, self.LOGIN_URL)
             await BrowserHelper.random_scroll(page)
-            await AgentQLWrapper.wait_for_page_ready_state(wrapped_page)
+            await AgentQLWrapper.wait_for_page_ready_state(wrapped_page, "login_page", selector=self.LOGIN_FORM_SELECTOR)
             logger.info(f"Login page loaded for {username}")
 
             # Locate and interact with login form elements
@@ -68,30 +281,32 @@ class LoginService:
                 logger.warning(f"Login indicator not found for user {username}")
                 raise LoginFailedError("Login form not detected on page load")
 
-            await BrowserHelper.human_type(response.login_form.username_input, username)
+            await BrowserHelper.human_type(response.login_form.username_input, username, field="username")
             await BrowserHelper.random_delay()
-            await BrowserHelper.human_type(response.login_form.password_input, password)
+            await BrowserHelper.human_type(response.login_form.password_input, password, field="password")
             await BrowserHelper.random_delay()
-            await response.login_form.login_button.click()
-            await AgentQLWrapper.wait_for_page_ready_state(wrapped_page)
+            login_page_url = page.url
+            await BrowserHelper.click(response.login_form.login_button)
+            await AgentQLWrapper.wait_for_page_ready_state(
+                wrapped_page, "login_submit", selector=self.LOGIN_ERROR_SELECTOR, previous_url=login_page_url
+            )
             logger.info(f"Login form submitted for user {username}")
 
             # Check for login success indicators and handle optional prompts
-            save_info_response = await AgentQLWrapper.query_elements(wrapped_page, self.SAVE_INFO_PROMPT_QUERY)
-            post_login_response = await AgentQLWrapper.query_elements(wrapped_page, self.POST_LOGIN_QUERY)
+            save_info_response, post_login_response = await AgentQLWrapper.query_batch(
+                wrapped_page, self.SAVE_INFO_PROMPT_QUERY, self.POST_LOGIN_QUERY
+            )
             if not post_login_response.home_button and not post_login_response.messages_button and not save_info_response.save_info_button:
                 logger.error(f"Login failed for {username}: home button not found")
                 raise InvalidCredentialsError("Invalid username or password")
 
             # Save session data and generate JWT tokens
-            session_state = await context.storage_state()
-            self.session_service.save_session(username, session_state, ttl=self.SESSION_TTL)
-            access_token, refresh_token = self.jwt_service.generate_tokens(username)
-            self.session_service.save_session(
-                f"{username}_refresh_token",
-                refresh_token,
-                ttl=Config.REFRESH_TOKEN_EXPIRATION_DAYS * 24 * 60 * 60
-            )
+            session_state = await lease.context.storage_state()
+            await self.session_service.save_session(username, session_state, ttl=self.SESSION_TTL)
+            verifier = await asyncio.to_thread(self._make_password_verifier, password)
+            await self.session_service.save_session(f"{username}_credential", verifier, ttl=self.SESSION_TTL)
+            access_token, refresh_token = await self._issue_tokens(username)
+            is_logged_in = True
             logger.info(f"Login successful for user {username}")
 
             return access_token, refresh_token
@@ -103,9 +318,10 @@ class LoginService:
             logger.exception(f"Unexpected error during login for {username}: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Unexpected error during login for {username}: {str(e)}")
         finally:
-            if context:
-                await context.close()  # Close the context only if it was created successfully
-            logger.info(f"Browser context for {username} closed after login attempt")
+            if lease:
+                # Keep the logged-in context warm for the account's next flow
+                await BrowserHelper.release_page(lease, discard=not is_logged_in)
+            logger.info(f"Browser context for {username} released after login attempt")
 
 
     async def refresh_access_token(self, refresh_token: str):
@@ -115,10 +331,15 @@ class LoginService:
     async def logout(self, username: str):
         """Logs out the user by deleting session and refresh token from Redis."""
         try:
-            self.session_service.delete_session(username)  # Remove session data
-            self.session_service.delete_session(f"{username}_refresh_token")  # Remove refresh token
+            await BrowserHelper.evict_context(username)  # Drop the pooled logged-in context
+            await self.session_service.delete_session(username)  # Remove session data
+            await self.session_service.delete_session(f"{username}_refresh_token")  # Remove refresh token
+            await self.session_service.delete_session(f"{username}_credential")  # Remove password verifier
             logger.info(f"User {username} successfully logged out.")
             return {"status": "Logout successful"}
         except InvalidSessionError as e:
             logger.error(f"Error during logout for {username}: {str(e)}")
             raise e
+
+
+metrics.name_queries(vars(LoginService))
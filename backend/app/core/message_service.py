@@ -1,12 +1,28 @@
 from fastapi import HTTPException
 import logging
+from app.core import metrics
 from app.core.browser_helper import BrowserHelper
+from app.core.browser_scheduler import BrowserScheduler
 from app.core.agentql_wrapper import AgentQLWrapper
-from app.core.custom_exceptions import InvalidSessionError
+from app.core.custom_exceptions import InvalidSessionError, RecipientInviteSentError, RecipientNotFoundError
+from app.core.config import Config
+from app.core.page_readiness import PageReadiness
+from app.core.recipient_cache import RecipientCache
+from contextlib import AsyncExitStack
 import asyncio
 
 logger = logging.getLogger(__name__)
 
+# Keeps references to background inbox-parking tasks so they are not garbage collected
+_parking_tasks = set()
+
+INBOX_URL = "https://www.instagram.com/direct/inbox/"
+
+# Elements whose appearance signals that a send step is ready
+INBOX_READY_SELECTOR = "svg[aria-label='New message']"
+MESSAGE_BOX_SELECTOR = "[aria-label='Message...'], div[role='textbox'][contenteditable='true']"
+SEND_BUTTON_SELECTOR = "[role='button']:has-text('Send'), button:has-text('Send')"
+
 # AgentQL Query Constants
 PROFILE_QUERY = """
 {
@@ -74,61 +90,178 @@ CHAT_BUTTON_QUERY = """
 }
 """
 
+metrics.name_queries(globals())
+
 class MessageService:
-    def __init__(self, redis_helper, session_service):
+    def __init__(self, redis_helper, session_service, scheduler: BrowserScheduler = None, recipient_cache: RecipientCache = None):
         self.redis_helper = redis_helper
         self.session_service = session_service
+        self.scheduler = scheduler or BrowserScheduler()
+        self.recipient_cache = recipient_cache or RecipientCache(redis_helper)
 
     async def send_message(self, recipient: str, message: str, username: str):
+        # Recipients known to be unreachable fail before queueing for a browser
+        await self.recipient_cache.raise_if_unreachable(username, recipient)
+        # Waits for this account's earlier flows and a free browser slot; 429 if the queue is full
+        async with metrics.flow("send_message"):
+            async with AsyncExitStack() as slot_stack:
+                await slot_stack.enter_async_context(self.scheduler.slot(username))
+                return await self._send_with_browser(recipient, message, username, slot_stack)
+
+    async def _send_with_browser(self, recipient: str, message: str, username: str, slot_stack: AsyncExitStack):
         logger.info(f"Starting message send to {recipient} from {username}")
         
-        context = None  # Initialize context to None to avoid UnboundLocalError
+        lease = None  # Initialize lease to None to avoid UnboundLocalError
+        discard = False
+        used_cached_thread = False
 
         try:
             session_data = await self._get_session_data(username)
 
-            context, page = await BrowserHelper.create_stealth_page(session_data=session_data)
-            wrapped_page = await AgentQLWrapper.wrap_async(page)
-
-            await self._navigate_to_inbox(wrapped_page)
-            await self._dismiss_notification_popup(wrapped_page)
-
-            if not await self._send_message(wrapped_page, recipient, message):
+            lease = await BrowserHelper.acquire_page(username, session_data=session_data)
+            wrapped_page = await AgentQLWrapper.wrap_async(lease.page)
+
+            # Repeat recipients go straight to the conversation an earlier send landed on
+            message_response = None
+            thread_url = await self.recipient_cache.get_thread(username, recipient)
+            if thread_url:
+                lease.inbox_ready = False
+                message_response = await self._open_cached_thread(wrapped_page, thread_url)
+                if message_response is None:
+                    logger.info(f"Cached thread for {recipient} no longer opens, searching instead")
+                    await self.recipient_cache.forget_thread(username, recipient)
+
+            if message_response is not None:
+                used_cached_thread = True
+                logger.info(f"Sending to {recipient} through cached thread {thread_url}")
+                is_sent = await self._type_and_send(wrapped_page, message, message_response)
+            else:
+                if await self._is_resident_inbox_ready(lease):
+                    logger.info(f"Sending from resident inbox page for {username}")
+                else:
+                    await self._navigate_to_inbox(wrapped_page)
+                    await self._dismiss_notification_popup(wrapped_page)
+                lease.inbox_ready = False  # The send flow moves the page off the inbox
+                is_sent = await self._send_message(wrapped_page, recipient, message)
+
+            if not is_sent:
                 raise HTTPException(status_code=500, detail="Message sending failed. Try again later.")
-            
+
+            await self.recipient_cache.remember_thread(username, recipient, wrapped_page.url)
             return "success"
 
         except InvalidSessionError as session_exc:
             logger.error(f"Invalid session for {username}: {session_exc.detail}")
             raise session_exc
+        except (RecipientNotFoundError, RecipientInviteSentError) as recipient_exc:
+            # Remember the outcome so the next send to this recipient fails without a browser
+            await self.recipient_cache.remember_unreachable(username, recipient, recipient_exc)
+            raise recipient_exc
         except Exception as e:
+            discard = not isinstance(e, HTTPException)  # Don't pool a context that broke mid-flow
             logger.exception(f"Error during message sending for {username} to {recipient}: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Error sending message to {recipient}: {str(e)}")
         finally:
-            if context:
-                await context.close()  # Close context only if it was created
-            logger.info(f"Context for {username} closed after message attempt")
+            if lease and not discard:
+                # Keep the stored session current with the cookies Instagram rotated during the visit
+                await self.session_service.write_back_context(username, lease.context)
+            if lease and not discard and Config.RESIDENT_INBOX_ENABLED and not used_cached_thread:
+                # Re-park after the response; the task takes over the scheduler slot and the lease,
+                # so parking counts against the concurrency cap and the next send waits for it
+                task = asyncio.create_task(self._park_and_release(lease, slot_stack.pop_all()))
+                _parking_tasks.add(task)
+                task.add_done_callback(_parking_tasks.discard)
+            elif lease:
+                await BrowserHelper.release_page(lease, discard=discard)  # Return context to the pool
+                logger.info(f"Context for {username} released after message attempt")
 
     async def _get_session_data(self, username: str):
-        encrypted_session = self.redis_helper.get_session(f"{username}_session")
-        if not encrypted_session:
-            logger.error(f"No session found for user {username}")
-            raise InvalidSessionError("Session not found. Please log in again.")
-        return self.session_service.decrypt_session_data(encrypted_session)
+        # SessionService serves the decrypted state from its cache when still current
+        return await self.session_service.get_session(username)
+
+    async def _is_resident_inbox_ready(self, lease):
+        """Checks that a pooled page is still parked, alive and responsive on the inbox."""
+        if not Config.RESIDENT_INBOX_ENABLED or not lease.inbox_ready:
+            return False
+        page = lease.page
+        if page.is_closed() or not page.url.startswith(INBOX_URL):
+            return False
+        try:
+            ready_state = await asyncio.wait_for(
+                page.evaluate("document.readyState"),
+                timeout=Config.RESIDENT_INBOX_HEALTH_TIMEOUT_SECONDS,
+            )
+            return ready_state == "complete"
+        except Exception as e:
+            logger.warning(f"Resident inbox page for {lease.username} is unhealthy: {str(e)}")
+            return False
+
+    async def _park_on_inbox(self, lease) -> bool:
+        """
+        Navigates a leased page back to the inbox and dismisses popups before it is pooled.
+
+        Returns:
+            bool: True if the page is parked; False if it failed and should be discarded.
+        """
+        try:
+            wrapped_page = await AgentQLWrapper.wrap_async(lease.page)
+            await self._navigate_to_inbox(wrapped_page)
+            await self._dismiss_notification_popup(wrapped_page)
+            lease.inbox_ready = True
+            logger.info(f"Parked resident inbox page for {lease.username}")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to park inbox page for {lease.username}: {str(e)}")
+            return False
+
+    async def _park_and_release(self, lease, slot_stack: AsyncExitStack):
+        """Parks the lease's page on the inbox, then returns it to the pool and frees the scheduler slot."""
+        async with slot_stack:
+            is_parked = await self._park_on_inbox(lease)
+            await BrowserHelper.release_page(lease, discard=not is_parked)
+            logger.info(f"Context for {lease.username} released after parking on the inbox")
 
     async def _navigate_to_inbox(self, wrapped_page):
-        profile_url = "https://www.instagram.com/direct/inbox/"
-        await AgentQLWrapper.goto(wrapped_page, profile_url)
-        logger.info(f"Navigated to {profile_url}")
-        await BrowserHelper.random_delay(4000, 6000)
+        await AgentQLWrapper.goto(wrapped_page, INBOX_URL)
+        logger.info(f"Navigated to {INBOX_URL}")
+        await AgentQLWrapper.wait_for_page_ready_state(wrapped_page, "inbox", selector=INBOX_READY_SELECTOR)
+        await BrowserHelper.random_delay(500, 1000)  # Short human pause once the inbox is usable
 
     async def _dismiss_notification_popup(self, wrapped_page):
         notification_response = await AgentQLWrapper.query_elements(wrapped_page, NOTIFICATION_POPUP_QUERY)
         if notification_response.notification_prompt and notification_response.notification_prompt.not_now_btn:
-            await notification_response.notification_prompt.not_now_btn.click()
+            await BrowserHelper.click(notification_response.notification_prompt.not_now_btn)
             logger.info("Dismissed notification popup")
             await BrowserHelper.random_delay(1000, 1500)
 
+    async def _open_cached_thread(self, wrapped_page, thread_url: str):
+        """
+        Opens a cached conversation and checks it is still usable.
+
+        Returns:
+            The response holding the thread's message box, or None if the thread is gone
+            (Instagram redirects away from it), shows no message box, or fails to load.
+        """
+        try:
+            await AgentQLWrapper.goto(wrapped_page, thread_url)
+            await AgentQLWrapper.wait_for_page_ready_state(wrapped_page, "thread", selector=MESSAGE_BOX_SELECTOR)
+            if RecipientCache.thread_url_from(wrapped_page.url) != thread_url:
+                return None
+
+            # Check for the notification prompt and locate the message box in one round-trip
+            notification_response, message_response = await AgentQLWrapper.query_batch(
+                wrapped_page, NOTIFICATION_POPUP_QUERY, MESSAGE_QUERY
+            )
+            if notification_response.notification_prompt and notification_response.notification_prompt.not_now_btn:
+                await BrowserHelper.click(notification_response.notification_prompt.not_now_btn)
+                logger.info("Dismissed notification popup")
+                await BrowserHelper.random_delay(1000, 1500)
+            return message_response if message_response.message_box else None
+        except Exception as e:
+            # The search flow navigates the page from scratch, so it can still deliver the message
+            logger.warning(f"Failed to open cached thread {thread_url}: {str(e)}")
+            return None
+
     async def _send_message(self, wrapped_page, recipient: str, message: str):
         # Open send message dialog
         send_message_button = await AgentQLWrapper.query_elements(wrapped_page, SEND_BUTTON_QUERY)
@@ -136,7 +269,7 @@ class MessageService:
             logger.error("Send message button not found.")
             return False
 
-        await send_message_button.send_button.click()
+        await BrowserHelper.click(send_message_button.send_button)
         logger.info("Send message button clicked")
         await BrowserHelper.random_delay(1000, 1500)
 
@@ -146,56 +279,62 @@ class MessageService:
             logger.error("Recipient input field not found.")
             return False
         
-        await BrowserHelper.human_type(recipient_input_response.recipient_input, recipient)
+        await BrowserHelper.human_type(recipient_input_response.recipient_input, recipient, field="recipient")
         logger.info(f"Typed recipient username: {recipient}")
         await BrowserHelper.random_delay(1000, 1500)
 
-        # Check for "No account found" message
-        no_account_found_response = await AgentQLWrapper.query_elements(wrapped_page, NO_ACCOUNT_FOUND_QUERY)
+        # Check for "No account found" message and locate suggestions in one round-trip
+        no_account_found_response, chat_suggestion_response = await AgentQLWrapper.query_batch(
+            wrapped_page, NO_ACCOUNT_FOUND_QUERY, CHAT_SUGGESTION_QUERY
+        )
         if no_account_found_response.no_account_message:
             logger.error(f"No account found for {recipient}")
-            raise HTTPException(status_code=404, detail="Recipient account not found.")
+            raise RecipientNotFoundError()
 
         # Select the recipient from suggestions
-        chat_suggestion_response = await AgentQLWrapper.query_elements(wrapped_page, CHAT_SUGGESTION_QUERY)
         if not chat_suggestion_response.chat_suggestion:
             logger.error(f"No chat suggestion found for {recipient}")
             return False
-        await chat_suggestion_response.chat_suggestion.click()
+        await BrowserHelper.click(chat_suggestion_response.chat_suggestion)
         logger.info(f"Clicked on chat suggestion for {recipient}")
 
         # Open chat if button is available
         chat_button_response = await AgentQLWrapper.query_elements(wrapped_page, CHAT_BUTTON_QUERY)
         if chat_button_response.chat_button:
-            await chat_button_response.chat_button.click()
+            await BrowserHelper.click(chat_button_response.chat_button)
             logger.info("Chat button clicked")
 
-        # Check if invite is sent
-        invite_message_response = await AgentQLWrapper.query_elements(wrapped_page, INVITE_MESSAGE_QUERY)
+        # Check if invite is sent and locate the message box in one round-trip
+        invite_message_response, message_response = await AgentQLWrapper.query_batch(
+            wrapped_page, INVITE_MESSAGE_QUERY, MESSAGE_QUERY
+        )
         if invite_message_response.invite_sent_message:
             logger.error("Invite sent. Cannot send more messages until the invite is accepted.")
-            raise HTTPException(status_code=403, detail="Invite sent. Cannot send more messages until the invite is accepted.")
+            raise RecipientInviteSentError()
+
+        return await self._type_and_send(wrapped_page, message, message_response)
 
-        # Locate message box and send the message
-        message_response = await AgentQLWrapper.query_elements(wrapped_page, MESSAGE_QUERY)
+    async def _type_and_send(self, wrapped_page, message: str, message_response):
+        # Send the message once the message box is available
         if not message_response.message_box:
-            await BrowserHelper.random_delay(2000, 3000)
+            await AgentQLWrapper.wait_for_page_ready_state(wrapped_page, "message_box", selector=MESSAGE_BOX_SELECTOR)
             await BrowserHelper.random_scroll(wrapped_page)
             message_response = await AgentQLWrapper.query_elements(wrapped_page, MESSAGE_QUERY)
 
         if message_response.message_box:
-            await BrowserHelper.human_type(message_response.message_box, message)
+            await BrowserHelper.human_type(message_response.message_box, message, field="message")
             await BrowserHelper.random_delay(1000, 1500)
 
             # Send the message
+            await AgentQLWrapper.wait_for_page_ready_state(wrapped_page, "send_button", selector=SEND_BUTTON_SELECTOR)
             send_button_response = await AgentQLWrapper.query_elements(wrapped_page, SEND_BUTTON_QUERY)
             for _ in range(3):
                 if send_button_response.send_button:
-                    await send_button_response.send_button.click()
-                    await BrowserHelper.random_delay(3000, 5000)
+                    await BrowserHelper.click(send_button_response.send_button)
+                    await AgentQLWrapper.wait_for_page_ready_state(wrapped_page, "message_sent")
                     logger.info("Message sent successfully")
                     return True
-                await BrowserHelper.random_delay(1000, 2000)
+                await PageReadiness.wait_for_dom_settled(wrapped_page, PageReadiness.step_timeout("send_button"))
                 send_button_response = await AgentQLWrapper.query_elements(wrapped_page, SEND_BUTTON_QUERY)
 
         return False
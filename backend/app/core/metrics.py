@@ -0,0 +1,244 @@
+# app/core/metrics.py
+
+import bisect
+import contextvars
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from app.core import tracing
+
+# Latency buckets in seconds, from sub-millisecond cache hits to multi-second browser steps
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+# The browser flow (login, send_message, ...) the current task is running, if any
+_current_flow = contextvars.ContextVar("current_flow", default=None)
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values, rendered in Prometheus format."""
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 2)
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):  # Values above the last bound only show up in +Inf
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the duration of the block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self):
+        samples = []
+        for key, series in self._series.items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                samples.append(("_bucket", {**labels, "le": _format_value(float(bound))}, cumulative))
+            samples.append(("_bucket", {**labels, "le": "+Inf"}, series[-1]))
+            samples.append(("_sum", labels, series[-2]))
+            samples.append(("_count", labels, series[-1]))
+        return [(self.name, "histogram", self.documentation, samples)]
+
+
+class MetricsRegistry:
+    """
+    Holds the process's metrics and renders them in the Prometheus text format.
+
+    Besides the metrics above, callbacks registered with `register_collector` are read at
+    scrape time, which is how existing stats (pool size, queue depth, hit totals) are exposed
+    as gauges or counters without touching the hot path.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = {}
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, name: str, collector, metric_type: str = "gauge"):
+        """
+        Registers (or replaces) a callback read at scrape time.
+
+        The callback returns readings as `{metric name: (documentation, value)}`, where
+        value is a number, or a `{label values tuple: number}` dict given together with its
+        label names as `(documentation, value, labelnames)`.
+
+        Args:
+            name (str): Identifies the collector, so registering it again replaces it.
+            collector: The callback.
+            metric_type (str): "gauge", or "counter" for totals that only ever increase.
+        """
+        self._collectors[name] = (collector, metric_type)
+
+    def collect(self) -> list:
+        """Returns every metric family as `(name, type, documentation, samples)`."""
+        families = []
+        for metric in self._metrics:
+            families.extend(metric.collect())
+        for collector, metric_type in list(self._collectors.values()):
+            for name, reading in collector().items():
+                documentation, value, *labelnames = reading
+                if isinstance(value, dict):
+                    names = labelnames[0] if labelnames else ()
+                    samples = [("", dict(zip(names, key)), sample) for key, sample in value.items()]
+                else:
+                    samples = [("", {}, value)]
+                families.append((name, metric_type, documentation, samples))
+        return families
+
+    @staticmethod
+    def render(families: list) -> str:
+        """Renders metric families in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, metric_type, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def merge(families_by_source: dict, label: str) -> list:
+        """Merges families collected in several processes, tagging each sample with its source."""
+        merged = {}
+        for source, families in families_by_source.items():
+            for name, metric_type, documentation, samples in families:
+                family = merged.setdefault(name, (name, metric_type, documentation, []))
+                family[3].extend((suffix, {label: source, **labels}, value) for suffix, labels, value in samples)
+        return list(merged.values())
+
+
+REGISTRY = MetricsRegistry()
+
+FLOW_SECONDS = REGISTRY.histogram(
+    "browser_flow_seconds", "Duration of a whole browser flow.", ("flow", "outcome")
+)
+STEP_SECONDS = REGISTRY.histogram(
+    "browser_step_seconds", "Duration of a named step inside a browser flow.", ("flow", "step")
+)
+AGENTQL_QUERY_SECONDS = REGISTRY.histogram(
+    "agentql_query_seconds", "Duration of an AgentQL query by query constant and where it was answered.", ("flow", "query", "source")
+)
+AGENTQL_CALLS_PER_FLOW = REGISTRY.histogram(
+    "agentql_calls_per_flow", "Remote AgentQL calls made by one browser flow.", ("flow",), buckets=COUNT_BUCKETS
+)
+REDIS_OPERATION_SECONDS = REGISTRY.histogram(
+    "redis_operation_seconds", "Duration of a Redis operation.", ("operation",)
+)
+
+# Query string -> name of the constant it is defined as, for readable labels
+_query_names = {}
+
+
+def name_queries(namespace: dict):
+    """Records the constant names of the AgentQL queries (`*_QUERY` strings) in a namespace."""
+    for name, value in namespace.items():
+        if name.endswith("_QUERY") and isinstance(value, str):
+            _query_names[value] = name
+
+
+def query_name(query: str) -> str:
+    return _query_names.get(query, "other")
+
+
+def current_flow() -> str:
+    state = _current_flow.get()
+    return state["flow"] if state else "none"
+
+
+@asynccontextmanager
+async def flow(name: str):
+    """Times a whole browser flow and counts the AgentQL calls made inside it."""
+    state = {"flow": name, "agentql_calls": 0}
+    token = _current_flow.set(state)
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with tracing.span(name, "flow"):
+            yield
+        outcome = "success"
+    finally:
+        FLOW_SECONDS.observe(time.perf_counter() - start, flow=name, outcome=outcome)
+        AGENTQL_CALLS_PER_FLOW.observe(state["agentql_calls"], flow=name)
+        _current_flow.reset(token)
+
+
+@contextmanager
+def step(name: str):
+    """Times a named step of the current browser flow and records it as a trace span."""
+    with STEP_SECONDS.time(flow=current_flow(), step=name), tracing.span(name, "step"):
+        yield
+
+
+@contextmanager
+def agentql_query(query_label: str, source: str):
+    """Times an AgentQL query; remote calls also count towards the flow's AgentQL calls."""
+    state = _current_flow.get()
+    if state and source == "agentql":
+        state["agentql_calls"] += 1
+    with (
+        AGENTQL_QUERY_SECONDS.time(flow=current_flow(), query=query_label, source=source),
+        tracing.span(query_label, "agentql", source=source),
+    ):
+        yield
+
+
+@contextmanager
+def agentql_cache_lookup(query_label: str):
+    """
+    Times a selector cache lookup; only a hit is recorded as a query answered by the cache.
+
+    Yields:
+        dict: Set its "hit" key to True when the lookup answered the query.
+    """
+    lookup = {"hit": False}
+    start = time.perf_counter()
+    with tracing.span(query_label, "agentql", source="cache"):
+        yield lookup
+    if lookup["hit"]:
+        AGENTQL_QUERY_SECONDS.observe(time.perf_counter() - start, flow=current_flow(), query=query_label, source="cache")
+
+
+@contextmanager
+def redis_operation(operation: str):
+    """Times a Redis operation and records it as a trace span."""
+    with REDIS_OPERATION_SECONDS.time(operation=operation), tracing.span(operation, "redis"):
+        yield
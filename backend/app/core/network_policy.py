@@ -0,0 +1,92 @@
+# app/core/network_policy.py
+
+import logging
+import re
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+MODE_OFF = "off"
+MODE_REPORT = "report"  # Let matching requests through but measure what blocking them would save
+MODE_ENFORCE = "enforce"
+
+
+class NetworkPolicy:
+    """
+    Routing policy installed on every automation context to abort requests the flows
+    don't need, such as images, media, fonts and analytics beacons.
+
+    In report mode nothing is blocked; matching requests are counted along with their
+    response sizes, so a rule can be checked against real traffic before it is enforced.
+    Enforce mode counts blocked requests only: their responses are never downloaded, so
+    no byte counts are reported rather than a total that would always be zero.
+    """
+
+    def __init__(
+        self,
+        mode: str = Config.NETWORK_BLOCKING_MODE,
+        blocked_resource_types=Config.NETWORK_BLOCKED_RESOURCE_TYPES,
+        blocked_url_patterns=Config.NETWORK_BLOCKED_URL_PATTERNS,
+        allowed_url_patterns=Config.NETWORK_ALLOWED_URL_PATTERNS,
+    ):
+        self.mode = mode
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+        self._blocked_urls = [re.compile(pattern) for pattern in blocked_url_patterns if pattern]
+        self._allowed_urls = [re.compile(pattern) for pattern in allowed_url_patterns if pattern]
+        self._by_type = {}  # resource type -> [requests, bytes]
+        self._measuring = set()
+        self.allowed_requests = 0
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        """Returns True if a request matches a blocking rule and no allow rule."""
+        if any(pattern.search(url) for pattern in self._allowed_urls):
+            return False
+        return resource_type in self.blocked_resource_types or any(pattern.search(url) for pattern in self._blocked_urls)
+
+    async def apply(self, context):
+        """Installs the policy on a browser context."""
+        if self.mode == MODE_OFF:
+            return
+        await context.route("**/*", self._handle_route)
+        if self.mode == MODE_REPORT:
+            context.on("requestfinished", self._measure_request)
+            context.on("requestfailed", self._measuring.discard)
+
+    def stats(self) -> dict:
+        """Returns blocked request counts, in total and per resource type, with byte counts in report mode."""
+        is_measured = self.mode == MODE_REPORT
+        by_type = {}
+        for resource_type, (requests, size) in sorted(self._by_type.items()):
+            by_type[resource_type] = {"requests": requests, "bytes": size} if is_measured else {"requests": requests}
+        return {
+            "mode": self.mode,
+            "blocked_requests": sum(requests for requests, _ in self._by_type.values()),
+            "blocked_bytes": sum(size for _, size in self._by_type.values()) if is_measured else None,
+            "allowed_requests": self.allowed_requests,
+            "by_type": by_type,
+        }
+
+    async def _handle_route(self, route):
+        request = route.request
+        if not self.should_block(request.resource_type, request.url):
+            self.allowed_requests += 1
+            await route.fallback()
+            return
+
+        self._by_type.setdefault(request.resource_type, [0, 0])[0] += 1
+        if self.mode == MODE_ENFORCE:
+            await route.abort("blockedbyclient")
+        else:
+            self._measuring.add(request)
+            await route.fallback()
+
+    async def _measure_request(self, request):
+        if request not in self._measuring:
+            return
+        self._measuring.discard(request)
+        try:
+            sizes = await request.sizes()
+            self._by_type[request.resource_type][1] += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+        except Exception as e:
+            logger.debug(f"Could not measure blocked request {request.url}: {str(e)}")
@@ -0,0 +1,148 @@
+# app/core/page_readiness.py
+
+import asyncio
+import logging
+import time
+
+from playwright.async_api import Page
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Resolves true once no nodes have been added or removed for `quietMs`, or false at `timeoutMs`.
+# Only childList mutations count: attribute and text churn (timestamps, typing indicators,
+# animation classes) never stops on a live inbox and would hold every step to its timeout.
+_DOM_SETTLED_JS = """
+([quietMs, timeoutMs]) => new Promise((resolve) => {
+    let quietTimer = null;
+    let deadline = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish(true), quietMs);
+    });
+    const finish = (settled) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(deadline);
+        resolve(settled);
+    };
+    observer.observe(document, { childList: true, subtree: true });
+    quietTimer = setTimeout(() => finish(true), quietMs);
+    deadline = setTimeout(() => finish(false), timeoutMs);
+})
+"""
+
+
+class PageReadiness:
+    """Event-driven waits that resume a flow step as soon as the page is actually ready."""
+
+    @staticmethod
+    def step_timeout(step: str) -> float:
+        """Returns the configured timeout in seconds for a named flow step."""
+        return Config.READINESS_STEP_TIMEOUTS.get(step, Config.READINESS_STEP_TIMEOUTS["default"])
+
+    @staticmethod
+    async def wait_for_element(page: Page, selector: str, timeout: float) -> bool:
+        """
+        Waits for an element matching the selector to be attached to the page.
+
+        Args:
+            page (Page): The Playwright page to watch.
+            selector (str): The selector of the element to wait for.
+            timeout (float): Maximum time to wait, in seconds.
+
+        Returns:
+            bool: True if the element appeared before the timeout.
+        """
+        try:
+            await page.wait_for_selector(selector, state="attached", timeout=timeout * 1000)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    async def wait_for_url_change(page: Page, previous_url: str, timeout: float) -> bool:
+        """
+        Waits for the page to navigate away from the given URL.
+
+        Args:
+            page (Page): The Playwright page to watch.
+            previous_url (str): The URL the page was on before the action.
+            timeout (float): Maximum time to wait, in seconds.
+
+        Returns:
+            bool: True if the URL changed before the timeout.
+        """
+        try:
+            await page.wait_for_url(lambda url: url != previous_url, timeout=timeout * 1000, wait_until="commit")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    async def wait_for_dom_settled(page: Page, timeout: float, quiet_ms: int = None) -> bool:
+        """
+        Waits until no nodes have been added to or removed from the DOM for `quiet_ms` milliseconds.
+
+        Args:
+            page (Page): The Playwright page to watch.
+            timeout (float): Maximum time to wait, in seconds.
+            quiet_ms (int): How long the DOM must stay unchanged to count as settled.
+
+        Returns:
+            bool: True if the DOM settled before the timeout.
+        """
+        quiet_ms = quiet_ms or Config.READINESS_DOM_QUIET_MS
+        try:
+            return await page.evaluate(_DOM_SETTLED_JS, [quiet_ms, int(timeout * 1000)])
+        except Exception:
+            # A navigation destroyed the execution context; the next step re-checks the page
+            return False
+
+    @staticmethod
+    async def wait_for_step(page: Page, step: str, selector: str = None, previous_url: str = None) -> bool:
+        """
+        Waits for a flow step's readiness conditions within that step's timeout.
+
+        Resumes on whichever comes first of the target element appearing or the URL
+        changing (when given), then waits for the DOM to settle with the remaining time.
+
+        Args:
+            page (Page): The Playwright page to watch.
+            step (str): The flow step name used to look up the timeout.
+            selector (str): Optional selector of an element that signals readiness.
+            previous_url (str): Optional URL the page is expected to navigate away from.
+
+        Returns:
+            bool: True if the page became ready before the step timed out.
+        """
+        timeout = PageReadiness.step_timeout(step)
+        deadline = time.monotonic() + timeout
+        is_ready = True
+
+        waiters = []
+        if selector:
+            waiters.append(asyncio.ensure_future(PageReadiness.wait_for_element(page, selector, timeout)))
+        if previous_url:
+            waiters.append(asyncio.ensure_future(PageReadiness.wait_for_url_change(page, previous_url, timeout)))
+        if waiters:
+            is_ready = False
+            pending = set(waiters)
+            while pending and not is_ready:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                is_ready = any(waiter.result() for waiter in done)
+            for waiter in pending:
+                waiter.cancel()
+
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            try:
+                await page.wait_for_load_state("domcontentloaded", timeout=remaining * 1000)
+            except Exception:
+                is_ready = False
+            is_ready = await PageReadiness.wait_for_dom_settled(page, max(deadline - time.monotonic(), 0.1)) and is_ready
+
+        if not is_ready:
+            logger.warning(f"Page not ready for step '{step}' within {timeout}s, continuing")
+        return is_ready
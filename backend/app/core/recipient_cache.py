@@ -0,0 +1,162 @@
+# app/core/recipient_cache.py
+
+import json
+import logging
+import re
+import time
+
+from fastapi import HTTPException
+
+from app.core.config import Config
+from app.core.custom_exceptions import RecipientInviteSentError, RecipientNotFoundError
+
+logger = logging.getLogger(__name__)
+
+# A conversation URL, e.g. https://www.instagram.com/direct/t/340282366841710300949128/
+THREAD_URL_PATTERN = re.compile(r"^https://www\.instagram\.com/direct/t/[\w-]+/")
+
+
+class RecipientCache:
+    """
+    Remembers per (sender, recipient) what earlier sends learned about the recipient, so
+    repeat sends can skip the recipient search (the conversation thread it resolved to)
+    or fail without opening a browser (no such account, or a message invite still pending).
+
+    The cache is an optimisation only; Redis errors are logged and treated as a miss.
+    """
+
+    # Errors worth remembering, with how long each outcome is trusted
+    UNREACHABLE_ERRORS = {
+        RecipientNotFoundError: ("not_found", Config.RECIPIENT_NOT_FOUND_TTL_SECONDS),
+        RecipientInviteSentError: ("invite_pending", Config.RECIPIENT_INVITE_PENDING_TTL_SECONDS),
+    }
+
+    def __init__(
+        self,
+        redis_helper,
+        thread_ttl: int = Config.THREAD_CACHE_TTL_SECONDS,
+        enabled: bool = Config.THREAD_CACHE_ENABLED,
+        negative_enabled: bool = Config.RECIPIENT_NEGATIVE_CACHE_ENABLED,
+    ):
+        self.redis_helper = redis_helper
+        self.thread_ttl = thread_ttl
+        self.enabled = enabled
+        self.negative_enabled = negative_enabled
+
+    @staticmethod
+    def _normalize(recipient: str) -> str:
+        return recipient.strip().lstrip("@").lower()  # Instagram usernames are case-insensitive
+
+    def _thread_key(self, username: str, recipient: str) -> str:
+        # Own prefix so a thread key can never be read as a {username}_* session key
+        return f"thread:{username}:{self._normalize(recipient)}"
+
+    @staticmethod
+    def _unreachable_prefix(username: str) -> str:
+        # Own prefix, like thread keys; ':' cannot appear in Instagram usernames, so one
+        # sender's prefix never matches another's keys
+        return f"unreachable:{username}:"
+
+    def _unreachable_pattern(self, username: str) -> str:
+        # Escaped so '*', '?' or '[' in a username cannot match other senders' keys
+        return f"{self.redis_helper.escape_pattern(self._unreachable_prefix(username))}*"
+
+    def _unreachable_key(self, username: str, recipient: str) -> str:
+        return f"{self._unreachable_prefix(username)}{self._normalize(recipient)}"
+
+    @staticmethod
+    def thread_url_from(url: str):
+        """Returns the conversation URL a page URL belongs to, or None if it is not a thread."""
+        match = THREAD_URL_PATTERN.match(url or "")
+        return match.group(0) if match else None
+
+    async def get_thread(self, username: str, recipient: str):
+        """Returns the cached thread URL for a sender and recipient, or None."""
+        if not self.enabled:
+            return None
+        try:
+            value = await self.redis_helper.get_session(self._thread_key(username, recipient))
+        except HTTPException as e:
+            logger.warning(f"Thread cache lookup failed for {username} -> {recipient}: {e.detail}")
+            return None
+        return value.decode("utf-8") if value else None
+
+    async def remember_thread(self, username: str, recipient: str, url: str):
+        """Stores the thread a send landed on; ignores pages that are not a conversation."""
+        thread_url = self.thread_url_from(url)
+        if not self.enabled or not thread_url:
+            return
+        try:
+            await self.redis_helper.set_session(self._thread_key(username, recipient), thread_url, expiration=self.thread_ttl)
+        except HTTPException as e:
+            logger.warning(f"Failed to cache thread for {username} -> {recipient}: {e.detail}")
+
+    async def forget_thread(self, username: str, recipient: str):
+        """Drops a cached thread that no longer opens."""
+        try:
+            await self.redis_helper.delete_session(self._thread_key(username, recipient))
+        except HTTPException as e:
+            logger.warning(f"Failed to drop cached thread for {username} -> {recipient}: {e.detail}")
+
+    async def remember_unreachable(self, username: str, recipient: str, error: HTTPException):
+        """Stores a recipient error from the send flow, with the TTL configured for its kind."""
+        reason, ttl = self.UNREACHABLE_ERRORS.get(type(error), (None, None))
+        if not self.negative_enabled or not reason or ttl <= 0:
+            return
+        now = int(time.time())
+        entry = {
+            "recipient": self._normalize(recipient),
+            "reason": reason,
+            "status_code": error.status_code,
+            "detail": error.detail,
+            "cached_at": now,
+            "expires_at": now + ttl,
+        }
+        try:
+            await self.redis_helper.set_session(self._unreachable_key(username, recipient), json.dumps(entry), expiration=ttl)
+            logger.info(f"Cached {reason} for {username} -> {recipient} for {ttl}s")
+        except HTTPException as e:
+            logger.warning(f"Failed to cache {reason} for {username} -> {recipient}: {e.detail}")
+
+    async def get_unreachable(self, username: str, recipient: str):
+        """Returns the cached error entry for a sender and recipient, or None."""
+        if not self.negative_enabled:
+            return None
+        try:
+            value = await self.redis_helper.get_session(self._unreachable_key(username, recipient))
+        except HTTPException as e:
+            logger.warning(f"Unreachable recipient lookup failed for {username} -> {recipient}: {e.detail}")
+            return None
+        return json.loads(value) if value else None
+
+    async def raise_if_unreachable(self, username: str, recipient: str):
+        """Raises the cached error for a recipient known to be unreachable from this sender."""
+        entry = await self.get_unreachable(username, recipient)
+        if not entry:
+            return
+        logger.info(f"Failing fast for {username} -> {recipient}: cached {entry['reason']}")
+        for error_class, (reason, _) in self.UNREACHABLE_ERRORS.items():
+            if reason == entry["reason"]:
+                raise error_class(entry["detail"])
+
+    async def list_unreachable(self, username: str) -> list:
+        """Returns every cached unreachable recipient of a sender."""
+        keys = await self.redis_helper.scan_keys(self._unreachable_pattern(username))
+        entries = []
+        for key in sorted(keys):
+            value = await self.redis_helper.get_session(key)
+            if value:  # May have expired since the scan
+                entries.append(json.loads(value))
+        return entries
+
+    async def clear_unreachable(self, username: str, recipient: str = None) -> int:
+        """Removes one recipient's entry, or all of the sender's; returns how many were removed."""
+        if recipient:
+            keys = [self._unreachable_key(username, recipient)]
+            if not await self.redis_helper.exists(keys[0]):
+                return 0
+        else:
+            keys = await self.redis_helper.scan_keys(self._unreachable_pattern(username))
+        for key in keys:
+            await self.redis_helper.delete_session(key)
+        return len(keys)
@@ -1,46 +1,72 @@
 import logging
-import os
+import re
 import redis
+from redis import asyncio as aioredis
 from fastapi import HTTPException
+from app.core import metrics
+from app.core.config import Config
 
 logger = logging.getLogger(__name__)
 
 class RedisHelper:
-    """Helper class to manage Redis interactions for session data."""
+    """Helper class to manage non-blocking Redis interactions for session data."""
 
-    # Configuration for Redis based on environment variables
-    REDIS_ENABLED = os.getenv("REDIS_ENABLED", "true").lower() == "true"
-    REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-    REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+    # One connection pool shared by every RedisHelper in the process
+    _pool = None
 
     def __init__(self):
         self.client = None
-        self.connect_redis()  # Attempt connection on initialization
+        self.connect_redis()  # Attach to the shared pool on initialization
+
+    @staticmethod
+    def get_pool():
+        """Returns the process-wide async connection pool, creating it on first use."""
+        if RedisHelper._pool is None:
+            RedisHelper._pool = aioredis.ConnectionPool(
+                host=Config.REDIS_HOST,
+                port=Config.REDIS_PORT,
+                max_connections=Config.REDIS_MAX_CONNECTIONS,
+                socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=Config.REDIS_CONNECT_TIMEOUT,
+                health_check_interval=Config.REDIS_HEALTH_CHECK_INTERVAL,
+                decode_responses=False,  # Values come back as raw bytes; callers decode text themselves
+            )
+        return RedisHelper._pool
+
+    @staticmethod
+    async def close_pool():
+        """Closes every connection in the shared pool."""
+        if RedisHelper._pool is not None:
+            await RedisHelper._pool.disconnect()
+            RedisHelper._pool = None
 
     def connect_redis(self):
-        """Establishes a connection to Redis if enabled in the environment settings."""
+        """Creates a Redis client on the shared pool if enabled in the environment settings."""
+        if Config.REDIS_ENABLED:
+            # Connections are opened lazily by the pool on first command
+            self.client = aioredis.Redis(connection_pool=RedisHelper.get_pool())
+            logger.info(f"Using Redis at {Config.REDIS_HOST}:{Config.REDIS_PORT}")
+        else:
+            logger.warning("Redis is disabled in environment variables.")
+            self.client = None
+
+    async def ping(self) -> bool:
+        """Returns True if Redis answers a PING."""
+        if not self.client:
+            return False
         try:
-            if RedisHelper.REDIS_ENABLED:
-                # Create a Redis client instance
-                self.client = redis.Redis(
-                    host=RedisHelper.REDIS_HOST,
-                    port=RedisHelper.REDIS_PORT,
-                    decode_responses=True,
-                )
-                logger.info(f"Connected to Redis at {RedisHelper.REDIS_HOST}:{RedisHelper.REDIS_PORT}")
-            else:
-                logger.warning("Redis is disabled in environment variables.")
-                self.client = None
-        except redis.exceptions.ConnectionError as e:
-            logger.error(f"Failed to connect to Redis: {str(e)}")
-            raise HTTPException(status_code=503, detail="Could not connect to Redis. Please try again later.")
+            return await self.client.ping()
+        except Exception as e:
+            logger.warning(f"Redis ping failed: {str(e)}")
+            return False
 
-    def set_session(self, key, value, expiration=None):
+    async def set_session(self, key, value, expiration=None):
         """Stores session data in Redis with an optional expiration time."""
         try:
             if not self.client:
                 raise HTTPException(status_code=503, detail="Redis client is not available.")
-            self.client.set(key, value, ex=expiration)
+            with metrics.redis_operation("set"):
+                await self.client.set(key, value, ex=expiration)
             logger.info(f"Session for {key} saved to Redis.")
         except redis.exceptions.ConnectionError as e:
             logger.error(f"Redis connection error: {e}")
@@ -49,12 +75,13 @@ class RedisHelper:
             logger.error(f"Error saving session for {key}: {str(e)}")
             raise HTTPException(status_code=500, detail="Error saving session.")
 
-    def get_session(self, key):
+    async def get_session(self, key):
         """Retrieves session data from Redis based on a given key."""
         try:
             if not self.client:
                 raise HTTPException(status_code=503, detail="Redis client is not available.")
-            return self.client.get(key)
+            with metrics.redis_operation("get"):
+                return await self.client.get(key)
         except redis.RedisError as e:
             logger.error(f"Error retrieving session for {key}: {str(e)}")
             raise HTTPException(status_code=503, detail="Error retrieving session data.")
@@ -62,12 +89,120 @@ class RedisHelper:
             logger.error(f"Unexpected error: {str(e)}")
             raise HTTPException(status_code=500, detail="Error retrieving session.")
 
-    def delete_session(self, key):
+    async def exists(self, key) -> bool:
+        """Checks whether a key exists in Redis without transferring its value."""
+        try:
+            if not self.client:
+                raise HTTPException(status_code=503, detail="Redis client is not available.")
+            with metrics.redis_operation("exists"):
+                return await self.client.exists(key) > 0
+        except redis.RedisError as e:
+            logger.error(f"Error checking {key}: {str(e)}")
+            raise HTTPException(status_code=503, detail="Error retrieving session data.")
+        except Exception as e:
+            logger.error(f"Unexpected error: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error retrieving session.")
+
+    async def incr(self, key, expiration=None) -> int:
+        """Atomically increments a counter, optionally (re)setting its expiration time."""
+        try:
+            if not self.client:
+                raise HTTPException(status_code=503, detail="Redis client is not available.")
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.incr(key)
+                if expiration:
+                    pipe.expire(key, expiration)
+                with metrics.redis_operation("incr"):
+                    results = await pipe.execute()
+            return results[0]
+        except redis.exceptions.ConnectionError as e:
+            logger.error(f"Redis connection error: {e}")
+            raise HTTPException(status_code=503, detail="Temporary server issue. Please try again later.")
+        except Exception as e:
+            logger.error(f"Error incrementing {key}: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error saving session.")
+
+    async def replace_value(self, key, value) -> bool:
+        """Overwrites an existing key's value, keeping its remaining TTL; returns False if the key is gone."""
+        try:
+            if not self.client:
+                raise HTTPException(status_code=503, detail="Redis client is not available.")
+            with metrics.redis_operation("replace_value"):
+                return bool(await self.client.set(key, value, xx=True, keepttl=True))
+        except redis.exceptions.ConnectionError as e:
+            logger.error(f"Redis connection error: {e}")
+            raise HTTPException(status_code=503, detail="Temporary server issue. Please try again later.")
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error replacing {key}: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error saving session.")
+
+    async def set_if_absent(self, key, value, expiration=None) -> bool:
+        """Stores a value only if the key does not exist yet; returns True if it was stored."""
+        try:
+            if not self.client:
+                raise HTTPException(status_code=503, detail="Redis client is not available.")
+            with metrics.redis_operation("set_if_absent"):
+                return bool(await self.client.set(key, value, ex=expiration, nx=True))
+        except redis.exceptions.ConnectionError as e:
+            logger.error(f"Redis connection error: {e}")
+            raise HTTPException(status_code=503, detail="Temporary server issue. Please try again later.")
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error setting {key}: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error saving session.")
+
+    async def delete_if_value(self, key, value) -> bool:
+        """Deletes a key only while it still holds the given value (e.g. a lock owned by the caller)."""
+        expected = value.encode("utf-8") if isinstance(value, str) else value
+        try:
+            if not self.client:
+                raise HTTPException(status_code=503, detail="Redis client is not available.")
+            with metrics.redis_operation("delete_if_value"):
+                async with self.client.pipeline(transaction=True) as pipe:
+                    await pipe.watch(key)
+                    if await pipe.get(key) != expected:
+                        await pipe.unwatch()
+                        return False
+                    pipe.multi()
+                    pipe.delete(key)
+                    await pipe.execute()
+                    return True
+        except redis.exceptions.WatchError:
+            return False  # The key changed underneath us, so it is no longer ours
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error deleting {key}: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error deleting session.")
+
+    @staticmethod
+    def escape_pattern(value: str) -> str:
+        """Escapes glob metacharacters so a value only matches itself inside a SCAN pattern."""
+        return re.sub(r"([\\*?\[\]])", r"\\\1", value)
+
+    async def scan_keys(self, pattern) -> list:
+        """Returns the keys matching a glob pattern, iterating with SCAN so Redis is never blocked."""
+        try:
+            if not self.client:
+                raise HTTPException(status_code=503, detail="Redis client is not available.")
+            with metrics.redis_operation("scan"):
+                return [key.decode("utf-8") async for key in self.client.scan_iter(match=pattern, count=500)]
+        except HTTPException:
+            raise
+        except redis.RedisError as e:
+            logger.error(f"Error scanning {pattern}: {str(e)}")
+            raise HTTPException(status_code=503, detail="Error retrieving session data.")
+
+    async def delete_session(self, key):
         """Deletes session data from Redis for the specified key."""
         try:
             if not self.client:
                 raise HTTPException(status_code=503, detail="Redis client is not available.")
-            self.client.delete(key)
+            with metrics.redis_operation("delete"):
+                await self.client.delete(key)
             logger.info(f"Session for {key} deleted from Redis.")
         except Exception as e:
             logger.error(f"Error deleting session for {key}: {str(e)}")
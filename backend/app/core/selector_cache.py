@@ -0,0 +1,286 @@
+# app/core/selector_cache.py
+
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Tokens of an AgentQL query: braces, parenthesised descriptions and field names
+_QUERY_TOKEN_PATTERN = re.compile(r"\{|\}|\([^)]*\)|[A-Za-z_]\w*(?:\[\])?")
+
+# Derives a stable CSS selector and a text-independent signature for a resolved element
+_ELEMENT_SELECTOR_JS = """
+(el) => {
+    const isUnique = (selector) => {
+        try { return document.querySelectorAll(selector).length === 1; } catch (e) { return false; }
+    };
+    const tag = el.tagName.toLowerCase();
+    const signature = [tag, 'role', 'aria-label', 'placeholder', 'name', 'type']
+        .map((attr, i) => i === 0 ? attr : (el.getAttribute(attr) || ''))
+        .join('|');
+    if (el.id && isUnique('#' + CSS.escape(el.id))) {
+        return { selector: '#' + CSS.escape(el.id), signature };
+    }
+    for (const attr of ['aria-label', 'name', 'placeholder', 'title', 'data-testid']) {
+        const value = el.getAttribute(attr);
+        const selector = value && `${tag}[${attr}="${CSS.escape(value)}"]`;
+        if (selector && isUnique(selector)) return { selector, signature };
+    }
+    const parts = [];
+    for (let node = el; node && node.parentElement && node !== document.body; node = node.parentElement) {
+        const siblings = Array.from(node.parentElement.children).filter((c) => c.tagName === node.tagName);
+        const part = node.tagName.toLowerCase();
+        parts.unshift(siblings.length > 1 ? `${part}:nth-of-type(${siblings.indexOf(node) + 1})` : part);
+    }
+    return { selector: 'body > ' + parts.join(' > '), signature };
+}
+"""
+
+# Returns the signature of the single element a selector matches, or null if it is not unique
+_ELEMENT_SIGNATURE_JS = """
+(els) => {
+    if (els.length !== 1) return null;
+    const el = els[0];
+    return [el.tagName.toLowerCase(), 'role', 'aria-label', 'placeholder', 'name', 'type']
+        .map((attr, i) => i === 0 ? attr : (el.getAttribute(attr) || ''))
+        .join('|');
+}
+"""
+
+# Cheap description of the current page layout: route template plus a few structural counts
+_LAYOUT_FINGERPRINT_JS = """
+() => {
+    const known = new Set(['direct', 'inbox', 't', 'new', 'accounts', 'login', 'onetap', 'explore']);
+    const route = location.pathname.split('/').filter(Boolean)
+        .map((segment) => known.has(segment) ? segment : ':id').join('/');
+    const count = (selector) => document.querySelectorAll(selector).length;
+    return [
+        location.host,
+        route,
+        'dialogs=' + count('[role="dialog"]'),
+        'forms=' + count('form'),
+        'inputs=' + count('input, textarea, [contenteditable="true"]'),
+    ].join('|');
+}
+"""
+
+
+@lru_cache(maxsize=128)
+def parse_query_fields(query: str):
+    """
+    Parses an AgentQL query into a tree of field names.
+
+    Args:
+        query (str): The AgentQL query string.
+
+    Returns:
+        dict: Field names mapped to None for elements or to a nested dict for containers,
+        or None when the query uses list fields, which the cache does not support.
+    """
+    root = {}
+    stack = []
+    last_field = None
+    for token in _QUERY_TOKEN_PATTERN.findall(query):
+        if token.startswith("("):
+            continue
+        if token == "{":
+            if not stack:
+                stack.append(root)
+                continue
+            if last_field is None:
+                return None
+            container = {}
+            stack[-1][last_field] = container
+            stack.append(container)
+            last_field = None
+        elif token == "}":
+            stack.pop()
+            last_field = None
+        elif token.endswith("[]") or not stack:
+            return None
+        else:
+            stack[-1][token] = None
+            last_field = token
+    return root
+
+
+class CachedResponse:
+    """Attribute-access view over locators resolved locally from cached selectors."""
+
+    def __init__(self, fields: dict):
+        self._fields = fields
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["_fields"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class SelectorCache:
+    """
+    Learns the concrete selectors AgentQL resolves for each query on a given page layout,
+    so repeated queries can be answered locally instead of with a remote AgentQL round-trip.
+
+    Entries are kept in a bounded in-memory LRU and optionally shared through Redis, and
+    expire after the same TTL in both, so a layout change is re-learned even for entries
+    that keep verifying against the page. Cached selectors are verified against the live page before use; an entry whose
+    selectors no longer match is dropped and the query goes back to AgentQL.
+    """
+
+    REDIS_KEY_PREFIX = "agentql_selectors:"
+
+    def __init__(
+        self,
+        enabled: bool = Config.AGENTQL_SELECTOR_CACHE_ENABLED,
+        max_entries: int = Config.AGENTQL_SELECTOR_CACHE_MAX_ENTRIES,
+        ttl: int = Config.AGENTQL_SELECTOR_CACHE_TTL_SECONDS,
+        redis_helper=None,
+    ):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.redis_helper = redis_helper
+        self._entries = OrderedDict()  # key -> (monotonic expiry time, entry), least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.uncacheable = 0
+
+    async def lookup(self, page, query: str):
+        """
+        Resolves a query from cached selectors.
+
+        Args:
+            page: The (AgentQL-wrapped) Playwright page to resolve against.
+            query (str): The AgentQL query string.
+
+        Returns:
+            tuple: (CachedResponse or None, cache key or None). The key is passed to `store`
+            after a miss so the entry is recorded against the layout seen before the query.
+        """
+        fields = parse_query_fields(query)
+        if fields is None:
+            self.uncacheable += 1
+            return None, None
+
+        try:
+            fingerprint = await page.evaluate(_LAYOUT_FINGERPRINT_JS)
+            key = hashlib.sha1(f"{query}\n{fingerprint}".encode("utf-8")).hexdigest()
+            entry = await self._get_entry(key)
+            if entry is None:
+                self.misses += 1
+                return None, key
+
+            response = await self._resolve(page, fields, entry)
+            if response is None:
+                self.stale += 1
+                self.misses += 1
+                await self._delete_entry(key)
+                return None, key
+
+            self.hits += 1
+            return response, key
+        except Exception as e:
+            logger.warning(f"Selector cache lookup failed: {str(e)}")
+            self.misses += 1
+            return None, None
+
+    async def store(self, key: str, query: str, response):
+        """Records the selectors of every element in an AgentQL response under the given key."""
+        if not key:
+            return
+        try:
+            entry = await self._describe(parse_query_fields(query), response)
+            if entry is None:
+                self.uncacheable += 1
+                return
+            await self._set_entry(key, entry)
+        except Exception as e:
+            logger.warning(f"Selector cache store failed: {str(e)}")
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters for the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "uncacheable": self.uncacheable,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    async def _describe(self, fields: dict, response):
+        """Builds a cache entry from a response; returns None if any element is missing."""
+        entry = {}
+        for name, children in fields.items():
+            value = getattr(response, name, None)
+            if value is None:
+                return None
+            if children is None:
+                entry[name] = await value.evaluate(_ELEMENT_SELECTOR_JS)
+            else:
+                entry[name] = await self._describe(children, value)
+                if entry[name] is None:
+                    return None
+        return entry
+
+    async def _resolve(self, page, fields: dict, entry: dict):
+        """Rebuilds a response from cached selectors, or returns None if any fails to match."""
+        resolved = {}
+        for name, children in fields.items():
+            cached = entry.get(name)
+            if cached is None:
+                return None
+            if children is None:
+                locator = page.locator(cached["selector"])
+                if await locator.evaluate_all(_ELEMENT_SIGNATURE_JS) != cached["signature"]:
+                    return None
+                resolved[name] = locator
+            else:
+                resolved[name] = await self._resolve(page, children, cached)
+                if resolved[name] is None:
+                    return None
+        return CachedResponse(resolved)
+
+    async def _get_entry(self, key: str):
+        cached = self._entries.get(key)
+        if cached is not None:
+            expires_at, entry = cached
+            if time.monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                return entry
+            del self._entries[key]
+        if not self.redis_helper:
+            return None
+        raw = await self.redis_helper.get_session(f"{self.REDIS_KEY_PREFIX}{key}")
+        if not raw:
+            return None
+        entry = json.loads(raw)
+        self._remember(key, entry)
+        return entry
+
+    async def _set_entry(self, key: str, entry: dict):
+        self._remember(key, entry)
+        if self.redis_helper:
+            await self.redis_helper.set_session(f"{self.REDIS_KEY_PREFIX}{key}", json.dumps(entry), expiration=self.ttl)
+
+    async def _delete_entry(self, key: str):
+        self._entries.pop(key, None)
+        if self.redis_helper:
+            await self.redis_helper.delete_session(f"{self.REDIS_KEY_PREFIX}{key}")
+
+    def _remember(self, key: str, entry: dict):
+        self._entries[key] = (time.monotonic() + self.ttl, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
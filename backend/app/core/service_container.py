@@ -0,0 +1,133 @@
+# app/core/service_container.py
+
+import asyncio
+import logging
+
+from app.core import metrics, tracing
+from app.core.agentql_wrapper import AgentQLWrapper
+from app.core.browser_helper import BrowserHelper
+from app.core.browser_scheduler import BrowserScheduler
+from app.core.browser_workers import BrowserWorkerPool, WorkerLoginService, WorkerMessageService
+from app.core.config import Config
+from app.core.job_queue import InMemoryJobBackend, JobQueue, RedisStreamJobBackend
+from app.core.jwt_service import JWTService
+from app.core.login_service import LoginService
+from app.core.message_service import MessageService
+from app.core.recipient_cache import RecipientCache
+from app.core.redis_helper import RedisHelper
+from app.core.session_service import SessionService
+from app.core.token_service import TokenService
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    Owns the application-scoped service singletons, created once per process by the
+    FastAPI lifespan and handed out to routes through the dependencies in
+    `app/dependencies.py`.
+
+    The browser, its context pool and the asset cache are not held here: they stay
+    process-wide singletons on BrowserHelper, which the browser worker processes use
+    too. The container only drives their lifecycle, prewarming the browser in `startup`
+    and draining and closing it in `shutdown`.
+    """
+
+    def __init__(self):
+        self.redis_helper = RedisHelper()
+        self.session_service = SessionService(self.redis_helper)
+        self.token_service = TokenService()
+        self.jwt_service = JWTService(self.session_service)
+        self.recipient_cache = RecipientCache(self.redis_helper)
+        # One scheduler shared by both flows so the concurrency cap covers all browser work
+        self.browser_scheduler = BrowserScheduler()
+        self.worker_pool = None
+        if Config.BROWSER_WORKERS > 0:
+            # Browser flows run in worker processes, each scheduling its own share of accounts
+            self.worker_pool = BrowserWorkerPool(Config.BROWSER_WORKERS)
+            self.login_service = WorkerLoginService(self.session_service, self.jwt_service, self.worker_pool)
+            self.message_service = WorkerMessageService(
+                self.redis_helper, self.session_service, self.worker_pool, self.recipient_cache
+            )
+        else:
+            AgentQLWrapper.configure_selector_cache(self.redis_helper)
+            self.login_service = LoginService(self.session_service, self.jwt_service, self.browser_scheduler)
+            self.message_service = MessageService(
+                self.redis_helper, self.session_service, self.browser_scheduler, self.recipient_cache
+            )
+            BrowserHelper.register_metrics(self.browser_scheduler)
+        if Config.JOB_QUEUE_BACKEND == "redis" and self.redis_helper.client:
+            job_backend = RedisStreamJobBackend(self.redis_helper)
+        else:
+            if Config.JOB_QUEUE_BACKEND == "redis":
+                logger.warning("Redis is disabled; queued send-message jobs are kept in process memory")
+            job_backend = InMemoryJobBackend()
+        self.job_queue = JobQueue(job_backend, self.message_service)
+        self.is_draining = False
+        self._sweeper_task = None
+
+    async def startup(self):
+        """Launches Chromium (or the browser workers) ahead of the first request and starts the idle-context sweeper."""
+        tracing.configure()
+        if self.worker_pool:
+            await self.worker_pool.start()
+        elif Config.BROWSER_PREWARM:
+            try:
+                await BrowserHelper.initialize_playwright()
+                logger.info("Browser prewarmed at startup")
+            except Exception as e:
+                # Keep serving; /ready reports the browser as down until a flow launches it
+                logger.error(f"Failed to prewarm browser: {str(e)}")
+        self._sweeper_task = asyncio.create_task(self._sweep_idle_contexts())
+        await self.job_queue.start()
+
+    async def shutdown(self):
+        """Drains in-flight browser work, then closes the browser, its contexts and the Redis pool."""
+        self.is_draining = True
+        if self._sweeper_task:
+            self._sweeper_task.cancel()
+        await self.job_queue.stop(Config.SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+        if self.worker_pool:
+            await self.worker_pool.stop(Config.SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+        drained = await BrowserHelper.get_context_pool().drain(Config.SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+        if not drained:
+            logger.warning("Shutting down with browser contexts still in use")
+        await BrowserHelper.close_browser()
+        await RedisHelper.close_pool()
+        tracing.shutdown()
+        logger.info("Service container shut down")
+
+    async def readiness(self) -> dict:
+        """Reports whether the browser, Redis and context pool can take traffic."""
+        is_browser_ready = self.worker_pool.is_ready() if self.worker_pool else BrowserHelper.is_browser_ready()
+        is_redis_ready = await self.redis_helper.ping()
+        status = {
+            "ready": is_browser_ready and is_redis_ready and not self.is_draining,
+            "draining": self.is_draining,
+            "browser": {"ready": is_browser_ready},
+            "redis": {"ready": is_redis_ready},
+        }
+        if self.worker_pool:
+            status["workers"] = await self.worker_pool.stats()
+        else:
+            status["pool"] = BrowserHelper.get_context_pool().stats()
+            status["network"] = BrowserHelper.get_network_policy().stats()
+            status["asset_cache"] = BrowserHelper.get_asset_cache().stats()
+            status["scheduler"] = self.browser_scheduler.stats()
+        return status
+
+    async def metrics_text(self) -> str:
+        """Renders this process's metrics, and each browser worker's, in the Prometheus text format."""
+        families = metrics.REGISTRY.collect()
+        if self.worker_pool:
+            worker_families = await self.worker_pool.collect_metrics()
+            families = metrics.REGISTRY.merge({"api": families, **worker_families}, label="process")
+        return metrics.REGISTRY.render(families)
+
+    async def _sweep_idle_contexts(self):
+        while True:
+            await asyncio.sleep(Config.BROWSER_POOL_SWEEP_INTERVAL_SECONDS)
+            try:
+                await BrowserHelper.get_context_pool().sweep()
+            except Exception as e:
+                logger.warning(f"Idle context sweep failed: {str(e)}")
@@ -0,0 +1,106 @@
+# app/core/session_codec.py
+
+import base64
+import hashlib
+import json
+import os
+import zlib
+from urllib.parse import urlparse
+
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from app.core.config import Config
+
+# Leading byte of the current format; legacy Fernet tokens always start with "g" (0x67)
+FORMAT_V2 = b"\x02"
+NONCE_SIZE = 12
+
+
+def _matches_domain(host: str, domains) -> bool:
+    host = host.lstrip(".").lower()
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+def prune_storage_state(session_data, domains=None):
+    """
+    Drops cookies and origins the login and send flows never use from a Playwright storage state.
+
+    Args:
+        session_data: The value being stored; anything other than a storage state is returned as is.
+        domains (list): Domains whose cookies and origins are kept.
+
+    Returns:
+        The storage state restricted to the given domains.
+    """
+    if not isinstance(session_data, dict) or "cookies" not in session_data:
+        return session_data
+    domains = domains or Config.SESSION_COOKIE_DOMAINS
+    return {
+        "cookies": [
+            cookie for cookie in session_data.get("cookies", [])
+            if _matches_domain(cookie.get("domain", ""), domains)
+        ],
+        "origins": [
+            origin for origin in session_data.get("origins", [])
+            if _matches_domain(urlparse(origin.get("origin", "")).hostname or "", domains)
+        ],
+    }
+
+
+def cookie_digest(session_data, domains=None) -> str:
+    """
+    Fingerprints the cookies of a storage state that the flows depend on.
+
+    Args:
+        session_data: A Playwright storage state.
+        domains (list): Domains whose cookies are considered.
+
+    Returns:
+        str: A digest that changes whenever one of those cookies is added, removed or rotated.
+    """
+    cookies = prune_storage_state(session_data, domains).get("cookies", []) if isinstance(session_data, dict) else []
+    identity = sorted(
+        (cookie.get("name", ""), cookie.get("domain", ""), cookie.get("path", ""), cookie.get("value", ""), cookie.get("expires", -1))
+        for cookie in cookies
+    )
+    return hashlib.sha256(json.dumps(identity).encode("utf-8")).hexdigest()
+
+
+class SessionCodec:
+    """
+    Versioned encoding for stored sessions.
+
+    Format v2 is `0x02 | nonce | AES-256-GCM(zlib(compact JSON))`, stored as raw bytes.
+    The AES key is derived from ENCRYPTION_KEY with HKDF, so the same secret keeps
+    working. Legacy Fernet tokens (v1) are still decoded transparently.
+    """
+
+    def __init__(self, encryption_key):
+        self._fernet = Fernet(encryption_key)
+        key_material = base64.urlsafe_b64decode(encryption_key)
+        aes_key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=b"session-codec-v2").derive(key_material)
+        self._aead = AESGCM(aes_key)
+
+    def encode(self, session_data) -> bytes:
+        """Prunes, compresses and encrypts session data into the current binary format."""
+        payload = json.dumps(prune_storage_state(session_data), separators=(",", ":")).encode("utf-8")
+        compressed = zlib.compress(payload, Config.SESSION_COMPRESSION_LEVEL)
+        nonce = os.urandom(NONCE_SIZE)
+        return FORMAT_V2 + nonce + self._aead.encrypt(nonce, compressed, FORMAT_V2)
+
+    def decode(self, blob):
+        """Decrypts session data in either the current or the legacy Fernet format."""
+        if isinstance(blob, str):
+            blob = blob.encode("utf-8")
+        if blob[:1] == FORMAT_V2:
+            nonce = blob[1 : 1 + NONCE_SIZE]
+            compressed = self._aead.decrypt(nonce, blob[1 + NONCE_SIZE :], FORMAT_V2)
+            return json.loads(zlib.decompress(compressed))
+        return json.loads(self._fernet.decrypt(blob).decode("utf-8"))
+
+    def encode_legacy(self, session_data) -> bytes:
+        """Encodes session data in the legacy Fernet format (kept for benchmarks and migrations)."""
+        return self._fernet.encrypt(json.dumps(session_data).encode("utf-8"))
@@ -1,6 +1,10 @@
-import json
-from cryptography.fernet import Fernet
+import asyncio
+import copy
+import time
+from collections import OrderedDict
+from app.core.config import Config
 from app.core.redis_helper import RedisHelper
+from app.core.session_codec import SessionCodec, cookie_digest, prune_storage_state
 import os
 import logging
 from app.core.custom_exceptions import InvalidSessionError
@@ -8,55 +12,156 @@ from app.core.custom_exceptions import InvalidSessionError
 logger = logging.getLogger(__name__)
 ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")  # Ensure this is securely stored
 
-# Initialize RedisHelper and encryption for session management
-redis_helper = RedisHelper()
-fernet = Fernet(ENCRYPTION_KEY)
+# Initialize the encrypting codec for session management
+session_codec = SessionCodec(ENCRYPTION_KEY)
 
 class SessionService:
-    """Service to handle secure session storage and retrieval with encryption."""
+    """
+    Service to handle secure session storage and retrieval with encryption.
 
-    def __init__(self):
+    Decrypted sessions are kept in a bounded in-process LRU keyed by username. Every save
+    or delete bumps a per-session version key in Redis, so a worker only reuses its
+    cached copy while the version it was loaded at is still current. Callers get their own
+    copy of the cached state, so changing it never affects other callers.
+    """
+
+    def __init__(self, redis_helper: RedisHelper = None):
         if not ENCRYPTION_KEY:
             raise ValueError("ENCRYPTION_KEY must be set in environment variables")
+        self.redis_helper = redis_helper or RedisHelper()
+        self._cache = OrderedDict()  # username -> (version, expires_at, session_data)
+        self._deletion_listeners = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.write_backs = 0
+        self.write_backs_skipped = 0
 
-    def save_session(self, username: str, session_data: dict, ttl: int):
+    async def save_session(self, username: str, session_data: dict, ttl: int):
         """Encrypts and stores session data in Redis with a specified time-to-live (TTL)."""
         try:
-            encrypted_data = self.encrypt_session_data(session_data)
-            redis_helper.set_session(f"{username}_session", encrypted_data, expiration=ttl)
+            encrypted_data = await asyncio.to_thread(self.encrypt_session_data, session_data)
+            self._cache.pop(username, None)
+            await self.redis_helper.set_session(f"{username}_session", encrypted_data, expiration=ttl)
+            version = await self.redis_helper.incr(self._version_key(username), expiration=ttl)
+            # Cache what Redis holds (the codec prunes it), so every worker serves the same state
+            self._remember(username, version, prune_storage_state(session_data))
             logger.info(f"Session for {username} saved securely.")
         except Exception as e:
             logger.error(f"Failed to save session for {username}: {str(e)}")
             raise InvalidSessionError("Failed to save session")
 
-    def get_session(self, username: str) -> dict:
-        """Retrieves and decrypts session data for the given username."""
-        encrypted_data = redis_helper.get_session(f"{username}_session")
+    async def get_session(self, username: str) -> dict:
+        """Retrieves and decrypts session data for the given username, using the local cache when current."""
+        version = await self.redis_helper.get_session(self._version_key(username))
+        version = int(version) if version else None
+        cached = self._cache.get(username)
+        if cached and cached[0] == version and cached[1] > time.monotonic():
+            self._cache.move_to_end(username)
+            self.cache_hits += 1
+            return copy.deepcopy(cached[2])
+
+        self.cache_misses += 1
+        encrypted_data = await self.redis_helper.get_session(f"{username}_session")
         if not encrypted_data:
             logger.warning(f"Session not found for {username}")
             raise InvalidSessionError("Session not found. Please log in again.")
-        return self.decrypt_session_data(encrypted_data)
 
-    def delete_session(self, username: str):
+        if len(encrypted_data) > Config.SESSION_DECRYPT_OFFLOAD_BYTES:
+            # Large storage states take long enough to decrypt and parse to stall the event loop
+            session_data = await asyncio.to_thread(self.decrypt_session_data, encrypted_data)
+        else:
+            session_data = self.decrypt_session_data(encrypted_data)
+        self._remember(username, version, session_data)
+        return session_data
+
+    async def update_session_state(self, username: str, session_data: dict) -> bool:
+        """
+        Writes a browser context's refreshed storage state back over the stored session.
+
+        Only cookie changes trigger a write, and the session keeps its remaining TTL. A session
+        deleted in the meantime (e.g. by a logout) is not recreated.
+
+        Returns:
+            bool: True if the stored session was updated.
+        """
+        try:
+            stored_data = await self.get_session(username)
+        except InvalidSessionError:
+            return False
+        if cookie_digest(stored_data) == cookie_digest(session_data):
+            self.write_backs_skipped += 1
+            return False
+
+        encrypted_data = await asyncio.to_thread(self.encrypt_session_data, session_data)
+        self._cache.pop(username, None)
+        if not await self.redis_helper.replace_value(f"{username}_session", encrypted_data):
+            return False
+        version = await self.redis_helper.incr(self._version_key(username))  # INCR keeps the key's TTL
+        self._remember(username, version, prune_storage_state(session_data))
+        self.write_backs += 1
+        logger.info(f"Refreshed cookies written back to the session for {username}.")
+        return True
+
+    async def write_back_context(self, username: str, context):
+        """Best-effort `update_session_state` from a browser context at the end of a flow."""
+        try:
+            await self.update_session_state(username, await context.storage_state())
+        except Exception as e:
+            logger.warning(f"Failed to write back session for {username}: {str(e)}")
+
+    async def session_exists(self, username: str) -> bool:
+        """Checks whether a session is stored for the user without loading or decrypting it."""
+        return await self.redis_helper.exists(f"{username}_session")
+
+    def add_deletion_listener(self, listener):
+        """Registers a callback invoked with the username whenever a session is deleted."""
+        self._deletion_listeners.append(listener)
+
+    async def delete_session(self, username: str):
         """Removes session data for the given username from Redis."""
         try:
-            redis_helper.delete_session(f"{username}_session")
+            self._cache.pop(username, None)
+            for listener in self._deletion_listeners:
+                listener(username)
+            await self.redis_helper.delete_session(f"{username}_session")
+            # Invalidate other workers' copies; they expire on their own after SESSION_CACHE_TTL_SECONDS,
+            # so the version key does not need to outlive them
+            await self.redis_helper.incr(self._version_key(username), expiration=Config.SESSION_CACHE_TTL_SECONDS)
             logger.info(f"Session for {username} deleted from Redis.")
         except Exception as e:
             logger.error(f"Failed to delete session for {username}: {str(e)}")
             raise InvalidSessionError("Failed to delete session")
 
     def encrypt_session_data(self, session_data: dict) -> bytes:
-        """Encrypts session data to secure sensitive information."""
-        json_data = json.dumps(session_data).encode("utf-8")
-        return fernet.encrypt(json_data)
+        """Encrypts session data to secure sensitive information, using the compact binary codec."""
+        return session_codec.encode(session_data)
 
     @staticmethod
     def decrypt_session_data(encrypted_data: bytes) -> dict:
-        """Decrypts session data, converting it back to a dictionary."""
-        decrypted_data = fernet.decrypt(encrypted_data)
-        return json.loads(decrypted_data.decode("utf-8"))
+        """Decrypts session data in the current or legacy format, converting it back to a dictionary."""
+        return session_codec.decode(encrypted_data)
     
-    def get_session_state(self, username: str):
+    async def get_session_state(self, username: str):
         """Retrieves the current session state for a user."""
-        return self.get_session(username)
+        return await self.get_session(username)
+
+    def cache_stats(self) -> dict:
+        """Returns size and hit/miss counters of the decrypted-session cache, plus cookie write-back counts."""
+        return {
+            "entries": len(self._cache),
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "write_backs": self.write_backs,
+            "write_backs_skipped": self.write_backs_skipped,
+        }
+
+    @staticmethod
+    def _version_key(username: str) -> str:
+        return f"{username}_session_version"
+
+    def _remember(self, username: str, version, session_data):
+        expires_at = time.monotonic() + Config.SESSION_CACHE_TTL_SECONDS
+        self._cache[username] = (version, expires_at, copy.deepcopy(session_data))
+        self._cache.move_to_end(username)
+        while len(self._cache) > Config.SESSION_CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
@@ -0,0 +1,78 @@
+# app/core/text_entry.py
+
+import asyncio
+import logging
+import random
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Per-key delay range (seconds) of human-like typing, before HUMAN_DELAY_SCALE
+KEY_DELAY_RANGE = (0.05, 0.15)
+
+
+class TextEntry:
+    """
+    Types text into page elements using one of several strategies, trading driver
+    round-trips against how closely the keystrokes resemble a person typing.
+
+    - per_char: one `type` call and one Python sleep per character (a round-trip per key).
+    - keyboard: a single `type` call; the per-key delay is applied inside the driver.
+    - chunked: `type` calls of a few words each, with a human pause between chunks.
+    - fill: sets the value at once; for fields where keystroke timing does not matter.
+    """
+
+    STRATEGIES = ("per_char", "keyboard", "chunked", "fill")
+
+    @staticmethod
+    def strategy_for(field: str = None) -> str:
+        """Returns the configured strategy for an input field, falling back to the default."""
+        strategies = Config.TEXT_ENTRY_STRATEGIES
+        strategy = strategies.get(field) or strategies.get("default", "keyboard")
+        if strategy not in TextEntry.STRATEGIES:
+            logger.warning(f"Unknown text entry strategy '{strategy}' for field {field}, using keyboard")
+            return "keyboard"
+        return strategy
+
+    @staticmethod
+    async def enter(element, text: str, strategy: str = "keyboard"):
+        """
+        Enters text into an element.
+
+        Args:
+            element: The Playwright locator or element handle to type into.
+            text (str): The text to enter.
+            strategy (str): One of `TextEntry.STRATEGIES`.
+        """
+        if strategy == "fill":
+            await element.fill(text)
+        elif strategy == "per_char":
+            for char in text:
+                await element.type(char)
+                await asyncio.sleep(TextEntry._key_delay())
+        elif strategy == "chunked":
+            for chunk in TextEntry.chunks(text, Config.TEXT_ENTRY_CHUNK_SIZE):
+                await element.type(chunk, delay=TextEntry._key_delay() * 1000)
+                await asyncio.sleep(random.uniform(0.2, 0.6) * Config.HUMAN_DELAY_SCALE)  # Pause between bursts
+        else:
+            await element.type(text, delay=TextEntry._key_delay() * 1000)
+
+    @staticmethod
+    def chunks(text: str, size: int) -> list:
+        """Splits text into chunks of about `size` characters, breaking after spaces where possible."""
+        chunks = []
+        start = 0
+        while start < len(text):
+            end = min(len(text), start + max(1, size))
+            if end < len(text):
+                space = text.rfind(" ", start, end)
+                if space > start:
+                    end = space + 1
+            chunks.append(text[start:end])
+            start = end
+        return chunks
+
+    @staticmethod
+    def _key_delay() -> float:
+        return random.uniform(*KEY_DELAY_RANGE) * Config.HUMAN_DELAY_SCALE
@@ -0,0 +1,146 @@
+"""
+Summarizes span files written by app/core/tracing.py into slowest-step and per-step latency tables.
+
+Usage (from the backend directory):
+    python -m app.core.trace_summary [FILE ...] [--flow send_message] [--top 20]
+
+Without FILE arguments it reads TRACING_FILE, its rotated copies and the browser workers'
+span files. Spans nest (a context_acquire step contains its context_create step), so a
+step's share of its flow's time is not additive across nested steps.
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+from collections import defaultdict
+
+from app.core.config import Config
+
+# Span kinds that are units of work inside a flow, as opposed to requests and flows themselves
+STEP_KINDS = ("step", "agentql", "redis")
+
+
+def default_files() -> list:
+    root, extension = os.path.splitext(Config.TRACING_FILE)
+    return sorted(glob.glob(f"{root}{extension}*") + glob.glob(f"{root}.worker*{extension}*"))
+
+
+def load_spans(paths: list) -> list:
+    spans = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as span_file:
+            for line in span_file:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue  # A line cut short by a crash or a rotation in progress
+    return spans
+
+
+def assign_flows(spans: list):
+    """Tags every span with the name of the flow span it runs under, or None."""
+    by_id = {span["span_id"]: span for span in spans}
+    for span in spans:
+        node, flow = span, None
+        for _ in range(64):  # Guards against cycles from colliding span ids
+            if node["kind"] == "flow":
+                flow = node["name"]
+                break
+            node = by_id.get(node["parent_id"])
+            if node is None:
+                break
+        span["flow"] = flow
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def slowest_steps(spans: list, top: int) -> list:
+    steps = [span for span in spans if span["kind"] in STEP_KINDS]
+    return sorted(steps, key=lambda span: span["duration_ms"], reverse=True)[:top]
+
+
+def step_breakdown(spans: list) -> list:
+    """Latency distribution of each (flow, kind, step) and its share of the flow's total time."""
+    flow_totals = defaultdict(float)
+    durations = defaultdict(list)
+    errors = defaultdict(int)
+    for span in spans:
+        if span["kind"] == "flow":
+            flow_totals[span["name"]] += span["duration_ms"]
+        elif span["kind"] in STEP_KINDS:
+            key = (span["flow"] or "-", span["kind"], span["name"])
+            durations[key].append(span["duration_ms"])
+            errors[key] += span["outcome"] != "ok"
+
+    rows = []
+    for (flow, kind, name), values in durations.items():
+        values.sort()
+        total = sum(values)
+        flow_total = flow_totals.get(flow)
+        rows.append({
+            "flow": flow,
+            "kind": kind,
+            "step": name,
+            "count": len(values),
+            "errors": errors[(flow, kind, name)],
+            "p50_ms": round(percentile(values, 0.50), 1),
+            "p95_ms": round(percentile(values, 0.95), 1),
+            "max_ms": round(values[-1], 1),
+            "total_ms": round(total, 1),
+            "flow_share": round(total / flow_total, 3) if flow_total else None,
+        })
+    return sorted(rows, key=lambda row: (row["flow"], -row["total_ms"]))
+
+
+def print_slowest(steps: list):
+    print(f"{'ms':>10}  {'kind':<8}{'step':<44}{'flow':<16}{'outcome':<9}trace")
+    for span in steps:
+        print(
+            f"{span['duration_ms']:>10.1f}  {span['kind']:<8}{span['name'][:43]:<44}"
+            f"{(span['flow'] or '-'):<16}{span['outcome']:<9}{span['trace_id']}"
+        )
+
+
+def print_breakdown(rows: list):
+    print(f"{'flow':<16}{'kind':<8}{'step':<44}{'count':>7}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'share':>8}")
+    for row in rows:
+        share = f"{row['flow_share']:.1%}" if row["flow_share"] is not None else "-"
+        print(
+            f"{row['flow']:<16}{row['kind']:<8}{row['step'][:43]:<44}{row['count']:>7}{row['errors']:>6}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['max_ms']:>10}{share:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="span files (default: TRACING_FILE and its rotations)")
+    parser.add_argument("--flow", help="only include steps of this flow, e.g. login or send_message")
+    parser.add_argument("--top", type=int, default=20, help="number of slowest steps to list")
+    args = parser.parse_args()
+
+    paths = args.files or default_files()
+    spans = load_spans(paths)
+    assign_flows(spans)
+    if args.flow:
+        spans = [span for span in spans if span["flow"] == args.flow]
+    if not spans:
+        print(f"No spans found in {', '.join(paths) or Config.TRACING_FILE}")
+        return
+
+    traces = len({span["trace_id"] for span in spans})
+    print(f"{len(spans)} spans from {traces} traces in {len(paths)} files\n")
+    print(f"Slowest {args.top} steps")
+    print_slowest(slowest_steps(spans, args.top))
+    print("\nPer-step latency")
+    print_breakdown(step_breakdown(spans))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# app/core/tracing.py
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+import uuid
+from contextlib import contextmanager
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Spans go through their own logger so they never mix with (or propagate to) application logs
+_span_logger = logging.getLogger("app.tracing.spans")
+_span_logger.propagate = False
+_span_logger.setLevel(logging.INFO)
+
+# The innermost open span of the current task; _NOT_SAMPLED marks a trace that is not recorded
+_current_span = contextvars.ContextVar("current_span", default=None)
+_NOT_SAMPLED = object()
+
+_listener = None
+_queue_handler = None
+
+
+class Span:
+    """One timed unit of work (request, flow, step, AgentQL call, Redis operation) in a trace."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "attributes", "outcome", "error")
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: str = None, attributes: dict = None):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.outcome = "ok"
+        self.error = None
+
+    def set_attribute(self, name: str, value):
+        self.attributes[name] = value
+
+
+class _SpanQueueHandler(logging.handlers.QueueHandler):
+    """Hands span records to the writer thread untouched, dropping them when its queue is full."""
+
+    def __init__(self, span_queue):
+        super().__init__(span_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record  # Serialized by the writer thread, not by the traced task
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1  # Never block a browser flow on trace export
+
+
+class _JsonLineFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.msg, separators=(",", ":"), default=str)
+
+
+def configure(
+    path: str = Config.TRACING_FILE,
+    enabled: bool = Config.TRACING_ENABLED,
+    max_bytes: int = Config.TRACING_MAX_BYTES,
+    backup_count: int = Config.TRACING_BACKUP_COUNT,
+):
+    """
+    Starts exporting spans to a rotating JSONL file through a background writer thread.
+
+    Args:
+        path (str): The span file; rotated files get a numeric suffix (spans.jsonl.1, ...).
+        enabled (bool): When False, spans are not recorded at all.
+        max_bytes (int): Size at which the file is rotated.
+        backup_count (int): Number of rotated files kept.
+    """
+    global _listener, _queue_handler
+    shutdown()
+    if not enabled:
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+    file_handler.setFormatter(_JsonLineFormatter())
+    span_queue = queue.Queue(maxsize=Config.TRACING_QUEUE_SIZE)
+    _queue_handler = _SpanQueueHandler(span_queue)
+    _span_logger.addHandler(_queue_handler)
+    _listener = logging.handlers.QueueListener(span_queue, file_handler)
+    _listener.start()
+    logger.info(f"Tracing spans to {path}")
+
+
+def shutdown():
+    """Flushes queued spans to disk and stops the writer thread."""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _span_logger.removeHandler(_queue_handler)
+    _listener.stop()  # Writes out everything still queued
+    for handler in _listener.handlers:
+        handler.close()
+    if _queue_handler.dropped:
+        logger.warning(f"Dropped {_queue_handler.dropped} spans because the trace writer fell behind")
+    _listener = None
+    _queue_handler = None
+
+
+def is_enabled() -> bool:
+    return _listener is not None
+
+
+def worker_trace_file(index: int) -> str:
+    """Span file of a browser worker process, next to the API's (rotating files cannot be shared)."""
+    root, extension = os.path.splitext(Config.TRACING_FILE)
+    return f"{root}.worker{index}{extension}"
+
+
+@contextmanager
+def span(name: str, kind: str = "step", **attributes):
+    """
+    Records the block as a span, nested under the current task's open span.
+
+    A span without a parent starts a new trace, which is recorded with probability
+    TRACING_SAMPLE_RATE; every span under it follows that decision.
+
+    Yields:
+        Span: The open span, or None when tracing is off or the trace is not sampled.
+    """
+    if _listener is None:
+        yield None
+        return
+    parent = _current_span.get()
+    if parent is _NOT_SAMPLED or (parent is None and random.random() >= Config.TRACING_SAMPLE_RATE):
+        token = _current_span.set(_NOT_SAMPLED)
+        try:
+            yield None
+        finally:
+            _current_span.reset(token)
+        return
+
+    current = Span(
+        name,
+        kind,
+        trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+        parent_id=parent.span_id if parent else None,
+        attributes=attributes,
+    )
+    token = _current_span.set(current)
+    started_at = time.time()
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.outcome = "error"
+        current.error = f"{type(e).__name__}: {getattr(e, 'detail', e)}"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        _current_span.reset(token)
+        _span_logger.info({
+            "trace_id": current.trace_id,
+            "span_id": current.span_id,
+            "parent_id": current.parent_id,
+            "name": current.name,
+            "kind": current.kind,
+            "start": round(started_at, 6),
+            "duration_ms": round(duration * 1000, 3),
+            "outcome": current.outcome,
+            "error": current.error,
+            "attributes": current.attributes,
+            "pid": os.getpid(),
+        })
+
+
+def current_context():
+    """Returns the current trace and span ids, to continue the trace in another process."""
+    current = _current_span.get()
+    if current is None or current is _NOT_SAMPLED:
+        return None
+    return current.trace_id, current.span_id
+
+
+@contextmanager
+def continue_trace(context):
+    """Makes spans opened in the block children of a span from another process (see `current_context`)."""
+    if context is None:
+        yield
+        return
+    trace_id, span_id = context
+    remote_parent = Span("remote", "remote", trace_id=trace_id)
+    remote_parent.span_id = span_id
+    token = _current_span.set(remote_parent)
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
@@ -1,39 +1,66 @@
-from fastapi import Depends
+import logging
+
+from fastapi import Depends, Request
 from app.core.session_service import SessionService
 from app.core.token_service import TokenService
 from app.core.redis_helper import RedisHelper
 from app.core.jwt_service import JWTService
 from app.core.login_service import LoginService
 from app.core.message_service import MessageService
+from app.core.job_queue import JobQueue
+from app.core.recipient_cache import RecipientCache
+from app.core.service_container import ServiceContainer
+from app.core.custom_exceptions import ServiceDrainingError
+
+logger = logging.getLogger(__name__)
+
+# Dependency functions that hand out the application-scoped service instances
+
+def get_container(request: Request) -> ServiceContainer:
+    """Provides the service container created by the application lifespan."""
+    container = getattr(request.app.state, "container", None)
+    if container is None:
+        # The app is being served without its lifespan (e.g. a bare TestClient)
+        logger.warning(
+            "No service container from the application lifespan; using one that was never started "
+            "(no browser prewarm, job workers or idle-context sweeper, and nothing is closed on exit)"
+        )
+        container = request.app.state.container = ServiceContainer()
+    return container
+
+def get_session_service(container: ServiceContainer = Depends(get_container)) -> SessionService:
+    """Provides the shared SessionService."""
+    return container.session_service
+
+def get_token_service(container: ServiceContainer = Depends(get_container)) -> TokenService:
+    """Provides the shared TokenService."""
+    return container.token_service
+
+def get_redis_helper(container: ServiceContainer = Depends(get_container)) -> RedisHelper:
+    """Provides the shared RedisHelper backed by the process-wide connection pool."""
+    return container.redis_helper
+
+def get_jwt_service(container: ServiceContainer = Depends(get_container)) -> JWTService:
+    """Provides the shared JWTService with session management."""
+    return container.jwt_service
+
+def get_login_service(container: ServiceContainer = Depends(get_container)) -> LoginService:
+    """Provides the shared LoginService with session and JWT support."""
+    return container.login_service
+
+def get_message_service(container: ServiceContainer = Depends(get_container)) -> MessageService:
+    """Provides the shared MessageService with Redis and session support."""
+    return container.message_service
+
+def get_job_queue(container: ServiceContainer = Depends(get_container)) -> JobQueue:
+    """Provides the shared send-message JobQueue."""
+    return container.job_queue
+
+def get_recipient_cache(container: ServiceContainer = Depends(get_container)) -> RecipientCache:
+    """Provides the shared per-recipient thread and unreachable-recipient cache."""
+    return container.recipient_cache
 
-# Dependency functions to initialize and manage service instances for injection
-
-def get_session_service():
-    """Creates and provides an instance of SessionService."""
-    return SessionService()
-
-def get_token_service():
-    """Creates and provides an instance of TokenService."""
-    return TokenService()
-
-def get_redis_helper():
-    """Creates and provides an instance of RedisHelper for managing Redis operations."""
-    return RedisHelper()
-
-def get_jwt_service(session_service: SessionService = Depends(get_session_service)):
-    """Creates and provides an instance of JWTService with session management."""
-    return JWTService(session_service)
-
-def get_login_service(
-    session_service: SessionService = Depends(get_session_service),
-    jwt_service: JWTService = Depends(get_jwt_service),
-):
-    """Creates and provides an instance of LoginService with session and JWT support."""
-    return LoginService(session_service, jwt_service)
-
-def get_message_service(
-    redis_helper: RedisHelper = Depends(get_redis_helper),
-    session_service: SessionService = Depends(get_session_service)
-):
-    """Creates and provides an instance of MessageService with Redis and session support."""
-    return MessageService(redis_helper, session_service)
+def reject_while_draining(container: ServiceContainer = Depends(get_container)):
+    """Rejects requests that would start a browser flow once shutdown has begun draining."""
+    if container.is_draining:
+        raise ServiceDrainingError()
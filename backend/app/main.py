@@ -1,10 +1,27 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 # Importing routers for authentication and messaging routes
-from app.routers import auth, messages
+from app.routers import auth, health, jobs, messages, metrics
+from app.core import tracing
+from app.core.service_container import ServiceContainer
+
+# Probe and scrape endpoints are polled constantly and would drown out real traces
+UNTRACED_PATHS = {"/health", "/ready", "/metrics"}
+
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Creates the application-scoped services once and releases them on shutdown."""
+    app.state.container = ServiceContainer()
+    await app.state.container.startup()
+    yield
+    await app.state.container.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Configuring CORS settings to allow unrestricted access for development
 app.add_middleware(
@@ -15,6 +32,20 @@ app.add_middleware(
     allow_headers=["*"]         # Allow all headers
 )
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Opens the root span of each request's trace; flow, step and AgentQL spans nest under it."""
+    if request.url.path in UNTRACED_PATHS:
+        return await call_next(request)
+    with tracing.span(f"{request.method} {request.url.path}", "request") as request_span:
+        response = await call_next(request)
+        if request_span:
+            request_span.set_attribute("status_code", response.status_code)
+        return response
+
 # Including routers for authentication and messaging functionality
+app.include_router(health.router)
 app.include_router(auth.router)
 app.include_router(messages.router)
+app.include_router(jobs.router)
+app.include_router(metrics.router)
@@ -3,3 +3,4 @@ from pydantic import BaseModel
 class LoginRequest(BaseModel):
     username: str
     password: str
+    force: bool = False  # Always run a full browser login, even with a valid stored session
@@ -12,3 +12,4 @@ class MessageLoginRequest(BaseModel):
     password: str
     recipient: str
     message: str
+    force: bool = False  # Always run a full browser login, even with a valid stored session
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends, Header  
 from app.core.login_service import LoginService
 from app.models.auth_models import LoginRequest
-from app.dependencies import get_login_service, get_jwt_service
+from app.dependencies import get_login_service, get_jwt_service, reject_while_draining
 from app.core.jwt_service import JWTService
 from pydantic import BaseModel
 from app.models.token_models import RefreshTokenRequest, TokenRequest
@@ -11,11 +11,11 @@ from jwt.exceptions import InvalidTokenError
 
 router = APIRouter()
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(reject_while_draining)])
 async def login(request: LoginRequest, login_service: LoginService = Depends(get_login_service)):
     """Authenticates the user and returns access and refresh tokens on success."""
     try:
-        access_token, refresh_token = await login_service.login(request.username, request.password)
+        access_token, refresh_token = await login_service.login(request.username, request.password, force=request.force)
         data = {"access_token": access_token, "refresh_token": refresh_token, "username": request.username}
         return {"status": "success", "message": "Login successful", "data": data}
     except HTTPException as e:
@@ -40,7 +40,7 @@ async def logout(
     """Logs out the user by validating the token and clearing the session."""
     try:
         token = authorization.split(" ")[1]  # Extract Bearer token
-        username = jwt_service.validate_token(token)  # Validate the token
+        username = await jwt_service.validate_token(token)  # Validate the token
         result = await login_service.logout(username)  # Logout logic in LoginService
         return {"status": "success", "message": "Logged out successfully", "data": result}
     except HTTPException as e:
@@ -0,0 +1,20 @@
+# app/routers/health.py
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from app.core.service_container import ServiceContainer
+from app.dependencies import get_container
+
+router = APIRouter()
+
+@router.get("/health")
+async def health():
+    """Liveness probe: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def ready(container: ServiceContainer = Depends(get_container)):
+    """Readiness probe: reports browser, Redis and pool status; 503 until the instance is warm."""
+    status = await container.readiness()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content={"status": "not_ready", "data": status})
+    return {"status": "ready", "data": status}
@@ -0,0 +1,27 @@
+# app/routers/jobs.py
+from fastapi import APIRouter, HTTPException, Header, Depends
+from app.core.job_queue import JobQueue
+from app.core.jwt_service import JWTService
+from app.dependencies import get_job_queue, get_jwt_service
+
+router = APIRouter()
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    authorization: str = Header(...),
+    job_queue: JobQueue = Depends(get_job_queue),
+    jwt_service: JWTService = Depends(get_jwt_service),
+):
+    """Reports the status and timings of a queued send-message job owned by the caller."""
+    try:
+        token = authorization.split(" ")[1]
+        username = await jwt_service.validate_token(token)
+        job = await job_queue.get(job_id)
+        if not job or job["username"] != username:
+            raise HTTPException(status_code=404, detail="Job not found.")
+        return {"status": "success", "message": f"Job is {job['status']}", "data": job}
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
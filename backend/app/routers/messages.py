@@ -1,24 +1,34 @@
 # app/routers/message_router.py
-from fastapi import APIRouter, HTTPException, Header, Depends
+from fastapi import APIRouter, HTTPException, Header, Depends, Query, Response
 from app.models.request_models import MessageRequest, MessageLoginRequest  # Import the refactored models
+from app.core.job_queue import JobQueue
 from app.core.message_service import MessageService
-from app.dependencies import get_message_service, get_jwt_service, get_login_service
+from app.core.recipient_cache import RecipientCache
+from app.dependencies import get_message_service, get_jwt_service, get_login_service, get_job_queue, get_recipient_cache, reject_while_draining
 from app.core.jwt_service import JWTService
 from app.core.login_service import LoginService
 
 router = APIRouter()
 
-@router.post("/send-message")
+@router.post("/send-message", dependencies=[Depends(reject_while_draining)])
 async def send_message(
     request: MessageRequest, 
+    response: Response,
     authorization: str = Header(...), 
+    async_job: bool = Query(False, description="Queue the send and return a job id instead of waiting"),
     message_service: MessageService = Depends(get_message_service),
-    jwt_service: JWTService = Depends(get_jwt_service)
+    jwt_service: JWTService = Depends(get_jwt_service),
+    job_queue: JobQueue = Depends(get_job_queue),
 ):
-    """Sends a message to a recipient after validating the user's token."""
+    """Sends a message to a recipient after validating the user's token, or queues it as a job."""
     try:
         token = authorization.split(" ")[1]
-        username = jwt_service.validate_token(token)  # Validate token for user identification
+        username = await jwt_service.validate_token(token)  # Validate token for user identification
+        if async_job:
+            job = await job_queue.submit(username, request.recipient, request.message)
+            response.status_code = 202
+            data = {"job_id": job["id"], "status": job["status"]}
+            return {"status": "accepted", "message": "Message queued", "data": data}
         result = await message_service.send_message(request.recipient, request.message, username)
         if result == "success":
             return {"status": "success", "message": "Message sent", "data": result}
@@ -27,7 +37,7 @@ async def send_message(
     except Exception as e:
         raise HTTPException(status_code=500, detail="Message sending failed, try again later")
 
-@router.post("/login-send-message")
+@router.post("/login-send-message", dependencies=[Depends(reject_while_draining)])
 async def login_and_send_message(
     request: MessageLoginRequest, 
     login_service: LoginService = Depends(get_login_service),
@@ -36,7 +46,7 @@ async def login_and_send_message(
     """Logs in the user, then sends a message to the specified recipient."""
     try:
         # Login to obtain access and refresh tokens
-        access_token, refresh_token = await login_service.login(request.username, request.password)
+        access_token, refresh_token = await login_service.login(request.username, request.password, force=request.force)
 
         # Send the message on successful login
         result = await message_service.send_message(request.recipient, request.message, request.username)
@@ -56,3 +66,38 @@ async def login_and_send_message(
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+@router.get("/unreachable-recipients")
+async def list_unreachable_recipients(
+    authorization: str = Header(...),
+    recipient_cache: RecipientCache = Depends(get_recipient_cache),
+    jwt_service: JWTService = Depends(get_jwt_service),
+):
+    """Lists the caller's recipients cached as unreachable (no account, or invite pending) and when they expire."""
+    try:
+        token = authorization.split(" ")[1]
+        username = await jwt_service.validate_token(token)
+        entries = await recipient_cache.list_unreachable(username)
+        return {"status": "success", "message": f"{len(entries)} unreachable recipients cached", "data": entries}
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.delete("/unreachable-recipients")
+async def clear_unreachable_recipients(
+    authorization: str = Header(...),
+    recipient: str = Query(None, description="Only clear this recipient; clears all when omitted"),
+    recipient_cache: RecipientCache = Depends(get_recipient_cache),
+    jwt_service: JWTService = Depends(get_jwt_service),
+):
+    """Clears cached unreachable recipients of the caller, so the next send retries in the browser."""
+    try:
+        token = authorization.split(" ")[1]
+        username = await jwt_service.validate_token(token)
+        cleared = await recipient_cache.clear_unreachable(username, recipient)
+        return {"status": "success", "message": f"Cleared {cleared} cached recipients", "data": {"cleared": cleared}}
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
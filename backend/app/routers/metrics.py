@@ -0,0 +1,17 @@
+# app/routers/metrics.py
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.core.config import Config
+from app.core.service_container import ServiceContainer
+from app.dependencies import get_container
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(container: ServiceContainer = Depends(get_container)):
+    """Prometheus scrape endpoint: per-step browser flow latency, AgentQL, Redis and pool metrics."""
+    if not Config.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(await container.metrics_text(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,91 @@
+"""
+Local stand-in for AgentQL used by the flow benchmark.
+
+Each field name used by the query constants in LoginService and MessageService is mapped
+to a CSS selector for the HTML fixtures in benchmarks/fixtures, so queries resolve to real
+Playwright locators without calling the AgentQL service. A fixed latency can be added per
+call to model the remote round-trip.
+"""
+
+import asyncio
+
+from app.core.selector_cache import parse_query_fields
+
+# Field name -> selector on the fixture pages; a field that matches nothing resolves to None
+FIELD_SELECTORS = {
+    # LoginService.LOGIN_QUERY
+    "login_indicator": "button:has-text('Log In')",
+    "signup_indicator": "a:has-text('Sign Up')",
+    "login_form": "#loginForm",
+    "username_input": "input[name='username']",
+    "password_input": "input[name='password']",
+    "login_button": "button[type='submit']",
+    "error_message": "#slfErrorAlert:visible",
+    # LoginService.POST_LOGIN_QUERY and SAVE_INFO_PROMPT_QUERY
+    "home_button": "[aria-label='Home']",
+    "messages_button": "[aria-label='Messages']",
+    "save_info_button": "button:has-text('Save info')",
+    "not_now_button": "[role='button']:has-text('Not now')",
+    # MessageService queries
+    "notification_prompt": "[role='dialog']:has-text('Turn on Notifications')",
+    "not_now_btn": "[role='dialog'] :text-is('Not Now')",
+    "send_button": "[aria-label='Send message']:visible, [aria-label='Send']:visible",
+    "recipient_input": "input[placeholder='Search...']:visible",
+    "no_account_message": "text=No account found.",
+    "chat_suggestion": "#results [role='button']",
+    "chat_button": "#chatButton:visible",
+    "invite_sent_message": "text=Invite sent",
+    "message_box": "[aria-label='Message...']",
+}
+
+
+class StubResponse:
+    """Attribute-access response shaped like AgentQL's, holding locators or None."""
+
+    def __init__(self, fields: dict):
+        self.__dict__.update(fields)
+
+
+class StubAgentQL:
+    """Resolves AgentQL queries against the fixture pages and counts the calls it served."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    async def wrap_async(self, page):
+        """Drop-in for agentql.wrap_async: attaches `query_elements` to the page itself."""
+
+        async def query_elements(query: str):
+            return await self.query_elements(page, query)
+
+        page.query_elements = query_elements
+        return page
+
+    async def query_elements(self, page, query: str):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        fields = parse_query_fields(query)
+        if fields is None:
+            raise ValueError(f"Unsupported query for the AgentQL stub: {query}")
+        return await self._resolve(page, fields)
+
+    async def _resolve(self, page, fields: dict):
+        resolved = {}
+        for name, children in fields.items():
+            selector = FIELD_SELECTORS.get(name)
+            if selector is None:
+                raise KeyError(f"No fixture selector for AgentQL field '{name}'")
+            locator = page.locator(selector).first
+            try:
+                is_present = await locator.count() > 0
+            except Exception:
+                is_present = False  # The page navigated away mid-query, as AgentQL would see nothing
+            if not is_present:
+                resolved[name] = None
+            elif children is None:
+                resolved[name] = locator
+            else:
+                resolved[name] = await self._resolve(page, children)
+        return StubResponse(resolved)
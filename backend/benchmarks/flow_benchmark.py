@@ -0,0 +1,227 @@
+"""
+End-to-end latency and throughput benchmark for LoginService.login and MessageService.send_message.
+
+The real flows run in Chromium against local HTML fixtures that mimic Instagram's login,
+inbox and thread pages (benchmarks/fixtures). AgentQL is replaced by a local stub that
+resolves the query constants against those fixtures, Redis by fakeredis, and human-like
+pauses are scaled down. Nothing leaves the machine, so results are comparable run to run.
+
+Usage (from the backend directory, after `playwright install chromium`):
+    python -m benchmarks.flow_benchmark [--concurrency 1 4 8] [--requests 16]
+        [--delay-scale 0.01] [--agentql-latency-ms 150] [--output results.json]
+        [--baseline previous.json --tolerance 0.25]
+
+With --baseline the run exits non-zero when any scenario's p95 latency is more than
+--tolerance (a fraction) above the baseline's, so it can gate changes offline.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from app.core.agentql_wrapper import AgentQLWrapper
+from app.core.browser_helper import BrowserHelper
+from app.core.browser_scheduler import BrowserScheduler
+from app.core.config import Config
+from app.core.jwt_service import JWTService
+from app.core.login_service import LoginService
+from app.core.message_service import MessageService
+from app.core.redis_helper import RedisHelper
+from app.core.session_service import SessionService
+from benchmarks.agentql_stub import StubAgentQL
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+PASSWORD = "benchmark-password"
+
+
+def load_fixtures() -> dict:
+    return {path.name: path.read_bytes() for path in FIXTURES_DIR.glob("*.html")}
+
+
+def fixture_for(path: str, is_logged_in: bool) -> str:
+    """Maps an instagram.com path to the fixture page that stands in for it."""
+    if path.startswith("/direct/t/"):
+        return "thread.html"
+    if path.startswith("/direct/inbox"):
+        return "inbox.html"
+    if path.startswith("/accounts/onetap") or (path == "/" and is_logged_in):
+        return "onetap.html"
+    if path == "/":
+        return "login.html"
+    return None
+
+
+def install_fixture_routing(fixtures: dict):
+    """Makes every context created by BrowserHelper load the fixtures instead of the network."""
+    create_stealth_page = BrowserHelper.create_stealth_page
+
+    async def serve_fixture(route):
+        url = urlparse(route.request.url)
+        if url.hostname != "www.instagram.com":
+            await route.abort()
+            return
+        headers = await route.request.all_headers()
+        name = fixture_for(url.path, "sessionid=" in headers.get("cookie", ""))
+        if name is None:
+            await route.fulfill(status=404, body="")
+            return
+        await route.fulfill(status=200, content_type="text/html; charset=utf-8", body=fixtures[name])
+
+    async def create_fixture_page(session_data: dict = None):
+        context, page = await create_stealth_page(session_data=session_data)
+        await context.route("**/*", serve_fixture)
+        return context, page
+
+    BrowserHelper.create_stealth_page = staticmethod(create_fixture_page)
+
+
+def build_services(max_concurrent: int):
+    server = FakeServer()
+    redis_helper = RedisHelper()
+    redis_helper.client = FakeAsyncRedis(server=server)
+    AgentQLWrapper.configure_selector_cache(redis_helper)
+    session_service = SessionService(redis_helper)
+    jwt_service = JWTService(session_service)
+    scheduler = BrowserScheduler(max_concurrent=max_concurrent, max_queue_depth=1_000_000)
+    login_service = LoginService(session_service, jwt_service, scheduler)
+    message_service = MessageService(redis_helper, session_service, scheduler)
+    return login_service, message_service
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+async def run_scenario(operation, requests: int, concurrency: int, stub: StubAgentQL) -> dict:
+    """Runs `requests` operations with at most `concurrency` in flight and summarizes their latency."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = []
+    agentql_calls_before = stub.calls
+
+    async def run_one(index: int):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await operation(index)
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {getattr(e, 'detail', e)}")
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(run_one(index) for index in range(requests)))
+    elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "agentql_calls_per_request": round((stub.calls - agentql_calls_before) / requests, 2),
+    }
+
+
+async def run(args) -> list:
+    Config.HUMAN_DELAY_SCALE = args.delay_scale
+    Config.READINESS_DOM_QUIET_MS = args.dom_quiet_ms
+    Config.LOGIN_SESSION_PROBE_ENABLED = False  # The probe's API request is not routed to the fixtures
+    Config.PROXIES = []
+    os.environ.setdefault("BROWSER_HEADLESS", "true")
+
+    stub = StubAgentQL(latency=args.agentql_latency_ms / 1000)
+    AgentQLWrapper.use_backend(stub.wrap_async)
+    install_fixture_routing(load_fixtures())
+    login_service, message_service = build_services(max(args.concurrency))
+
+    results = []
+    try:
+        await BrowserHelper.initialize_playwright()
+        for concurrency in args.concurrency:
+            prefix = f"c{concurrency}_user"
+            scenarios = {
+                "login (browser)": lambda i: login_service.login(f"{prefix}{i}", PASSWORD, force=True),
+                "login (stored session)": lambda i: login_service.login(f"{prefix}{i}", PASSWORD),
+                "send_message": lambda i: message_service.send_message(f"recipient{i}", "Hello from the benchmark", f"{prefix}{i}"),
+                # Same sender and recipient pairs again, now resolved through the thread cache
+                "send_message (cached thread)": lambda i: message_service.send_message(f"recipient{i}", "Hello again", f"{prefix}{i}"),
+            }
+            for name, operation in scenarios.items():
+                result = {"scenario": name, **await run_scenario(operation, args.requests, concurrency, stub)}
+                results.append(result)
+                print_result(result)
+    finally:
+        await BrowserHelper.close_browser()
+        AgentQLWrapper.use_backend(None)
+
+    print(f"\nselector cache: {AgentQLWrapper.selector_cache_stats()}")
+    return results
+
+
+def print_result(result: dict):
+    if not getattr(print_result, "printed_header", False):
+        print(f"{'scenario':<30}{'conc':>6}{'reqs':>6}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'req/s':>8}{'aql/req':>9}")
+        print_result.printed_header = True
+    print(
+        f"{result['scenario']:<30}{result['concurrency']:>6}{result['requests']:>6}{result['errors']:>6}"
+        f"{result['p50_ms']:>10}{result['p95_ms']:>10}{result['max_ms']:>10}"
+        f"{result['throughput_per_s']:>8}{result['agentql_calls_per_request']:>9}"
+    )
+    if result["first_error"]:
+        print(f"    first error: {result['first_error']}")
+
+
+def find_regressions(results: list, baseline: list, tolerance: float) -> list:
+    """Lists scenarios whose p95 latency grew by more than `tolerance` over the baseline."""
+    previous = {(entry["scenario"], entry["concurrency"]): entry for entry in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["scenario"], result["concurrency"]))
+        if before and before["p95_ms"] and result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{result['scenario']} @ {result['concurrency']}: p95 {before['p95_ms']} ms -> {result['p95_ms']} ms"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--requests", type=int, default=16, help="operations per scenario and concurrency level")
+    parser.add_argument("--delay-scale", type=float, default=0.01, help="multiplier for human-like pauses")
+    parser.add_argument("--dom-quiet-ms", type=int, default=50, help="DOM quiet period for readiness waits")
+    parser.add_argument("--agentql-latency-ms", type=float, default=150, help="simulated AgentQL round-trip")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 increase over the baseline")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+    if args.baseline:
+        regressions = find_regressions(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compares the legacy (JSON + Fernet) and current (pruned, compressed, AES-GCM) session
+encodings on a synthetic Playwright storage state.
+
+Usage (from the backend directory):
+    python -m benchmarks.session_codec_benchmark [--iterations 2000]
+"""
+
+import argparse
+import random
+import string
+import time
+
+from cryptography.fernet import Fernet
+
+from app.core.session_codec import SessionCodec
+
+
+def _token(length: int) -> str:
+    return "".join(random.choices(string.ascii_letters + string.digits, k=length))
+
+
+def build_storage_state() -> dict:
+    """Builds a storage state shaped like one captured after an Instagram login."""
+    random.seed(7)
+    cookie_domains = [".instagram.com"] * 12 + [".facebook.com", ".doubleclick.net", ".fbcdn.net"] * 8
+    cookies = [
+        {
+            "name": f"c_{index}_{_token(6)}",
+            "value": _token(random.randint(16, 160)),
+            "domain": domain,
+            "path": "/",
+            "expires": time.time() + 86400 * 365,
+            "httpOnly": index % 2 == 0,
+            "secure": True,
+            "sameSite": "Lax",
+        }
+        for index, domain in enumerate(cookie_domains)
+    ]
+    origins = [
+        {
+            "origin": origin,
+            "localStorage": [
+                {"name": f"key_{index}", "value": _token(random.randint(64, 1024))} for index in range(30)
+            ],
+        }
+        for origin in ["https://www.instagram.com", "https://www.facebook.com", "https://static.xx.fbcdn.net"]
+    ]
+    return {"cookies": cookies, "origins": origins}
+
+
+def measure(encode, decode, storage_state, iterations: int) -> dict:
+    blob = encode(storage_state)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encode(storage_state)
+    encode_us = (time.perf_counter() - start) / iterations * 1e6
+    start = time.perf_counter()
+    for _ in range(iterations):
+        decode(blob)
+    decode_us = (time.perf_counter() - start) / iterations * 1e6
+    return {"bytes": len(blob), "encode_us": encode_us, "decode_us": decode_us}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    codec = SessionCodec(Fernet.generate_key())
+    storage_state = build_storage_state()
+    results = {
+        "legacy (json+fernet)": measure(codec.encode_legacy, codec.decode, storage_state, args.iterations),
+        "v2 (pruned+zlib+aes-gcm)": measure(codec.encode, codec.decode, storage_state, args.iterations),
+    }
+
+    print(f"{'format':<28}{'bytes stored':>14}{'encode (us)':>14}{'decode (us)':>14}")
+    for name, result in results.items():
+        print(f"{name:<28}{result['bytes']:>14}{result['encode_us']:>14.1f}{result['decode_us']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Wall time and driver round-trips of each text entry strategy in app/core/text_entry.py.
+
+Text is typed into an input and a contenteditable box (like Instagram's message box) on a
+local page in Chromium. Every awaited call on the element is one driver round-trip.
+
+Usage (from the backend directory, after `playwright install chromium`):
+    python -m benchmarks.text_entry_benchmark [--lengths 20 300] [--delay-scale 0 0.1] [--repeats 3]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+
+from playwright.async_api import async_playwright
+
+from app.core.config import Config
+from app.core.text_entry import TextEntry
+
+PAGE = """
+<input id="field" type="text">
+<div id="box" role="textbox" contenteditable="true"></div>
+"""
+SAMPLE_TEXT = "Hey! Just checking in about the order you placed last week, let me know if anything is missing. "
+
+
+class CountingElement:
+    """Forwards to a Playwright locator, counting the driver calls made through it."""
+
+    def __init__(self, locator):
+        self._locator = locator
+        self.round_trips = 0
+
+    def __getattr__(self, name):
+        method = getattr(self._locator, name)
+
+        async def call(*args, **kwargs):
+            self.round_trips += 1
+            return await method(*args, **kwargs)
+
+        return call
+
+
+def sample_text(length: int) -> str:
+    return (SAMPLE_TEXT * (length // len(SAMPLE_TEXT) + 1))[:length]
+
+
+async def measure(page, selector: str, strategy: str, text: str, repeats: int) -> dict:
+    durations = []
+    round_trips = 0
+    for _ in range(repeats):
+        await page.evaluate(
+            "selector => { const el = document.querySelector(selector); el.value = ''; el.textContent = ''; }",
+            selector,
+        )
+        element = CountingElement(page.locator(selector))
+        start = time.perf_counter()
+        await TextEntry.enter(element, text, strategy)
+        durations.append(time.perf_counter() - start)
+        round_trips = element.round_trips
+        typed = await page.evaluate("selector => { const el = document.querySelector(selector); return el.value ?? el.textContent; }", selector)
+        if typed != text:
+            raise AssertionError(f"{strategy} typed {typed!r} into {selector}, expected {text!r}")
+    return {"wall_ms": round(statistics.median(durations) * 1000, 1), "round_trips": round_trips}
+
+
+async def run(args) -> list:
+    results = []
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.set_content(PAGE)
+        for delay_scale in args.delay_scale:
+            Config.HUMAN_DELAY_SCALE = delay_scale
+            for length in args.lengths:
+                text = sample_text(length)
+                for selector in ("#field", "#box"):
+                    for strategy in TextEntry.STRATEGIES:
+                        result = {
+                            "strategy": strategy,
+                            "element": "input" if selector == "#field" else "contenteditable",
+                            "length": length,
+                            "delay_scale": delay_scale,
+                            **await measure(page, selector, strategy, text, args.repeats),
+                        }
+                        results.append(result)
+                        print(
+                            f"{result['strategy']:<10}{result['element']:<17}{length:>6}{delay_scale:>8}"
+                            f"{result['wall_ms']:>12}{result['round_trips']:>13}"
+                        )
+        await browser.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[20, 300], help="text lengths in characters")
+    parser.add_argument("--delay-scale", type=float, nargs="+", default=[0.0, 0.1], help="HUMAN_DELAY_SCALE values")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per case; the median is reported")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    print(f"{'strategy':<10}{'element':<17}{'chars':>6}{'scale':>8}{'wall ms':>12}{'round-trips':>13}")
+    results = asyncio.run(run(args))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import os
+
+import pytest
+from cryptography.fernet import Fernet
+from fakeredis import FakeAsyncRedis, FakeServer
+
+# SessionService builds its Fernet cipher at import time
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+from app.core.redis_helper import RedisHelper  # noqa: E402  (Config reads ENCRYPTION_KEY on import)
+
+
+@pytest.fixture
+def make_redis_helper():
+    """Builds RedisHelpers on one fake Redis server per test; each stands in for a separate process."""
+    server = FakeServer()
+
+    def make():
+        redis_helper = RedisHelper()
+        redis_helper.client = FakeAsyncRedis(server=server)
+        return redis_helper
+
+    return make
+
+
+@pytest.fixture
+def redis_helper(make_redis_helper):
+    """A RedisHelper backed by the test's fake Redis server."""
+    return make_redis_helper()
@@ -0,0 +1,54 @@
+import pytest
+
+from app.core.agentql_wrapper import AgentQLWrapper, _merge_queries
+from app.core.config import Config
+from app.core.message_service import CHAT_SUGGESTION_QUERY, NO_ACCOUNT_FOUND_QUERY
+from app.core.selector_cache import SelectorCache
+
+
+class FakeResponse:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class FakeWrappedPage:
+    def __init__(self):
+        self.queries = []
+
+    async def query_elements(self, query):
+        self.queries.append(query)
+        return FakeResponse(no_account_message=None, chat_suggestion="suggestion")
+
+
+@pytest.fixture(autouse=True)
+def disabled_selector_cache(monkeypatch):
+    monkeypatch.setattr(AgentQLWrapper, "_selector_cache", SelectorCache(enabled=False))
+
+
+def test_merge_queries_rejects_colliding_fields():
+    assert _merge_queries(["{ send_button }", "{ send_button }"]) is None
+
+
+@pytest.mark.asyncio
+async def test_query_batch_issues_one_combined_request():
+    page = FakeWrappedPage()
+
+    no_account, suggestion = await AgentQLWrapper.query_batch(
+        page, NO_ACCOUNT_FOUND_QUERY, CHAT_SUGGESTION_QUERY
+    )
+
+    assert len(page.queries) == 1
+    assert no_account.no_account_message is None
+    assert suggestion.chat_suggestion == "suggestion"
+    with pytest.raises(AttributeError):
+        no_account.chat_suggestion
+
+
+@pytest.mark.parametrize("shared", [True, False])
+def test_selector_cache_uses_the_injected_redis_helper(monkeypatch, shared):
+    monkeypatch.setattr(Config, "AGENTQL_SELECTOR_CACHE_REDIS", shared)
+    redis_helper = object()
+
+    AgentQLWrapper.configure_selector_cache(redis_helper)
+
+    assert AgentQLWrapper.get_selector_cache().redis_helper is (redis_helper if shared else None)
@@ -0,0 +1,142 @@
+import os
+
+import pytest
+
+from app.core.asset_cache import AssetCache
+
+BUNDLE_URL = "https://static.cdninstagram.com/rsrc.php/bundle.js"
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type="script", method="GET"):
+        self.url = url
+        self.resource_type = resource_type
+        self.method = method
+
+
+class FakeResponse:
+    def __init__(self, body, cache_control):
+        self.status = 200
+        self.headers = {"content-type": "text/javascript", "cache-control": cache_control, "content-length": str(len(body))}
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+
+class FakeRoute:
+    def __init__(self, request, body=b"console.log(1)", cache_control="public, max-age=31536000, immutable"):
+        self.request = request
+        self.response = FakeResponse(body, cache_control)
+        self.fetched = False
+        self.fulfilled = None
+        self.fell_back = False
+
+    async def fetch(self):
+        self.fetched = True
+        return self.response
+
+    async def fulfill(self, status, headers, body):
+        self.fulfilled = {"status": status, "headers": headers, "body": body}
+
+    async def fallback(self):
+        self.fell_back = True
+
+
+def make_cache(directory, max_bytes=1024):
+    return AssetCache(
+        directory=str(directory),
+        max_bytes=max_bytes,
+        resource_types=["script"],
+        url_patterns=[r"^https://static\.cdninstagram\.com/"],
+        enabled=True,
+    )
+
+
+@pytest.mark.asyncio
+async def test_second_request_is_served_from_disk(tmp_path):
+    cache = make_cache(tmp_path)
+    first, second = FakeRoute(FakeRequest(BUNDLE_URL)), FakeRoute(FakeRequest(BUNDLE_URL))
+
+    await cache._handle_route(first)
+    await cache._handle_route(second)
+
+    assert first.fetched and not second.fetched
+    assert second.fulfilled["body"] == b"console.log(1)"
+    assert "content-length" not in second.fulfilled["headers"]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["bytes_saved"] == len(b"console.log(1)")
+
+
+@pytest.mark.asyncio
+async def test_cache_is_shared_through_the_directory(tmp_path):
+    await make_cache(tmp_path)._handle_route(FakeRoute(FakeRequest(BUNDLE_URL)))
+    other_process = make_cache(tmp_path)
+    await other_process._load_index()
+    route = FakeRoute(FakeRequest(BUNDLE_URL))
+
+    await other_process._handle_route(route)
+
+    assert not route.fetched
+    assert other_process.stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_assets_are_evicted_over_the_cap(tmp_path):
+    cache = make_cache(tmp_path, max_bytes=250)
+    for name in ("a", "b", "c"):
+        await cache._handle_route(FakeRoute(FakeRequest(f"https://static.cdninstagram.com/{name}.js"), body=b"x" * 100))
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["size_bytes"] == 200
+    assert len(list(tmp_path.glob("*.body"))) == 2
+
+
+@pytest.mark.asyncio
+async def test_uncacheable_responses_and_requests_are_not_stored(tmp_path):
+    cache = make_cache(tmp_path)
+    no_store = FakeRoute(FakeRequest(BUNDLE_URL), cache_control="no-store")
+    document = FakeRoute(FakeRequest("https://www.instagram.com/", resource_type="document"))
+
+    await cache._handle_route(no_store)
+    await cache._handle_route(document)
+
+    assert no_store.fulfilled and cache.stats()["stores"] == 0
+    assert document.fell_back
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_falls_back_to_the_browser(tmp_path):
+    async def fail():
+        raise TimeoutError("fetch timed out")
+
+    cache = make_cache(tmp_path)
+    route = FakeRoute(FakeRequest(BUNDLE_URL))
+    route.fetch = fail
+
+    await cache._handle_route(route)
+
+    assert route.fell_back and route.fulfilled is None
+    assert cache.stats()["stores"] == 0
+
+
+@pytest.mark.asyncio
+async def test_directory_is_created_private(tmp_path):
+    cache = make_cache(tmp_path / "assets")
+
+    await cache._load_index()
+
+    assert cache.enabled
+    assert (tmp_path / "assets").stat().st_mode & 0o777 == 0o700
+
+
+@pytest.mark.asyncio
+async def test_directory_owned_by_another_user_disables_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(tmp_path).st_uid + 1)
+    cache = make_cache(tmp_path)
+
+    await cache._load_index()
+
+    assert not cache.enabled
@@ -0,0 +1,84 @@
+import pytest
+
+from app.core.browser_helper import BrowserContextPool, BrowserHelper
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def created(monkeypatch):
+    contexts = []
+
+    async def fake_create_stealth_page(session_data=None):
+        context = FakeContext()
+        contexts.append(context)
+        return context, FakePage()
+
+    monkeypatch.setattr(BrowserHelper, "create_stealth_page", fake_create_stealth_page)
+    return contexts
+
+
+@pytest.mark.asyncio
+async def test_released_context_is_reused_for_same_user(created):
+    pool = BrowserContextPool(max_size=2, idle_ttl=60, enabled=True)
+
+    lease = await pool.acquire("alice")
+    await pool.release(lease)
+    again = await pool.acquire("alice")
+
+    assert again.context is lease.context
+    assert again.reused
+    assert len(created) == 1
+    assert pool.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_context_is_evicted(created):
+    pool = BrowserContextPool(max_size=1, idle_ttl=60, enabled=True)
+
+    first = await pool.acquire("alice")
+    second = await pool.acquire("bob")
+    await pool.release(first)
+    await pool.release(second)
+
+    assert first.context.closed
+    assert not second.context.closed
+    assert pool.stats()["idle"] == 1
+
+
+@pytest.mark.asyncio
+async def test_idle_context_expires_after_ttl(created):
+    pool = BrowserContextPool(max_size=2, idle_ttl=0, enabled=True)
+
+    lease = await pool.acquire("alice")
+    await pool.release(lease)
+    again = await pool.acquire("alice")
+
+    assert lease.context.closed
+    assert again.context is not lease.context
+
+
+@pytest.mark.asyncio
+async def test_evicted_lease_is_closed_on_release(created):
+    pool = BrowserContextPool(max_size=2, idle_ttl=60, enabled=True)
+
+    lease = await pool.acquire("alice")
+    await pool.evict("alice")
+    await pool.release(lease)
+
+    assert lease.context.closed
+    assert pool.stats()["idle"] == 0
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from app.core.browser_scheduler import BrowserScheduler
+from app.core.custom_exceptions import TooManyRequestsError
+
+
+async def hold(scheduler, username, events, label, release):
+    async with scheduler.slot(username):
+        events.append(f"start {label}")
+        await release.wait()
+        events.append(f"end {label}")
+
+
+@pytest.mark.asyncio
+async def test_same_user_flows_run_one_at_a_time_in_order():
+    scheduler = BrowserScheduler(max_concurrent=4, max_queue_depth=10)
+    release = asyncio.Event()
+    events = []
+
+    tasks = [asyncio.create_task(hold(scheduler, "alice", events, label, release)) for label in ("a", "b", "c")]
+    await asyncio.sleep(0.01)
+    assert events == ["start a"]
+    assert scheduler.stats()["queued"] == 2
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert events == ["start a", "end a", "start b", "end b", "start c", "end c"]
+
+
+@pytest.mark.asyncio
+async def test_global_cap_limits_concurrent_flows():
+    scheduler = BrowserScheduler(max_concurrent=2, max_queue_depth=10)
+    release = asyncio.Event()
+    events = []
+
+    tasks = [asyncio.create_task(hold(scheduler, user, events, user, release)) for user in ("alice", "bob", "carol")]
+    await asyncio.sleep(0.01)
+    assert scheduler.stats()["running"] == 2
+    assert scheduler.stats()["queued"] == 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+    stats = scheduler.stats()
+    assert stats["admitted"] == 3
+    assert stats["running"] == 0
+    assert stats["wait_max_seconds"] > 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_with_retry_after():
+    scheduler = BrowserScheduler(max_concurrent=1, max_queue_depth=1)
+    release = asyncio.Event()
+    events = []
+
+    tasks = [asyncio.create_task(hold(scheduler, user, events, user, release)) for user in ("alice", "bob")]
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(TooManyRequestsError) as exc_info:
+        async with scheduler.slot("carol"):
+            pass
+    assert exc_info.value.status_code == 429
+    assert int(exc_info.value.headers["Retry-After"]) >= 1
+    assert scheduler.stats()["rejected"] == 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    scheduler = BrowserScheduler(max_concurrent=1, max_queue_depth=10)
+    release = asyncio.Event()
+    events = []
+
+    running = asyncio.create_task(hold(scheduler, "alice", events, "a", release))
+    waiting = asyncio.create_task(hold(scheduler, "bob", events, "b", release))
+    await asyncio.sleep(0.01)
+    waiting.cancel()
+    await asyncio.sleep(0.01)
+
+    assert scheduler.stats()["queued"] == 0
+    release.set()
+    await running
+    assert "start b" not in events
@@ -0,0 +1,44 @@
+import pytest
+
+from app.core.browser_workers import BrowserWorkerPool, HashRing
+
+
+def test_hash_ring_routes_a_key_to_the_same_node():
+    ring = HashRing(range(4))
+
+    assert all(ring.node_for("alice") == ring.node_for("alice") for _ in range(10))
+
+
+def test_hash_ring_spreads_keys_across_nodes():
+    ring = HashRing(range(4))
+    counts = {node: 0 for node in range(4)}
+    for i in range(4000):
+        counts[ring.node_for(f"user{i}")] += 1
+
+    assert all(600 < count < 1400 for count in counts.values())
+
+
+def test_adding_a_node_only_moves_keys_to_that_node():
+    before = HashRing(range(4))
+    after = HashRing(range(5))
+
+    for i in range(2000):
+        key = f"user{i}"
+        if before.node_for(key) != after.node_for(key):
+            assert after.node_for(key) == 4
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_routes_requests_to_worker_processes(monkeypatch):
+    monkeypatch.setenv("BROWSER_PREWARM", "false")  # Spawned workers read their own config
+    pool = BrowserWorkerPool(size=2)
+    await pool.start()
+    try:
+        stats = await pool.call("alice", "stats")
+        assert stats["worker"] == pool.worker_for("alice").index
+        assert stats["browser_ready"] is False
+        assert pool.is_ready()
+    finally:
+        await pool.stop(timeout=10)
+
+    assert not pool.is_ready()
@@ -1,5 +1,6 @@
 from fastapi.testclient import TestClient
 
+from app.core.config import Config
 from app.main import app
 
 client = TestClient(app)
@@ -9,3 +10,27 @@ def test_health():
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+
+
+def test_ready_reports_unavailable_browser():
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["data"]["browser"] == {"ready": False}
+
+
+def test_browser_flows_are_rejected_while_draining(monkeypatch):
+    # Keep the lifespan from launching Chromium or starting Redis stream job workers
+    monkeypatch.setattr(Config, "BROWSER_PREWARM", False)
+    monkeypatch.setattr(Config, "BROWSER_WORKERS", 0)
+    monkeypatch.setattr(Config, "JOB_QUEUE_BACKEND", "memory")
+    with TestClient(app) as draining_client:
+        app.state.container.is_draining = True
+        login = draining_client.post("/login", json={"username": "alice", "password": "secret"})
+        send = draining_client.post(
+            "/send-message", json={"recipient": "bob", "message": "hi"}, headers={"Authorization": "Bearer token"}
+        )
+        app.state.container.is_draining = False
+
+    assert login.status_code == 503
+    assert login.headers["Retry-After"] == "5"
+    assert send.status_code == 503
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.job_queue import InMemoryJobBackend, JobQueue, RedisStreamJobBackend
+
+
+class FakeMessageService:
+    def __init__(self, error=None):
+        self.error = error
+        self.sent = []
+
+    async def send_message(self, recipient, message, username):
+        if self.error:
+            raise self.error
+        self.sent.append((username, recipient, message))
+        return "success"
+
+
+def make_backend(kind, redis_helper):
+    if kind == "memory":
+        return InMemoryJobBackend()
+    return RedisStreamJobBackend(redis_helper)
+
+
+async def wait_for_job(job_queue, job_id):
+    for _ in range(100):
+        job = await job_queue.get(job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+async def test_worker_runs_queued_job(kind, redis_helper):
+    message_service = FakeMessageService()
+    job_queue = JobQueue(make_backend(kind, redis_helper), message_service, workers=1)
+    await job_queue.start()
+
+    job = await job_queue.submit("alice", "bob", "hi")
+    finished = await wait_for_job(job_queue, job["id"])
+    await job_queue.stop(timeout=2)
+
+    assert finished["status"] == "succeeded"
+    assert finished["run_seconds"] is not None
+    assert message_service.sent == [("alice", "bob", "hi")]
+
+
+@pytest.mark.asyncio
+async def test_failed_send_records_status_code():
+    message_service = FakeMessageService(HTTPException(status_code=404, detail="Recipient account not found."))
+    job_queue = JobQueue(InMemoryJobBackend(), message_service, workers=1)
+    await job_queue.start()
+
+    job = await job_queue.submit("alice", "nobody", "hi")
+    finished = await wait_for_job(job_queue, job["id"])
+    await job_queue.stop(timeout=2)
+
+    assert finished["status"] == "failed"
+    assert finished["status_code"] == 404
+    assert finished["error"] == "Recipient account not found."
+
+
+@pytest.mark.asyncio
+async def test_message_text_is_encrypted_in_the_stream(redis_helper):
+    backend = make_backend("redis", redis_helper)
+
+    job = await JobQueue(backend, FakeMessageService()).submit("alice", "bob", "meet at noon")
+
+    [(_, fields)] = await redis_helper.client.xrange(RedisStreamJobBackend.STREAM_KEY)
+    assert b"meet at noon" not in fields[b"payload"]
+    assert (await backend.dequeue("worker-a", timeout=0.1))[:2] == (
+        job["id"], {"username": "alice", "recipient": "bob", "message": "meet at noon"}
+    )
+
+
+class BlockingMessageService:
+    def __init__(self):
+        self.started = asyncio.Event()
+
+    async def send_message(self, recipient, message, username):
+        self.started.set()
+        await asyncio.sleep(60)
+
+
+@pytest.mark.asyncio
+async def test_reclaimed_running_job_is_not_sent_again(redis_helper):
+    message_service = FakeMessageService()
+    backend = make_backend("redis", redis_helper)
+    job_queue = JobQueue(backend, message_service, workers=1)
+    job = await job_queue.submit("alice", "bob", "hi")
+    await backend.update(job["id"], status="running")  # As left by a consumer that died mid-send
+
+    await job_queue.start()
+    finished = await wait_for_job(job_queue, job["id"])
+    await job_queue.stop(timeout=2)
+
+    assert finished["status"] == "failed"
+    assert message_service.sent == []
+
+
+@pytest.mark.asyncio
+async def test_job_cancelled_by_stop_is_failed_and_left_pending(redis_helper):
+    message_service = BlockingMessageService()
+    backend = make_backend("redis", redis_helper)
+    job_queue = JobQueue(backend, message_service, workers=1)
+    await job_queue.start()
+    job = await job_queue.submit("alice", "bob", "hi")
+    await asyncio.wait_for(message_service.started.wait(), 2)
+
+    await job_queue.stop(timeout=0.1)
+
+    assert (await job_queue.get(job["id"]))["status"] == "failed"
+    pending = await backend.client.xpending(backend.STREAM_KEY, backend.GROUP_NAME)
+    assert pending["pending"] == 1
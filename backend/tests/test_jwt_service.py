@@ -0,0 +1,36 @@
+import jwt
+import pytest
+
+from app.core.custom_exceptions import InvalidTokenError
+from app.core.jwt_service import JWTService
+from app.core.session_service import SessionService
+
+
+@pytest.fixture
+def jwt_service(redis_helper):
+    return JWTService(SessionService(redis_helper))
+
+
+@pytest.mark.asyncio
+async def test_repeat_validation_skips_decode(jwt_service, monkeypatch):
+    await jwt_service.session_service.save_session("alice", {"cookies": [], "origins": []}, ttl=60)
+    access_token = jwt_service.generate_access_token("alice")
+    decode_calls = []
+    real_decode = jwt.decode
+    monkeypatch.setattr(jwt, "decode", lambda *args, **kwargs: decode_calls.append(1) or real_decode(*args, **kwargs))
+
+    assert await jwt_service.validate_token(access_token) == "alice"
+    assert await jwt_service.validate_token(access_token) == "alice"
+    assert len(decode_calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_session_deletion_purges_cached_tokens(jwt_service):
+    await jwt_service.session_service.save_session("alice", {"cookies": [], "origins": []}, ttl=60)
+    access_token = jwt_service.generate_access_token("alice")
+    await jwt_service.validate_token(access_token)
+
+    await jwt_service.session_service.delete_session("alice")
+
+    with pytest.raises(InvalidTokenError):
+        await jwt_service.validate_token(access_token)
@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import Config
+from app.core.custom_exceptions import InvalidCredentialsError
+from app.core.jwt_service import JWTService
+from app.core.login_service import LoginService
+from app.core.session_service import SessionService
+
+
+def make_login_service(redis_helper, calls, outcome=None):
+    session_service = SessionService(redis_helper)
+    service = LoginService(session_service, JWTService(session_service))
+
+    async def fake_login_with_browser(username, password):
+        calls.append((username, password))
+        await asyncio.sleep(0.05)
+        if outcome:
+            raise outcome
+        return f"access-{len(calls)}", f"refresh-{len(calls)}"
+
+    service._login_with_browser = fake_login_with_browser
+    return service
+
+
+@pytest.fixture(autouse=True)
+def fast_lock_polling(monkeypatch):
+    monkeypatch.setattr(Config, "LOGIN_LOCK_POLL_INTERVAL_SECONDS", 0.01)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_logins_share_one_browser_login(redis_helper):
+    calls = []
+    service = make_login_service(redis_helper, calls)
+
+    results = await asyncio.gather(*(service.login("alice", "secret") for _ in range(3)))
+
+    assert calls == [("alice", "secret")]
+    assert results == [("access-1", "refresh-1")] * 3
+
+
+@pytest.mark.asyncio
+async def test_login_with_different_password_runs_after_the_first(redis_helper):
+    calls = []
+    service = make_login_service(redis_helper, calls)
+
+    first, second = await asyncio.gather(service.login("alice", "secret"), service.login("alice", "other"))
+
+    assert calls == [("alice", "secret"), ("alice", "other")]
+    assert first != second
+
+
+@pytest.mark.asyncio
+async def test_login_in_another_worker_is_shared_through_redis(make_redis_helper):
+    calls_a, calls_b = [], []
+    worker_a, worker_b = make_login_service(make_redis_helper(), calls_a), make_login_service(make_redis_helper(), calls_b)
+
+    first = asyncio.create_task(worker_a.login("alice", "secret"))
+    await asyncio.sleep(0.01)
+    second = await worker_b.login("alice", "secret")
+
+    assert await first == second
+    assert calls_b == []
+    client = worker_a.session_service.redis_helper.client
+    assert await client.exists("login_result:alice")
+    assert not await client.exists("alice_login_result")
+
+
+@pytest.mark.asyncio
+async def test_failed_login_is_shared_with_waiting_callers(redis_helper):
+    calls = []
+    service = make_login_service(redis_helper, calls, outcome=InvalidCredentialsError())
+
+    results = await asyncio.gather(*(service.login("alice", "wrong") for _ in range(2)), return_exceptions=True)
+
+    assert len(calls) == 1
+    assert all(isinstance(result, InvalidCredentialsError) for result in results)
+
+
+async def store_session(service, expires):
+    cookies = [
+        {"name": name, "value": "x", "domain": ".instagram.com", "expires": expires}
+        for name in ("sessionid", "ds_user_id")
+    ]
+    await service.session_service.save_session("alice", {"cookies": cookies, "origins": []}, ttl=60)
+    verifier = LoginService._make_password_verifier("secret")
+    await service.session_service.save_session("alice_credential", verifier, ttl=60)
+
+
+@pytest.fixture
+def no_session_probe(monkeypatch):
+    monkeypatch.setattr(Config, "LOGIN_SESSION_PROBE_ENABLED", False)
+
+
+@pytest.mark.asyncio
+async def test_valid_stored_session_skips_browser_login(no_session_probe, redis_helper):
+    calls = []
+    service = make_login_service(redis_helper, calls)
+    await store_session(service, expires=time.time() + 86400)
+
+    access_token, refresh_token = await service.login("alice", "secret")
+
+    assert calls == []
+    assert await service.jwt_service.validate_token(access_token) == "alice"
+    assert await service.session_service.get_session("alice_refresh_token") == refresh_token
+
+
+@pytest.mark.parametrize(
+    "password, expires, force",
+    [
+        ("wrong", time.time() + 86400, False),  # Password differs from the one the session was created with
+        ("secret", time.time() + 60, False),  # Auth cookies about to expire
+        ("secret", time.time() + 86400, True),  # Caller asked for a full login
+    ],
+)
+@pytest.mark.asyncio
+async def test_browser_login_runs_when_session_cannot_be_reused(no_session_probe, redis_helper, password, expires, force):
+    calls = []
+    service = make_login_service(redis_helper, calls)
+    await store_session(service, expires=expires)
+
+    await service.login("alice", password, force=force)
+
+    assert calls == [("alice", password)]
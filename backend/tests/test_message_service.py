@@ -0,0 +1,184 @@
+import asyncio
+
+import pytest
+
+from app.core.agentql_wrapper import AgentQLWrapper
+from app.core.browser_helper import BrowserHelper, ContextLease
+from app.core.config import Config
+from app.core.message_service import INBOX_URL, MessageService, _parking_tasks
+from app.core.recipient_cache import RecipientCache
+
+
+class FakePage:
+    def __init__(self, url=INBOX_URL, ready_state="complete", closed=False, hang=False):
+        self.url = url
+        self.ready_state = ready_state
+        self.closed = closed
+        self.hang = hang
+
+    def is_closed(self):
+        return self.closed
+
+    async def evaluate(self, expression):
+        if self.hang:
+            await asyncio.sleep(10)
+        return self.ready_state
+
+
+def make_lease(page, inbox_ready=True):
+    lease = ContextLease("alice", context=None, page=page)
+    lease.inbox_ready = inbox_ready
+    return lease
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(Config, "RESIDENT_INBOX_ENABLED", True)
+    monkeypatch.setattr(Config, "RESIDENT_INBOX_HEALTH_TIMEOUT_SECONDS", 0.05)
+    return MessageService(redis_helper=None, session_service=None)
+
+
+@pytest.mark.asyncio
+async def test_healthy_parked_page_is_ready(service):
+    assert await service._is_resident_inbox_ready(make_lease(FakePage()))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("page, inbox_ready", [
+    (FakePage(), False),
+    (FakePage(closed=True), True),
+    (FakePage(url="https://www.instagram.com/direct/t/1000/"), True),
+    (FakePage(ready_state="loading"), True),
+    (FakePage(hang=True), True),
+])
+async def test_unhealthy_parked_page_is_not_ready(service, page, inbox_ready):
+    assert not await service._is_resident_inbox_ready(make_lease(page, inbox_ready))
+
+
+@pytest.mark.asyncio
+async def test_resident_inbox_disabled_is_never_ready(service, monkeypatch):
+    monkeypatch.setattr(Config, "RESIDENT_INBOX_ENABLED", False)
+
+    assert not await service._is_resident_inbox_ready(make_lease(FakePage()))
+
+
+@pytest.mark.asyncio
+async def test_park_on_inbox_marks_the_lease_ready(service, monkeypatch):
+    steps = []
+
+    async def wrap(page):
+        return page
+
+    async def navigate(wrapped_page):
+        steps.append("navigate")
+
+    async def dismiss(wrapped_page):
+        steps.append("dismiss")
+
+    monkeypatch.setattr(AgentQLWrapper, "wrap_async", staticmethod(wrap))
+    monkeypatch.setattr(service, "_navigate_to_inbox", navigate)
+    monkeypatch.setattr(service, "_dismiss_notification_popup", dismiss)
+    lease = make_lease(FakePage(), inbox_ready=False)
+
+    assert await service._park_on_inbox(lease)
+    assert lease.inbox_ready
+    assert steps == ["navigate", "dismiss"]
+
+
+@pytest.mark.asyncio
+async def test_failed_park_leaves_the_lease_unparked(service, monkeypatch):
+    async def wrap(page):
+        return page
+
+    async def navigate(wrapped_page):
+        raise TimeoutError("inbox did not load")
+
+    monkeypatch.setattr(AgentQLWrapper, "wrap_async", staticmethod(wrap))
+    monkeypatch.setattr(service, "_navigate_to_inbox", navigate)
+    lease = make_lease(FakePage(), inbox_ready=False)
+
+    assert not await service._park_on_inbox(lease)
+    assert not lease.inbox_ready
+
+
+class FakeSessionService:
+    async def get_session(self, username):
+        return {"cookies": [], "origins": []}
+
+    async def write_back_context(self, username, context):
+        pass
+
+
+@pytest.fixture
+def send_flow(monkeypatch):
+    """A send flow on fake pages whose inbox parking blocks until `park_done` is set."""
+    monkeypatch.setattr(Config, "RESIDENT_INBOX_ENABLED", True)
+    service = MessageService(
+        redis_helper=None,
+        session_service=FakeSessionService(),
+        recipient_cache=RecipientCache(None, enabled=False, negative_enabled=False),
+    )
+    flow = {"service": service, "released": [], "parks": 0, "park_done": asyncio.Event()}
+
+    async def acquire_page(username, session_data=None, fresh=False):
+        return make_lease(FakePage(), inbox_ready=False)
+
+    async def release_page(lease, discard=False):
+        flow["released"].append(discard)
+
+    async def wrap(page):
+        return page
+
+    async def step(*args):
+        return True
+
+    async def park_on_inbox(lease):
+        flow["parks"] += 1
+        await flow["park_done"].wait()
+        return True
+
+    monkeypatch.setattr(BrowserHelper, "acquire_page", staticmethod(acquire_page))
+    monkeypatch.setattr(BrowserHelper, "release_page", staticmethod(release_page))
+    monkeypatch.setattr(AgentQLWrapper, "wrap_async", staticmethod(wrap))
+    for name in ("_navigate_to_inbox", "_dismiss_notification_popup", "_send_message", "_type_and_send"):
+        monkeypatch.setattr(service, name, step)
+    monkeypatch.setattr(service, "_park_on_inbox", park_on_inbox)
+    return flow
+
+
+@pytest.mark.asyncio
+async def test_send_returns_before_parking_and_parking_keeps_the_slot(send_flow):
+    service = send_flow["service"]
+
+    result = await asyncio.wait_for(service.send_message("bob", "hi", "alice"), timeout=1)
+
+    assert result == "success"
+    assert send_flow["parks"] == 1
+    assert send_flow["released"] == []  # Parking still holds the lease
+    assert service.scheduler.stats()["running"] == 1  # ... and the account's scheduler slot
+
+    send_flow["park_done"].set()
+    await asyncio.gather(*_parking_tasks)
+
+    assert send_flow["released"] == [False]
+    assert service.scheduler.stats()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_send_through_cached_thread_is_not_parked(send_flow, monkeypatch):
+    service = send_flow["service"]
+
+    async def get_thread(username, recipient):
+        return "https://www.instagram.com/direct/t/1000/"
+
+    async def open_cached_thread(wrapped_page, thread_url):
+        return object()
+
+    monkeypatch.setattr(service.recipient_cache, "get_thread", get_thread)
+    monkeypatch.setattr(service, "_open_cached_thread", open_cached_thread)
+
+    assert await service.send_message("bob", "hi", "alice") == "success"
+
+    assert send_flow["parks"] == 0
+    assert send_flow["released"] == [False]
+    assert service.scheduler.stats()["running"] == 0
@@ -0,0 +1,93 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.agentql_wrapper import AgentQLWrapper
+from app.core.message_service import CHAT_SUGGESTION_QUERY, NO_ACCOUNT_FOUND_QUERY, SEND_BUTTON_QUERY
+from app.core.selector_cache import SelectorCache
+from app.main import app
+
+
+class FakeResponse:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class FakeWrappedPage:
+    async def query_elements(self, query):
+        return FakeResponse(send_button=None, no_account_message=None, chat_suggestion=None)
+
+
+def sample(families: list, name: str, suffix: str, **labels):
+    for family_name, _, _, samples in families:
+        if family_name == name:
+            for sample_suffix, sample_labels, value in samples:
+                if sample_suffix == suffix and sample_labels == labels:
+                    return value
+    return None
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("step_seconds", "Step duration.", ("step",), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value, step="goto")
+
+    text = metrics.MetricsRegistry.render(histogram.collect())
+
+    assert '# TYPE step_seconds histogram' in text
+    assert 'step_seconds_bucket{step="goto",le="0.1"} 1' in text
+    assert 'step_seconds_bucket{step="goto",le="1.0"} 2' in text
+    assert 'step_seconds_bucket{step="goto",le="+Inf"} 3' in text
+    assert 'step_seconds_count{step="goto"} 3' in text
+
+
+@pytest.mark.asyncio
+async def test_flow_counts_agentql_calls_by_query_constant(monkeypatch):
+    monkeypatch.setattr(AgentQLWrapper, "_selector_cache", SelectorCache(enabled=False))
+    page = FakeWrappedPage()
+
+    async with metrics.flow("metrics_test"):
+        await AgentQLWrapper.query_elements(page, SEND_BUTTON_QUERY)
+        await AgentQLWrapper.query_batch(page, NO_ACCOUNT_FOUND_QUERY, CHAT_SUGGESTION_QUERY)
+
+    families = metrics.REGISTRY.collect()
+    assert sample(families, "agentql_calls_per_flow", "_sum", flow="metrics_test") == 2
+    assert sample(
+        families, "agentql_query_seconds", "_count", flow="metrics_test", query="SEND_BUTTON_QUERY", source="agentql"
+    ) == 1
+    assert sample(
+        families, "agentql_query_seconds", "_count",
+        flow="metrics_test", query="NO_ACCOUNT_FOUND_QUERY+CHAT_SUGGESTION_QUERY", source="agentql",
+    ) == 1
+    assert sample(families, "browser_flow_seconds", "_count", flow="metrics_test", outcome="success") == 1
+
+
+def test_selector_cache_lookup_is_recorded_only_on_a_hit():
+    with metrics.agentql_cache_lookup("LOOKUP_TEST_QUERY"):
+        pass
+    with metrics.agentql_cache_lookup("LOOKUP_TEST_QUERY") as lookup:
+        lookup["hit"] = True
+
+    families = metrics.REGISTRY.collect()
+    assert sample(families, "agentql_query_seconds", "_count", flow="none", query="LOOKUP_TEST_QUERY", source="cache") == 1
+
+
+def test_merge_tags_samples_with_their_process():
+    families = [("up", "gauge", "Up.", [("", {}, 1)])]
+
+    merged = metrics.MetricsRegistry.merge({"api": families, "0": families}, label="process")
+
+    assert merged == [("up", "gauge", "Up.", [("", {"process": "api"}, 1), ("", {"process": "0"}, 1)])]
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    with TestClient(app) as client:
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE browser_step_seconds histogram" in response.text
+    assert 'browser_pool_contexts{state="idle"}' in response.text
+    assert "# TYPE browser_pool_contexts gauge" in response.text
+    assert "# TYPE browser_pool_lookups_total counter" in response.text
+    assert "# TYPE browser_scheduler_rejected_total counter" in response.text
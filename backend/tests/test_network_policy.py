@@ -0,0 +1,78 @@
+import pytest
+
+from app.core.network_policy import MODE_ENFORCE, MODE_REPORT, NetworkPolicy
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type, body_size=0):
+        self.url = url
+        self.resource_type = resource_type
+        self.body_size = body_size
+
+    async def sizes(self):
+        return {"responseBodySize": self.body_size, "responseHeadersSize": 100}
+
+
+class FakeRoute:
+    def __init__(self, request):
+        self.request = request
+        self.outcome = None
+
+    async def abort(self, error_code=None):
+        self.outcome = "aborted"
+
+    async def fallback(self):
+        self.outcome = "continued"
+
+
+def make_policy(mode):
+    return NetworkPolicy(
+        mode=mode,
+        blocked_resource_types=["image", "font"],
+        blocked_url_patterns=[r"/logging_client_events"],
+        allowed_url_patterns=[r"/static/required-icon\.png"],
+    )
+
+
+@pytest.mark.parametrize(
+    "url, resource_type, blocked",
+    [
+        ("https://scontent.cdninstagram.com/photo.jpg", "image", True),
+        ("https://www.instagram.com/logging_client_events", "xhr", True),
+        ("https://www.instagram.com/static/required-icon.png", "image", False),
+        ("https://www.instagram.com/direct/inbox/", "document", False),
+        ("https://static.cdninstagram.com/bundle.js", "script", False),
+    ],
+)
+def test_should_block(url, resource_type, blocked):
+    assert make_policy(MODE_ENFORCE).should_block(resource_type, url) is blocked
+
+
+@pytest.mark.asyncio
+async def test_enforce_mode_aborts_matching_requests():
+    policy = make_policy(MODE_ENFORCE)
+    image = FakeRoute(FakeRequest("https://cdn.example/a.jpg", "image"))
+    document = FakeRoute(FakeRequest("https://www.instagram.com/", "document"))
+
+    await policy._handle_route(image)
+    await policy._handle_route(document)
+
+    assert image.outcome == "aborted"
+    assert document.outcome == "continued"
+    assert policy.stats()["blocked_requests"] == 1
+    assert policy.stats()["allowed_requests"] == 1
+    assert policy.stats()["blocked_bytes"] is None  # Never downloaded, so never measured
+    assert policy.stats()["by_type"] == {"image": {"requests": 1}}
+
+
+@pytest.mark.asyncio
+async def test_report_mode_measures_without_blocking():
+    policy = make_policy(MODE_REPORT)
+    request = FakeRequest("https://cdn.example/a.woff2", "font", body_size=4000)
+    route = FakeRoute(request)
+
+    await policy._handle_route(route)
+    await policy._measure_request(request)
+
+    assert route.outcome == "continued"
+    assert policy.stats()["by_type"] == {"font": {"requests": 1, "bytes": 4100}}
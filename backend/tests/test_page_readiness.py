@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from app.core.config import Config
+from app.core.page_readiness import PageReadiness
+
+
+class FakePage:
+    """A page whose selector and URL change happen after configurable delays (None for never)."""
+
+    def __init__(self, selector_after=None, url_change_after=None, dom_settled=True):
+        self.selector_after = selector_after
+        self.url_change_after = url_change_after
+        self.dom_settled = dom_settled
+        self.calls = []
+
+    async def _after(self, delay, timeout_ms):
+        if delay is None or delay * 1000 > timeout_ms:
+            await asyncio.sleep(timeout_ms / 1000)
+            raise TimeoutError("timed out")
+        await asyncio.sleep(delay)
+
+    async def wait_for_selector(self, selector, state, timeout):
+        await self._after(self.selector_after, timeout)
+        self.calls.append("selector")
+
+    async def wait_for_url(self, predicate, timeout, wait_until):
+        await self._after(self.url_change_after, timeout)
+        self.calls.append("url")
+
+    async def wait_for_load_state(self, state, timeout):
+        self.calls.append("load_state")
+
+    async def evaluate(self, expression, args):
+        self.calls.append("dom_settled")
+        return self.dom_settled
+
+
+@pytest.fixture(autouse=True)
+def short_timeouts(monkeypatch):
+    monkeypatch.setattr(Config, "READINESS_STEP_TIMEOUTS", {"default": 0.2})
+
+
+@pytest.mark.asyncio
+async def test_resumes_when_the_selector_appears_first():
+    page = FakePage(selector_after=0.01, url_change_after=None)
+
+    assert await PageReadiness.wait_for_step(page, "inbox", selector="#inbox", previous_url="about:blank")
+    assert page.calls == ["selector", "load_state", "dom_settled"]
+
+
+@pytest.mark.asyncio
+async def test_resumes_when_the_url_changes_first():
+    page = FakePage(selector_after=None, url_change_after=0.01)
+
+    assert await PageReadiness.wait_for_step(page, "login", selector="#inbox", previous_url="about:blank")
+    assert page.calls == ["url", "load_state", "dom_settled"]
+
+
+@pytest.mark.asyncio
+async def test_times_out_when_neither_condition_is_met():
+    page = FakePage()
+
+    assert not await PageReadiness.wait_for_step(page, "inbox", selector="#inbox", previous_url="about:blank")
+    assert "dom_settled" not in page.calls
+
+
+@pytest.mark.asyncio
+async def test_unsettled_dom_is_not_ready():
+    page = FakePage(selector_after=0.01, dom_settled=False)
+
+    assert not await PageReadiness.wait_for_step(page, "inbox", selector="#inbox")
@@ -0,0 +1,118 @@
+import pytest
+
+from app.core.agentql_wrapper import AgentQLWrapper
+from app.core.custom_exceptions import RecipientInviteSentError, RecipientNotFoundError
+from app.core.message_service import MessageService
+from app.core.recipient_cache import RecipientCache
+
+THREAD_URL = "https://www.instagram.com/direct/t/1000/"
+
+
+@pytest.fixture
+def cache(redis_helper):
+    return RecipientCache(redis_helper, thread_ttl=60, enabled=True)
+
+
+class RedirectingPage:
+    """A wrapped page whose thread no longer exists, so Instagram sends it to the inbox."""
+
+    url = "about:blank"
+
+    async def goto(self, url):
+        self.url = "https://www.instagram.com/direct/inbox/"
+
+
+@pytest.mark.asyncio
+async def test_thread_is_cached_per_sender_and_recipient(cache):
+    await cache.remember_thread("alice", "@Bob", THREAD_URL + "?theme=dark")
+
+    assert await cache.get_thread("alice", "bob") == THREAD_URL
+    assert await cache.get_thread("carol", "bob") is None
+    assert await cache.redis_helper.client.exists("thread:alice:bob")
+    await cache.forget_thread("alice", "bob")
+    assert await cache.get_thread("alice", "bob") is None
+
+
+@pytest.mark.asyncio
+async def test_pages_outside_a_thread_are_not_cached(cache):
+    await cache.remember_thread("alice", "bob", "https://www.instagram.com/direct/inbox/")
+
+    assert await cache.get_thread("alice", "bob") is None
+
+
+@pytest.mark.asyncio
+async def test_cached_thread_that_redirects_is_rejected(cache, monkeypatch):
+    async def ready(wrapped_page, step, selector=None, previous_url=None):
+        return False
+
+    monkeypatch.setattr(AgentQLWrapper, "wait_for_page_ready_state", staticmethod(ready))
+    service = MessageService(cache.redis_helper, session_service=None, recipient_cache=cache)
+
+    assert await service._open_cached_thread(RedirectingPage(), THREAD_URL) is None
+
+
+@pytest.mark.asyncio
+async def test_cached_thread_that_fails_to_load_is_rejected(cache):
+    class TimingOutPage:
+        url = "about:blank"
+
+        async def goto(self, url):
+            raise TimeoutError("Timeout 30000ms exceeded")
+
+    service = MessageService(cache.redis_helper, session_service=None, recipient_cache=cache)
+
+    assert await service._open_cached_thread(TimingOutPage(), THREAD_URL) is None
+
+
+@pytest.mark.asyncio
+async def test_unreachable_recipient_fails_fast_until_cleared(cache):
+    await cache.remember_unreachable("alice", "Ghost", RecipientNotFoundError())
+    await cache.remember_unreachable("alice", "bob", RecipientInviteSentError())
+    await cache.remember_unreachable("alice_x", "carol", RecipientNotFoundError())
+
+    with pytest.raises(RecipientNotFoundError):
+        await cache.raise_if_unreachable("alice", "ghost")
+    with pytest.raises(RecipientInviteSentError):
+        await cache.raise_if_unreachable("alice", "bob")
+    assert [entry["recipient"] for entry in await cache.list_unreachable("alice")] == ["bob", "ghost"]
+
+    assert await cache.clear_unreachable("alice", "ghost") == 1
+    await cache.raise_if_unreachable("alice", "ghost")
+    assert await cache.clear_unreachable("alice") == 1
+    assert await cache.list_unreachable("alice") == []
+    assert len(await cache.list_unreachable("alice_x")) == 1
+
+
+@pytest.mark.asyncio
+async def test_glob_characters_in_a_username_only_match_its_own_entries(cache):
+    await cache.remember_unreachable("alice", "ghost", RecipientNotFoundError())
+    await cache.remember_unreachable("a*", "ghost", RecipientNotFoundError())
+
+    assert await cache.clear_unreachable("a*") == 1
+    assert len(await cache.list_unreachable("alice")) == 1
+    assert await cache.list_unreachable("[a]lice") == []
+
+
+@pytest.mark.asyncio
+async def test_not_found_and_invite_pending_use_their_own_ttls(cache, monkeypatch):
+    monkeypatch.setattr(RecipientCache, "UNREACHABLE_ERRORS", {
+        RecipientNotFoundError: ("not_found", 600),
+        RecipientInviteSentError: ("invite_pending", 60),
+    })
+    await cache.remember_unreachable("alice", "ghost", RecipientNotFoundError())
+    await cache.remember_unreachable("alice", "bob", RecipientInviteSentError())
+
+    client = cache.redis_helper.client
+    assert 590 < await client.ttl("unreachable:alice:ghost") <= 600
+    assert 50 < await client.ttl("unreachable:alice:bob") <= 60
+
+
+@pytest.mark.asyncio
+async def test_send_to_cached_unreachable_recipient_skips_the_browser(cache):
+    await cache.remember_unreachable("alice", "ghost", RecipientNotFoundError())
+    service = MessageService(cache.redis_helper, session_service=None, recipient_cache=cache)
+
+    with pytest.raises(RecipientNotFoundError):
+        await service.send_message("ghost", "hi", "alice")
+
+    assert service.scheduler.stats()["admitted"] == 0
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from app.core.login_service import LoginService
+from app.core.selector_cache import SelectorCache, parse_query_fields
+
+
+class FakeLocator:
+    def __init__(self, page, selector):
+        self.page = page
+        self.selector = selector
+
+    async def evaluate(self, script):
+        return {"selector": self.selector, "signature": self.page.signatures[self.selector]}
+
+    async def evaluate_all(self, script):
+        return self.page.signatures.get(self.selector)
+
+
+class FakePage:
+    def __init__(self, signatures, fingerprint="www.instagram.com|direct/inbox"):
+        self.signatures = signatures
+        self.fingerprint = fingerprint
+
+    async def evaluate(self, script):
+        return self.fingerprint
+
+    def locator(self, selector):
+        return FakeLocator(self, selector)
+
+
+class FakeResponse:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+def test_parse_query_fields_handles_nested_containers():
+    assert parse_query_fields(LoginService.LOGIN_QUERY) == {
+        "login_indicator": None,
+        "signup_indicator": None,
+        "login_form": {"username_input": None, "password_input": None, "login_button": None},
+        "error_message": None,
+    }
+
+
+def test_parse_query_fields_rejects_list_queries():
+    assert parse_query_fields("{ suggestions[] }") is None
+
+
+@pytest.mark.asyncio
+async def test_stored_selectors_resolve_locally_until_they_stop_matching():
+    query = "{ send_button (aria-label='Send') }"
+    page = FakePage({'div[aria-label="Send"]': "div|button|Send|||"})
+    cache = SelectorCache(enabled=True, max_entries=8, ttl=60)
+
+    response, key = await cache.lookup(page, query)
+    assert response is None
+    await cache.store(key, query, FakeResponse(send_button=page.locator('div[aria-label="Send"]')))
+
+    response, _ = await cache.lookup(page, query)
+    assert response.send_button.selector == 'div[aria-label="Send"]'
+
+    page.signatures.clear()
+    response, _ = await cache.lookup(page, query)
+    assert response is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["stale"] == 1
+
+
+@pytest.mark.asyncio
+async def test_responses_with_missing_elements_are_not_cached():
+    query = "{ no_account_message (text='No account found.') }"
+    cache = SelectorCache(enabled=True, max_entries=8, ttl=60)
+
+    _, key = await cache.lookup(FakePage({}), query)
+    await cache.store(key, query, FakeResponse(no_account_message=None))
+
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_in_memory_entries_expire_after_the_ttl(monkeypatch):
+    query = "{ send_button (aria-label='Send') }"
+    page = FakePage({'div[aria-label="Send"]': "div|button|Send|||"})
+    cache = SelectorCache(enabled=True, max_entries=8, ttl=60)
+    _, key = await cache.lookup(page, query)
+    await cache.store(key, query, FakeResponse(send_button=page.locator('div[aria-label="Send"]')))
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    response, _ = await cache.lookup(page, query)
+
+    assert response is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,64 @@
+import pytest
+
+from app.core import tracing
+from app.core.browser_helper import BrowserHelper
+from app.core.config import Config
+from app.core.job_queue import JobQueue
+from app.core.redis_helper import RedisHelper
+from app.core.service_container import ServiceContainer
+
+
+class RecordingPool:
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def drain(self, timeout):
+        self.calls.append("drain_contexts")
+        return True
+
+    async def sweep(self):
+        pass
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    def record(name, result=None):
+        async def call(*args, **kwargs):
+            calls.append(name)
+            return result
+
+        return call
+
+    monkeypatch.setattr(Config, "BROWSER_WORKERS", 0)
+    monkeypatch.setattr(Config, "BROWSER_PREWARM", True)
+    monkeypatch.setattr(tracing, "configure", lambda: calls.append("configure_tracing"))
+    monkeypatch.setattr(tracing, "shutdown", lambda: calls.append("shutdown_tracing"))
+    monkeypatch.setattr(BrowserHelper, "initialize_playwright", staticmethod(record("launch_browser")))
+    monkeypatch.setattr(BrowserHelper, "close_browser", staticmethod(record("close_browser")))
+    monkeypatch.setattr(BrowserHelper, "get_context_pool", staticmethod(lambda: RecordingPool(calls)))
+    monkeypatch.setattr(RedisHelper, "close_pool", staticmethod(record("close_redis")))
+    monkeypatch.setattr(JobQueue, "start", record("start_jobs"))
+    monkeypatch.setattr(JobQueue, "stop", record("stop_jobs"))
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_startup_launches_the_browser_before_taking_jobs(calls):
+    container = ServiceContainer()
+
+    await container.startup()
+    container._sweeper_task.cancel()
+
+    assert calls == ["configure_tracing", "launch_browser", "start_jobs"]
+
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_work_before_closing_the_browser_and_redis(calls):
+    container = ServiceContainer()
+
+    await container.shutdown()
+
+    assert container.is_draining
+    assert calls == ["stop_jobs", "drain_contexts", "close_browser", "close_redis", "shutdown_tracing"]
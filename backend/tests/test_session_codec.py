@@ -0,0 +1,42 @@
+from cryptography.fernet import Fernet
+
+from app.core.session_codec import FORMAT_V2, SessionCodec
+
+STORAGE_STATE = {
+    "cookies": [
+        {"name": "sessionid", "value": "abc", "domain": ".instagram.com", "path": "/"},
+        {"name": "_fbp", "value": "xyz", "domain": ".facebook.com", "path": "/"},
+    ],
+    "origins": [
+        {"origin": "https://www.instagram.com", "localStorage": [{"name": "k", "value": "v"}]},
+        {"origin": "https://www.facebook.com", "localStorage": [{"name": "k", "value": "v"}]},
+    ],
+}
+
+
+def test_round_trip_keeps_only_instagram_state():
+    codec = SessionCodec(Fernet.generate_key())
+
+    blob = codec.encode(STORAGE_STATE)
+
+    assert blob[:1] == FORMAT_V2
+    assert codec.decode(blob) == {
+        "cookies": [STORAGE_STATE["cookies"][0]],
+        "origins": [STORAGE_STATE["origins"][0]],
+    }
+
+
+def test_legacy_fernet_sessions_are_still_readable():
+    key = Fernet.generate_key()
+    codec = SessionCodec(key)
+
+    legacy_blob = codec.encode_legacy(STORAGE_STATE)
+
+    assert codec.decode(legacy_blob) == STORAGE_STATE
+    assert codec.decode(legacy_blob.decode("utf-8")) == STORAGE_STATE
+
+
+def test_non_storage_state_values_round_trip_unchanged():
+    codec = SessionCodec(Fernet.generate_key())
+
+    assert codec.decode(codec.encode("refresh-token")) == "refresh-token"
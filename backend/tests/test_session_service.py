@@ -0,0 +1,111 @@
+import pytest
+
+from app.core.config import Config
+from app.core.custom_exceptions import InvalidSessionError
+from app.core.session_service import SessionService
+
+
+def storage_state(value):
+    return {"cookies": [{"name": "sessionid", "value": value, "domain": ".instagram.com"}], "origins": []}
+
+
+@pytest.fixture
+def make_session_service(make_redis_helper):
+    """Builds SessionServices sharing one fake Redis, like workers of one deployment."""
+    return lambda: SessionService(make_redis_helper())
+
+
+@pytest.mark.asyncio
+async def test_repeat_reads_are_served_from_cache(make_session_service):
+    service = make_session_service()
+    await service.save_session("alice", storage_state("abc"), ttl=60)
+
+    assert await service.get_session("alice") == storage_state("abc")
+    assert await service.get_session("alice") == storage_state("abc")
+    assert service.cache_stats()["hits"] == 2
+    assert service.cache_stats()["misses"] == 0
+
+
+@pytest.mark.asyncio
+async def test_save_in_another_worker_invalidates_cached_copy(make_session_service):
+    worker_a, worker_b = make_session_service(), make_session_service()
+    await worker_a.save_session("alice", storage_state("old"), ttl=60)
+    assert await worker_b.get_session("alice") == storage_state("old")
+
+    await worker_a.save_session("alice", storage_state("new"), ttl=60)
+
+    assert await worker_b.get_session("alice") == storage_state("new")
+
+
+@pytest.mark.asyncio
+async def test_delete_in_another_worker_invalidates_cached_copy(make_session_service):
+    worker_a, worker_b = make_session_service(), make_session_service()
+    await worker_a.save_session("alice", storage_state("abc"), ttl=60)
+    await worker_b.get_session("alice")
+
+    await worker_a.delete_session("alice")
+
+    assert not await worker_b.session_exists("alice")
+    with pytest.raises(InvalidSessionError):
+        await worker_b.get_session("alice")
+
+
+@pytest.mark.asyncio
+async def test_rotated_cookies_are_written_back_keeping_ttl(make_session_service):
+    service, other_worker = make_session_service(), make_session_service()
+    await service.save_session("alice", storage_state("old"), ttl=600)
+    await service.redis_helper.client.expire("alice_session", 300)
+
+    assert await service.update_session_state("alice", storage_state("rotated"))
+
+    assert await other_worker.get_session("alice") == storage_state("rotated")
+    assert 290 < await service.redis_helper.client.ttl("alice_session") <= 300
+
+
+@pytest.mark.asyncio
+async def test_unchanged_cookies_are_not_rewritten(make_session_service):
+    service = make_session_service()
+    await service.save_session("alice", storage_state("abc"), ttl=60)
+    unrelated_change = {**storage_state("abc"), "origins": [{"origin": "https://www.instagram.com", "localStorage": []}]}
+
+    assert not await service.update_session_state("alice", unrelated_change)
+    assert service.cache_stats()["write_backs_skipped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_write_back_does_not_recreate_a_deleted_session(make_session_service):
+    service, other_worker = make_session_service(), make_session_service()
+    await service.save_session("alice", storage_state("abc"), ttl=60)
+    await other_worker.delete_session("alice")
+
+    assert not await service.update_session_state("alice", storage_state("rotated"))
+    assert not await service.session_exists("alice")
+
+
+@pytest.mark.asyncio
+async def test_saving_worker_caches_the_same_pruned_state_as_other_workers(make_session_service):
+    saver, reader = make_session_service(), make_session_service()
+    state = storage_state("abc")
+    state["cookies"].append({"name": "tracker", "value": "x", "domain": ".ads.example.com"})
+
+    await saver.save_session("alice", state, ttl=60)
+
+    assert await saver.get_session("alice") == await reader.get_session("alice") == storage_state("abc")
+
+
+@pytest.mark.asyncio
+async def test_deleted_session_version_key_expires(make_session_service):
+    service = make_session_service()
+    await service.delete_session("alice_refresh_token")
+
+    assert 0 < await service.redis_helper.client.ttl("alice_refresh_token_session_version") <= Config.SESSION_CACHE_TTL_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_callers_cannot_change_the_cached_state(make_session_service):
+    service = make_session_service()
+    await service.save_session("alice", storage_state("abc"), ttl=60)
+
+    (await service.get_session("alice"))["cookies"].clear()
+
+    assert await service.get_session("alice") == storage_state("abc")
@@ -0,0 +1,48 @@
+import pytest
+
+from app.core.config import Config
+from app.core.text_entry import TextEntry
+
+
+class FakeElement:
+    def __init__(self):
+        self.calls = []
+        self.text = ""
+
+    async def type(self, text, delay=0):
+        self.calls.append(("type", text, delay))
+        self.text += text
+
+    async def fill(self, text):
+        self.calls.append(("fill", text))
+        self.text = text
+
+
+@pytest.fixture(autouse=True)
+def no_delays(monkeypatch):
+    monkeypatch.setattr(Config, "HUMAN_DELAY_SCALE", 0)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("strategy, round_trips", [("per_char", 11), ("keyboard", 1), ("chunked", 2), ("fill", 1)])
+async def test_strategies_enter_the_whole_text(monkeypatch, strategy, round_trips):
+    monkeypatch.setattr(Config, "TEXT_ENTRY_CHUNK_SIZE", 6)
+    element = FakeElement()
+
+    await TextEntry.enter(element, "hello world", strategy)
+
+    assert element.text == "hello world"
+    assert len(element.calls) == round_trips
+
+
+def test_chunks_break_after_spaces():
+    assert TextEntry.chunks("see you at noon", 8) == ["see you ", "at noon"]
+    assert TextEntry.chunks("abcdefgh", 3) == ["abc", "def", "gh"]
+
+
+def test_strategy_for_falls_back_to_default(monkeypatch):
+    monkeypatch.setattr(Config, "TEXT_ENTRY_STRATEGIES", {"default": "fill", "message": "chunked", "recipient": "typo"})
+
+    assert TextEntry.strategy_for("message") == "chunked"
+    assert TextEntry.strategy_for("username") == "fill"
+    assert TextEntry.strategy_for("recipient") == "keyboard"
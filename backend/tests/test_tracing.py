@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from app.core import metrics, tracing
+from app.core.trace_summary import assign_flows, load_spans, step_breakdown
+
+
+@pytest.fixture
+def span_file(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracing.configure(path=str(path), enabled=True)
+    yield path
+    tracing.shutdown()
+
+
+def read_spans(path) -> dict:
+    tracing.shutdown()  # Flushes the writer thread
+    return {span["name"]: span for span in map(json.loads, path.read_text().splitlines())}
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_request_flow_and_steps(span_file):
+    with tracing.span("POST /messages/send", "request"):
+        async with metrics.flow("send_message"):
+            with metrics.step("goto"):
+                pass
+            with pytest.raises(ValueError):
+                with metrics.agentql_query("SEND_BUTTON_QUERY", "agentql"):
+                    raise ValueError("no element")
+
+    spans = read_spans(span_file)
+    request, flow = spans["POST /messages/send"], spans["send_message"]
+    assert request["parent_id"] is None
+    assert flow["parent_id"] == request["span_id"]
+    assert spans["goto"]["parent_id"] == flow["span_id"]
+    assert spans["SEND_BUTTON_QUERY"]["outcome"] == "error"
+    assert spans["SEND_BUTTON_QUERY"]["attributes"] == {"source": "agentql"}
+    assert len({span["trace_id"] for span in spans.values()}) == 1
+
+
+def test_continued_trace_joins_the_remote_parent(span_file):
+    with tracing.span("POST /auth/login", "request"):
+        context = tracing.current_context()
+    with tracing.continue_trace(context):
+        with tracing.span("login", "flow"):
+            pass
+
+    spans = read_spans(span_file)
+    assert spans["login"]["trace_id"] == spans["POST /auth/login"]["trace_id"]
+    assert spans["login"]["parent_id"] == spans["POST /auth/login"]["span_id"]
+
+
+def test_unsampled_traces_are_not_written(span_file, monkeypatch):
+    monkeypatch.setattr(tracing.Config, "TRACING_SAMPLE_RATE", 0.0)
+    with tracing.span("GET /jobs/1", "request") as request_span:
+        with tracing.span("get", "redis") as redis_span:
+            pass
+
+    assert request_span is None and redis_span is None
+    assert read_spans(span_file) == {}
+
+
+@pytest.mark.asyncio
+async def test_breakdown_attributes_steps_to_their_flow(span_file):
+    async with metrics.flow("login"):
+        with metrics.step("human_type"):
+            pass
+    tracing.shutdown()
+
+    spans = load_spans([str(span_file)])
+    assign_flows(spans)
+    rows = step_breakdown(spans)
+
+    assert [(row["flow"], row["kind"], row["step"], row["count"]) for row in rows] == [("login", "step", "human_type", 1)]
+    assert 0 <= rows[0]["flow_share"] <= 1